@@ -0,0 +1,69 @@
+"""
+Compares the vectorized clean_tokens_by_date_Aramex_Data with the previous groupby-apply implementation
+on a synthetic Aramex sheet, and checks that both give the same output.
+
+Usage:
+    python benchmarks/bench_clean_tokens.py [rows] [dates ...]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add the scripts directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+
+from transform import clean_tokens_by_date_Aramex_Data
+
+
+def clean_tokens_with_groupby_apply(df, date_column, token_column):
+    """
+    The previous implementation, running a Python function on every date group.
+    """
+    def replace_with_mode(group):
+        group[token_column] = group[token_column].mode()[0]
+        return group
+    return df.groupby(date_column).apply(replace_with_mode).reset_index(drop=True)
+
+def make_aramex_sheet(rows, dates, seed=0):
+    """
+    Builds a sheet shaped like the transformed Aramex data, where every invoice date has a main token
+    and a few rows carry a wrong one.
+    """
+    rng = np.random.default_rng(seed)
+    invoice_dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, dates, rows), unit='D')
+    tokens = (invoice_dates.dayofyear.values * 1000 + invoice_dates.year.values % 100).astype(str).astype(object)
+    wrong = rng.random(rows) < 0.1
+    tokens[wrong] = rng.integers(100000, 100100, wrong.sum()).astype(str)
+    return pd.DataFrame({
+        'ShprNo': rng.integers(10 ** 6, 10 ** 7, rows).astype(str),
+        'AWB': rng.integers(10 ** 9, 10 ** 10, rows).astype(str),
+        'Delivery_Date': invoice_dates - pd.to_timedelta(rng.integers(0, 10, rows), unit='D'),
+        'CODAmount': rng.uniform(0, 500, rows).round(2),
+        'Aramex_Inv_date': invoice_dates,
+        'TOKENNO': tokens,
+    })
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    date_counts = [int(arg) for arg in sys.argv[2:]] or [1500, 20000]
+    for dates in date_counts:
+        df = make_aramex_sheet(rows, dates)
+        print(f"Cleaning tokens of {rows} rows over {dates} invoice dates")
+
+        start = time.perf_counter()
+        expected = clean_tokens_with_groupby_apply(df.copy(), 'Aramex_Inv_date', 'TOKENNO')
+        apply_time = time.perf_counter() - start
+        print(f"groupby-apply {apply_time:8.2f} s")
+
+        start = time.perf_counter()
+        result = clean_tokens_by_date_Aramex_Data(df.copy(), 'Aramex_Inv_date', 'TOKENNO')
+        vectorized_time = time.perf_counter() - start
+        print(f"vectorized    {vectorized_time:8.2f} s ({apply_time / vectorized_time:.1f}x faster)")
+
+        pd.testing.assert_frame_equal(result, expected)
+        print("Outputs are identical.")
+
+if __name__ == '__main__':
+    main()
@@ -14,25 +14,19 @@ sys.path.append('/opt/airflow/scripts')
 
 # Import your ETL functions
 from extract import read_data_from_excel
-from etl_functions import(extract_ecom_data,
+from etl_functions import(extract_all_data,
                           transform_ecom_data,
                           load_ecom_data,
-                          extract_aramex_data,
                           transform_aramex_data,
-                          extract_cosmaline_data,
                           transform_cosmaline_data,
                           concatenate_aramex_cosmaline_data,
                           load_concatenated_data,
-                          extract_credit_card_data,
                           transform_credit_card_data,
                           load_credit_card_data,
-                          extract_erp_data,
                           transform_erp_data,
                           load_erp_data,
-                          extract_oracle_data,
                           transform_oracle_data,
                           load_oracle_data,
-                          extract_daily_rate_data,
                           load_daily_rate_data,
                           execute_cosmaline_reconciliation,
                           execute_credit_card_reconciliaiton,
@@ -42,11 +36,12 @@ from etl_functions import(extract_ecom_data,
                           execute_invalid_oracle_order_numbers_reconciliation,
                           execute_invalid_shipping_order_numbers_reconciliation,
                           execute_token_reconciliation,
+                          commit_source_fingerprints,
+                          commit_source_watermarks,
                           cleanup_temp_tables_task, 
                           extract_data_for_models, 
                           transform_data_for_model, 
-                          generate_and_save_apriori_results, 
-                          generate_and_save_fpgrowth_results,
+                          generate_and_save_association_rules,
                           insert_apriori_results,
                           insert_fpgrowth_results,
                           extract_data_for_report,
@@ -70,6 +65,8 @@ default_args = {
     'email_on_retry':False,
     'email_on_success': False,
     'on_failure_callback': failure_email,
+    # Tasks of unchanged sources are skipped, which must not stop the tasks downstream of them
+    'trigger_rule': 'none_failed',
 }
 
 # Create the DAG
@@ -82,9 +79,10 @@ dag = DAG(
 
 # Create PythonOperator tasks for each step
 
-extract_ecom_task = PythonOperator(
-    task_id='extract_ecom_data',
-    python_callable=extract_ecom_data,
+# Single extract stage: the workbook is parsed once and every sheet is staged in the same pass
+extract_all_task = PythonOperator(
+    task_id='extract_all_data',
+    python_callable=extract_all_data,
     dag=dag,
 )
 
@@ -100,24 +98,12 @@ load_ecom_task = PythonOperator(
     dag=dag,
 )
 
-extract_aramex_task = PythonOperator(
-    task_id='extract_aramex_data',
-    python_callable=extract_aramex_data,
-    dag=dag,
-)
-
 transform_aramex_task = PythonOperator(
     task_id='transform_aramex_data',
     python_callable=transform_aramex_data,
     dag=dag,
 )
 
-extract_cosmaline_task = PythonOperator(
-    task_id='extract_cosmaline_data',
-    python_callable=extract_cosmaline_data,
-    dag=dag,
-)
-
 transform_cosmaline_task = PythonOperator(
     task_id='transform_cosmaline_data',
     python_callable=transform_cosmaline_data,
@@ -136,12 +122,6 @@ load_concatenated_task = PythonOperator(
     dag=dag,
 )
 
-extract_credit_card_task = PythonOperator(
-    task_id='extract_credit_card_data',
-    python_callable=extract_credit_card_data,
-    dag=dag,
-)
-
 transform_credit_card_task = PythonOperator(
     task_id='transform_credit_card_data',
     python_callable=transform_credit_card_data,
@@ -154,12 +134,6 @@ load_credit_card_task = PythonOperator(
     dag=dag,
 )
 
-extract_erp_task = PythonOperator(
-    task_id='extract_erp_data',
-    python_callable=extract_erp_data,
-    dag=dag,
-)
-
 transform_erp_task = PythonOperator(
     task_id='transform_erp_data',
     python_callable=transform_erp_data,
@@ -172,12 +146,6 @@ load_erp_task = PythonOperator(
     dag=dag,
 )
 
-extract_oracle_task = PythonOperator(
-    task_id='extract_oracle_data',
-    python_callable=extract_oracle_data,
-    dag=dag,
-)
-
 transform_oracle_task = PythonOperator(
     task_id='transform_oracle_data',
     python_callable=transform_oracle_data,
@@ -190,12 +158,6 @@ load_oracle_task = PythonOperator(
     dag=dag,
 )
 
-extract_daily_rate_task = PythonOperator(
-    task_id='extract_daily_rate_data',
-    python_callable=extract_daily_rate_data,
-    dag=dag,
-)
-
 load_daily_rate_task = PythonOperator(
     task_id='load_daily_rate_data',
     python_callable=load_daily_rate_data,
@@ -256,6 +218,20 @@ invalid_oracle_order_numbers_task = PythonOperator(
     dag=dag,
 )
 
+# Remember the fingerprints of this run once every source has been loaded and reconciled
+commit_fingerprints_task = PythonOperator(
+    task_id='commit_source_fingerprints',
+    python_callable=commit_source_fingerprints,
+    dag=dag,
+)
+
+# Advance the watermarks of the incremental mode once every source has been loaded and reconciled
+commit_watermarks_task = PythonOperator(
+    task_id='commit_source_watermarks',
+    python_callable=commit_source_watermarks,
+    dag=dag,
+)
+
 cleanup_task = PythonOperator(
     task_id='cleanup_temp_tables',
     python_callable=cleanup_temp_tables_task,
@@ -276,17 +252,10 @@ transform_for_model = PythonOperator(
     dag=dag,
 )
 
-# Task to generate and save Apriori model results
-generate_apriori_model = PythonOperator(
-    task_id='generate_and_save_apriori_results',
-    python_callable=generate_and_save_apriori_results,
-    dag=dag,
-)
-
-# Task to generate and save FP-Growth model results
-generate_fpgrowth_model = PythonOperator(
-    task_id='generate_and_save_fpgrowth_results',
-    python_callable=generate_and_save_fpgrowth_results,
+# Task to mine the frequent itemsets once and save both the Apriori and FP-Growth model results
+generate_association_rules = PythonOperator(
+    task_id='generate_and_save_association_rules',
+    python_callable=generate_and_save_association_rules,
     dag=dag,
 )
 
@@ -358,13 +327,14 @@ upload_files_task = PythonOperator(
 )
 # Define task dependencies
 
+# Every source is staged by the single extract stage
+extract_all_task >> [transform_ecom_task, transform_cosmaline_task, transform_aramex_task, transform_oracle_task, transform_erp_task, transform_credit_card_task, load_daily_rate_task]
+
 # ECOM tasks
-extract_ecom_task >> transform_ecom_task >> load_ecom_task
+transform_ecom_task >> load_ecom_task
 
-# Cosmaline, Aramex, and Oracle tasks
-extract_cosmaline_task >> transform_cosmaline_task
-extract_aramex_task >> transform_aramex_task
-extract_oracle_task >> transform_oracle_task >> load_oracle_task
+# Oracle tasks
+transform_oracle_task >> load_oracle_task
 
 # Transform tasks for Cosmaline and Aramex dependent on ECOM transformation
 transform_ecom_task >> transform_cosmaline_task
@@ -382,9 +352,8 @@ load_ecom_task >> load_oracle_task
 concatenate_aramex_cosmaline_task >> load_concatenated_task
 
 # ERP, Credit Card, and Daily Rate tasks (independent of others)
-extract_erp_task >> transform_erp_task >> load_erp_task
-extract_credit_card_task >> transform_credit_card_task >> load_credit_card_task
-extract_daily_rate_task >> load_daily_rate_task
+transform_erp_task >> load_erp_task
+transform_credit_card_task >> load_credit_card_task
 
 # All data loading tasks must complete before the intermediary task
 [load_ecom_task, load_concatenated_task, load_oracle_task, load_erp_task, load_credit_card_task, load_daily_rate_task] >> all_data_loaded
@@ -400,14 +369,13 @@ all_data_loaded >> invalid_shipping_order_numbers_task
 all_data_loaded >> invalid_oracle_order_numbers_task
 
 # Task dependencies to ensure cleanup_task is done before starting model-related tasks
-[token_reconciliation_task, cosmaline_reconciliation_task, ecom_reconciliation_task, credit_card_reconciliation_task, ecom_orders_not_in_shipping_task, ecom_orders_not_in_oracle_task, invalid_shipping_order_numbers_task, invalid_oracle_order_numbers_task] >> print_etl_done_task
+[token_reconciliation_task, cosmaline_reconciliation_task, ecom_reconciliation_task, credit_card_reconciliation_task, ecom_orders_not_in_shipping_task, ecom_orders_not_in_oracle_task, invalid_shipping_order_numbers_task, invalid_oracle_order_numbers_task] >> commit_fingerprints_task >> commit_watermarks_task >> print_etl_done_task
 
 # Model-related tasks start after cleanup_task
 print_etl_done_task >> extract_for_model
 extract_for_model >> transform_for_model
-transform_for_model >> [generate_apriori_model, generate_fpgrowth_model]
-generate_apriori_model >> load_model_apriori_results
-generate_fpgrowth_model >> load_model_fpgrowth_results
+transform_for_model >> generate_association_rules
+generate_association_rules >> [load_model_apriori_results, load_model_fpgrowth_results]
 
 #Report
 print_etl_done_task >> extract_task_for_report >> transform_task_for_report >> visualize_task_for_report >> create_pdf_task_for_report >> send_report_task
@@ -0,0 +1,190 @@
+"""
+Re-ingests many historical workbooks at once. Every workbook is extracted and transformed in its own worker
+of a process pool, into its own data directory, and the outputs are then loaded in the order of the workbook
+dates. Tables are merged on their primary key or row hash, so a workbook loaded twice changes nothing.
+
+The Aramex and Cosmaline rows of a workbook may belong to ECOM orders of an earlier one, so they are transformed
+in a second pass, once the ECOM key index of every workbook has been combined with those of the older ones.
+
+Usage:
+    python scripts/backfill.py DIRECTORY_OR_GLOB [--work-dir DIR] [--workers N] [--chunked] [--no-load] [--lake-dir DIR]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Add the scripts directory to the system path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from load import create_db_engine
+from key_index import read_key_index, write_key_index
+from pipeline_steps import DATA_DIR, LAKE_DIR, output_path
+from run_pipeline import EXTRACT_STEPS, build_steps, run_steps_in_order, publish_outputs, load_outputs
+
+# Transform steps that look orders up in the ECOM key index, run once the indexes of every workbook are combined
+KEY_INDEX_STEPS = ['transform_aramex_data', 'transform_cosmaline_data', 'concatenate_aramex_cosmaline_data']
+
+def workbook_date(path):
+    """
+    Gives the business date of a workbook: the first date written as YYYY-MM-DD, YYYY_MM_DD or YYYYMMDD
+    in its file name, or the date it was last modified.
+
+    Parameters:
+        path (str): The path of the workbook.
+
+    Returns:
+        pd.Timestamp: The date of the workbook.
+    """
+    match = re.search(r'(\d{4})[-_]?(\d{2})[-_]?(\d{2})', os.path.basename(path))
+    if match:
+        try:
+            return pd.Timestamp(datetime(*map(int, match.groups())))
+        except ValueError:
+            pass
+    return pd.Timestamp(os.path.getmtime(path), unit='s').normalize()
+
+def find_workbooks(source):
+    """
+    Lists the workbooks of a directory, or those matching a glob pattern, in date order.
+    Lock files left by Excel are ignored.
+
+    Parameters:
+        source (str): A directory holding .xlsx workbooks, or a glob pattern.
+
+    Returns:
+        list: The paths of the workbooks, oldest first.
+    """
+    pattern = os.path.join(source, '*.xlsx') if os.path.isdir(source) else source
+    paths = [path for path in glob.glob(pattern) if not os.path.basename(path).startswith('~$')]
+    return sorted(paths, key=lambda path: (workbook_date(path), path))
+
+def select_steps(steps, names):
+    """
+    Keeps the given steps of a graph, dropping their dependencies on the steps left out.
+    """
+    return {name: (function, [dependency for dependency in dependencies if dependency in names])
+            for name, (function, dependencies) in steps.items() if name in names}
+
+def _run_workbook_steps(workbook, data_dir, chunked, key_index_steps):
+    """
+    Runs either the first or the second pass of a workbook in a worker process and times it.
+    """
+    start_time = time.perf_counter()
+    steps = build_steps(workbook, data_dir, chunked)
+    if key_index_steps:
+        names = KEY_INDEX_STEPS
+    else:
+        os.makedirs(data_dir, exist_ok=True)
+        names = [name for name in steps if name not in KEY_INDEX_STEPS]
+    results = run_steps_in_order(select_steps(steps, names))
+    return results, time.perf_counter() - start_time
+
+def combine_key_indexes(data_dirs):
+    """
+    Combines the ECOM key indexes of several workbooks in date order and writes over the index of each one
+    the combination of its own index and those of the older workbooks, so a workbook looks its orders up in
+    its own ECOM data and in that of earlier ones, never in that of later ones. A key found in several
+    workbooks maps to the value of the most recent one.
+
+    Parameters:
+        data_dirs (list): The data directories of the workbooks, oldest first.
+
+    Returns:
+        list: The number of rows in the combined key index of every workbook.
+    """
+    combined = None
+    row_counts = []
+    for data_dir in data_dirs:
+        path = output_path('ecom_key_index', data_dir)
+        # The newest index comes first, as a key maps to the value of its first row
+        combined = pd.concat([read_key_index(path), combined], ignore_index=True)
+        row_counts.append(write_key_index(combined, path))
+    return row_counts
+
+def format_report(report):
+    """
+    Formats the throughput of a workbook as a single line.
+    """
+    megabytes = report['bytes'] / 2 ** 20
+    line = (f"{os.path.basename(report['workbook'])} ({report['date']:%Y-%m-%d}): {report['rows']} rows, {megabytes:.2f} MB "
+            f"processed in {report['seconds']:.2f} seconds ({report['rows'] / report['seconds']:.0f} rows/s, {megabytes / report['seconds']:.2f} MB/s)")
+    if 'load_seconds' in report:
+        line += f", loaded in {report['load_seconds']:.2f} seconds"
+    return line
+
+def backfill(source, work_dir=None, max_workers=None, chunked=False, load=True, lake_dir=LAKE_DIR):
+    """
+    Extracts and transforms every workbook of a directory or glob pattern in parallel, then writes them into the lake
+    and loads them in date order, so the partitions and rows of a newer workbook replace those of an older one.
+    The key indexes are combined once the first pass of every workbook is done; the workbooks are then written and
+    loaded as soon as their second pass and that of every older workbook are done.
+
+    Parameters:
+        source (str): A directory holding .xlsx workbooks, or a glob pattern.
+        work_dir (str): The directory the data directory of every workbook is created in. Defaults to DATA_DIR/backfill.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+        chunked (bool): Whether the sources are transformed one extracted chunk at a time.
+        load (bool): Whether the transformed data is loaded into the database.
+        lake_dir (str): The root directory of the lake.
+
+    Returns:
+        list: The throughput report of every workbook, in date order.
+    """
+    workbooks = find_workbooks(source)
+    if not workbooks:
+        print(f"No workbooks found for {source}.")
+        return []
+
+    work_dir = work_dir or os.path.join(DATA_DIR, 'backfill')
+    data_dirs = [os.path.join(work_dir, f"{number:04d}_{os.path.splitext(os.path.basename(workbook))[0]}") for number, workbook in enumerate(workbooks)]
+    engine = create_db_engine() if load else None
+    start_time = time.perf_counter()
+
+    reports = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        first_pass = [executor.submit(_run_workbook_steps, workbook, data_dir, chunked, False) for workbook, data_dir in zip(workbooks, data_dirs)]
+        first_results = [future.result() for future in first_pass]
+        combine_key_indexes(data_dirs)
+
+        second_pass = [executor.submit(_run_workbook_steps, workbook, data_dir, chunked, True) for workbook, data_dir in zip(workbooks, data_dirs)]
+        for workbook, data_dir, (results, first_seconds), future in zip(workbooks, data_dirs, first_results, second_pass):
+            _, second_seconds = future.result()
+            report = {
+                'workbook': workbook,
+                'date': workbook_date(workbook),
+                'rows': sum(results[name] for name in EXTRACT_STEPS),
+                'bytes': os.path.getsize(workbook),
+                'seconds': first_seconds + second_seconds,
+            }
+            publish_outputs(data_dir, lake_dir)
+            if load:
+                load_start_time = time.perf_counter()
+                load_outputs(engine, data_dir)
+                report['load_seconds'] = time.perf_counter() - load_start_time
+            print(format_report(report))
+            reports.append(report)
+
+    total_rows = sum(report['rows'] for report in reports)
+    total_seconds = time.perf_counter() - start_time
+    print(f"Backfilled {len(reports)} workbooks, {total_rows} rows, in {total_seconds:.2f} seconds ({total_rows / total_seconds:.0f} rows/s).")
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-ingests many historical workbooks in parallel.')
+    parser.add_argument('source', help='Directory holding the workbooks, or a glob pattern matching them.')
+    parser.add_argument('--work-dir', default=None, help='Directory the data directory of every workbook is created in.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--chunked', action='store_true', help='Transform the sources one extracted chunk at a time.')
+    parser.add_argument('--no-load', action='store_true', help='Only extract, transform and write the workbooks into the lake.')
+    parser.add_argument('--lake-dir', default=LAKE_DIR, help='Root directory of the lake the transformed data is written into.')
+    args = parser.parse_args(argv)
+    backfill(args.source, args.work_dir, args.workers, args.chunked, not args.no_load, args.lake_dir)
+
+if __name__ == '__main__':
+    main()
@@ -2,284 +2,407 @@ import pandas as pd
 from datetime import datetime
 import sys
 import os
-from sqlalchemy import inspect
-
-from extract import read_data_from_excel, fetch_data_from_db_for_models
+import time
+from functools import partial
+from airflow.exceptions import AirflowSkipException
+
+from extract import extract_sheets_to_files, fetch_data_from_db_for_models
+from staging import read_staged_data
+from schemas import SHEET_SCHEMAS
+from fingerprints import file_fingerprint, fingerprint_key, stage_fingerprints, has_changed, commit_fingerprints
+from watermarks import watermark_cutoff, rows_since, stage_watermarks, commit_watermarks
 from transform import expand_column_to_rows
-from transform_pipelines import (concatenate_Aramex_Cosmaline,
-                       convert_data_types_aramex_cosmaline,
-                       data_preprocessing_pipeline_ECOM_Data, 
-                       data_preprocessing_pipeline_Aramex_Data, 
-                       data_preprocessing_pipeline_Cosmaline_Data, 
-                       data_preprocessing_pipeline_Cosmaline_Aramex_Data,
-                       data_preprocessing_pipeline_CreditCard_Data, 
-                       data_preprocessing_pipeline_ERP_Data, 
-                       data_preprocessing_pipeline_Oracle_Data)
-from load import create_db_engine, upload_dataframe_to_temp_sql, merge_data_from_temp_to_main_with_pk, merge_data_from_temp_to_main_without_pk,cleanup_temp_tables
+from pipeline_steps import (SOURCE_WORKBOOK, data_path, extract_targets, output_path,
+                            transform_ecom, transform_aramex, transform_cosmaline, concatenate_aramex_cosmaline,
+                            transform_credit_card, transform_erp, transform_oracle, publish_output,
+                            load_ecom, load_aramex_cosmaline, load_credit_card, load_erp, load_oracle, load_daily_rate, load_rules)
+from load import create_db_engine, cleanup_temp_tables
 from reconciliation import execute_reconciliation_script
+from stage_metrics import instrument
 from email_notifications import success_email, failure_email
-from models.generate_apriori import generate_apriori_results
-from models.generate_fpgrowth import generate_fpgrowth_results
+from models.generate_rules import generate_rule_sets
+from models.itemsets import write_itemsets
 from models.transform_pipelines_for_model import preprocessing_pipeline_for_model, preprocessing_pipeline_for_report
 from models.visualizations import generate_all_visualizations
 from models.generate_pdf import generate_pdf_report
 from models.upload_to_github import upload_files_to_github
 
+# Sheet of the source workbook -> staged file written by the extract stage
+EXTRACT_TARGETS = extract_targets()
+
+# Content hash of every staged sheet, for the last successful run and for the current one
+FINGERPRINT_STORE = data_path('source_fingerprints.json')
+PENDING_FINGERPRINTS = data_path('source_fingerprints_pending.json')
+
+# Sheets every main table is built from; the Aramex/Cosmaline rows are enriched with ECOM data
+TABLE_SOURCE_SHEETS = {
+    'ecom_orders': ['Website ECOM Data'],
+    'shippedandcollected_aramex_cosmaline': ['Shipped & Collected - Aramex', 'Shipped & Collected - Cosmaline', 'Website ECOM Data'],
+    'credit_card': ['Collected - Credit Card'],
+    'erp_data': ['ERP-Oracle Collection'],
+    'oracle_data': ['Oracle Data'],
+    'daily_rate': ['Daily Rate'],
+}
+
+# Main tables read by every reconciliation script
+RECONCILIATION_SOURCE_TABLES = {
+    'cosmaline_reconciliation.sql': ['daily_rate', 'erp_data', 'shippedandcollected_aramex_cosmaline'],
+    'credit_card_reconciliaiton.sql': ['credit_card', 'erp_data'],
+    'ecom_orders_not_in_oracle_reconciliation.sql': ['ecom_orders', 'oracle_data'],
+    'ecom_orders_not_in_shipping_reconciliation.sql': ['ecom_orders', 'shippedandcollected_aramex_cosmaline'],
+    'ecom_reconciliation.sql': ['daily_rate', 'ecom_orders', 'shippedandcollected_aramex_cosmaline'],
+    'invalid_oracle_order_numbers_reconciliation.sql': ['ecom_orders', 'oracle_data'],
+    'invalid_shipping_order_numbers_reconciliation.sql': ['ecom_orders', 'shippedandcollected_aramex_cosmaline'],
+    'token_reconciliation.sql': ['daily_rate', 'erp_data', 'shippedandcollected_aramex_cosmaline'],
+}
+
+# Incremental mode only ingests the rows past the watermark of the last successful run,
+# going back a few extra days to catch rows that arrive late
+INCREMENTAL_MODE = os.environ.get('ETL_INCREMENTAL_MODE', 'false').lower() == 'true'
+LATE_ARRIVAL_LOOKBACK_DAYS = int(os.environ.get('ETL_LATE_ARRIVAL_LOOKBACK_DAYS', '3'))
+WATERMARK_STORE = data_path('source_watermarks.json')
+PENDING_WATERMARKS = data_path('source_watermarks_pending.json')
+
+# Incremental mining updates the itemset counts of the last run with the new orders only,
+# and mines the itemsets in full when that cannot give the same result
+INCREMENTAL_MINING = os.environ.get('ETL_INCREMENTAL_MINING', 'false').lower() == 'true'
+ITEMSET_STORE = data_path('itemset_store')
+
+# Column of every sheet that tells how recent a row is
+WATERMARK_COLUMNS = {
+    'Website ECOM Data': 'Created At',
+    'Shipped & Collected - Aramex': 'Delivery_Date',
+    'Shipped & Collected - Cosmaline': 'Driver_Delivery_date',
+    'Collected - Credit Card': 'Value_date',
+    'ERP-Oracle Collection': 'RECEIPT_DATE',
+    'Oracle Data': 'ORDERED_DATE',
+    'Daily Rate': 'Date',
+}
+
+# The full transformed ECOM data is the AWB lookup of the shipping sheets, so ECOM rows are only filtered when loaded
+FILTERED_AT_LOAD = {'Website ECOM Data'}
+
+# Chunked mode transforms the staged sheets one extracted chunk at a time instead of as a single DataFrame,
+# for sources larger than memory. Either way the transformed data is written as a directory of Parquet parts.
+CHUNKED_TRANSFORM = os.environ.get('ETL_CHUNKED_TRANSFORM', 'false').lower() == 'true'
+
+def extract_sheets(targets):
+    """
+    Stages the given sheets of the source workbook and records their fingerprints and watermarks for the current run.
+    In incremental mode only the rows past the watermark of the last successful run are staged.
+    """
+    chunk_filters = {}
+    if INCREMENTAL_MODE:
+        for sheet_name in targets:
+            since = watermark_cutoff(sheet_name, WATERMARK_STORE, LATE_ARRIVAL_LOOKBACK_DAYS)
+            if since is not None and sheet_name not in FILTERED_AT_LOAD:
+                chunk_filters[sheet_name] = partial(rows_since, column=WATERMARK_COLUMNS[sheet_name], since=since)
+    extract_sheets_to_files(SOURCE_WORKBOOK, targets, SHEET_SCHEMAS, chunk_filters=chunk_filters)
+
+    current = {fingerprint_key(SOURCE_WORKBOOK, sheet_name): file_fingerprint(path) for sheet_name, path in targets.items()}
+    changed = stage_fingerprints(current, FINGERPRINT_STORE, PENDING_FINGERPRINTS)
+    print(f"{len(changed)} of {len(current)} sheets changed since the last successful run: {changed}")
+
+    latest = {sheet_name: read_staged_data(path, columns=[WATERMARK_COLUMNS[sheet_name]])[WATERMARK_COLUMNS[sheet_name]].max()
+              for sheet_name, path in targets.items()}
+    stage_watermarks(latest, PENDING_WATERMARKS)
+
+def rows_to_load(df, sheet_name, column):
+    """
+    In incremental mode, keeps the rows of a sheet filtered at load time that are past its watermark.
+    """
+    if not INCREMENTAL_MODE:
+        return df
+    since = watermark_cutoff(sheet_name, WATERMARK_STORE, LATE_ARRIVAL_LOOKBACK_DAYS)
+    return df if since is None else rows_since(df, column, since)
+
+def skip_if_unchanged(sheet_names):
+    """
+    Skips the running task when none of the given sheets changed since the last successful run.
+    """
+    keys = [fingerprint_key(SOURCE_WORKBOOK, sheet_name) for sheet_name in sheet_names]
+    if not has_changed(keys, PENDING_FINGERPRINTS):
+        raise AirflowSkipException(f"{', '.join(sheet_names)} unchanged since the last successful run.")
+
+def skip_reconciliation_if_unchanged(script_filename):
+    sheet_names = {sheet_name for table in RECONCILIATION_SOURCE_TABLES[script_filename] for sheet_name in TABLE_SOURCE_SHEETS[table]}
+    skip_if_unchanged(sorted(sheet_names))
+
+def commit_source_fingerprints():
+    commit_fingerprints(FINGERPRINT_STORE, PENDING_FINGERPRINTS)
+
+def commit_source_watermarks():
+    commit_watermarks(WATERMARK_STORE, PENDING_WATERMARKS)
+
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=list(EXTRACT_TARGETS.values()))
+def extract_all_data():
+    extract_sheets(EXTRACT_TARGETS)
+
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Website ECOM Data']])
 def extract_ecom_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Website ECOM Data')
-    df.to_csv('/opt/airflow/data/ecom_data.csv', index=False)
+    extract_sheets({'Website ECOM Data': EXTRACT_TARGETS['Website ECOM Data']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['Website ECOM Data']], outputs=[output_path('ecom_orders')])
 def transform_ecom_data():
-    df = pd.read_csv('/opt/airflow/data/ecom_data.csv')
-    df = data_preprocessing_pipeline_ECOM_Data(df)
-    df.to_parquet('/opt/airflow/data/transformed_ecom_data.parquet', index=False)
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['ecom_orders'])
+    transform_ecom(chunked=CHUNKED_TRANSFORM)
+    publish_output('ecom_orders')
 
+@instrument('load', inputs=[output_path('ecom_orders')])
 def load_ecom_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['ecom_orders'])
     engine = create_db_engine()
-    df = pd.read_parquet('/opt/airflow/data/transformed_ecom_data.parquet')
-    upload_dataframe_to_temp_sql(df, 'temp_ecom_orders', engine)
-    merge_data_from_temp_to_main_with_pk('temp_ecom_orders', 'ECOM_orders', engine)
+    return load_ecom(engine, row_filter=partial(rows_to_load, sheet_name='Website ECOM Data', column='created_at'))
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Shipped & Collected - Aramex']])
 def extract_aramex_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Shipped & Collected - Aramex')
-    df.to_csv('/opt/airflow/data/aramex_data.csv', index=False)
+    extract_sheets({'Shipped & Collected - Aramex': EXTRACT_TARGETS['Shipped & Collected - Aramex']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['Shipped & Collected - Aramex'], output_path('ecom_key_index')], outputs=[output_path('aramex')])
 def transform_aramex_data():
-    df = pd.read_csv('/opt/airflow/data/aramex_data.csv')
-    ecom_data = pd.read_parquet('/opt/airflow/data/transformed_ecom_data.parquet')
-    df = data_preprocessing_pipeline_Aramex_Data(df, ecom_data)
-    df.to_parquet('/opt/airflow/data/transformed_aramex_data.parquet', index=False)
+    skip_if_unchanged(['Shipped & Collected - Aramex', 'Website ECOM Data'])
+    transform_aramex(chunked=CHUNKED_TRANSFORM)
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Shipped & Collected - Cosmaline']])
 def extract_cosmaline_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Shipped & Collected - Cosmaline')
-    df.to_csv('/opt/airflow/data/cosmaline_data.csv', index=False)
+    extract_sheets({'Shipped & Collected - Cosmaline': EXTRACT_TARGETS['Shipped & Collected - Cosmaline']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['Shipped & Collected - Cosmaline'], output_path('ecom_key_index')], outputs=[output_path('cosmaline')])
 def transform_cosmaline_data():
-    df = pd.read_csv('/opt/airflow/data/cosmaline_data.csv')
-    ecom_data = pd.read_parquet('/opt/airflow/data/transformed_ecom_data.parquet')
-    df = data_preprocessing_pipeline_Cosmaline_Data(df, ecom_data)
-    df.to_parquet('/opt/airflow/data/transformed_cosmaline_data.parquet', index=False)
+    skip_if_unchanged(['Shipped & Collected - Cosmaline', 'Website ECOM Data'])
+    transform_cosmaline()
 
+@instrument('transform', inputs=[output_path('aramex'), output_path('cosmaline')], outputs=[output_path('shippedandcollected_aramex_cosmaline')])
 def concatenate_aramex_cosmaline_data():
-    aramex_data = pd.read_parquet('/opt/airflow/data/transformed_aramex_data.parquet')
-    cosmaline_data = pd.read_parquet('/opt/airflow/data/transformed_cosmaline_data.parquet')
-    aramex_data = convert_data_types_aramex_cosmaline(aramex_data)
-    cosmaline_data = convert_data_types_aramex_cosmaline(cosmaline_data)
-    combined_df = concatenate_Aramex_Cosmaline(aramex_data, cosmaline_data)
-    combined_df.to_parquet('/opt/airflow/data/aramex_cosmaline_data.parquet', index=False)
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['shippedandcollected_aramex_cosmaline'])
+    concatenate_aramex_cosmaline()
+    publish_output('shippedandcollected_aramex_cosmaline')
 
+@instrument('load', inputs=[output_path('shippedandcollected_aramex_cosmaline')])
 def load_concatenated_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['shippedandcollected_aramex_cosmaline'])
     engine = create_db_engine()
-    combined_df = pd.read_parquet('/opt/airflow/data/aramex_cosmaline_data.parquet')
-    upload_dataframe_to_temp_sql(combined_df, 'temp_shippedandcollected_aramex_cosmaline', engine)
-    merge_data_from_temp_to_main_with_pk('temp_shippedandcollected_aramex_cosmaline', 'shippedandcollected_aramex_cosmaline', engine)
+    return load_aramex_cosmaline(engine)
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Collected - Credit Card']])
 def extract_credit_card_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Collected - Credit Card')
-    df.to_csv('/opt/airflow/data/credit_card_data.csv', index=False)
+    extract_sheets({'Collected - Credit Card': EXTRACT_TARGETS['Collected - Credit Card']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['Collected - Credit Card']], outputs=[output_path('credit_card')])
 def transform_credit_card_data():
-    df = pd.read_csv('/opt/airflow/data/credit_card_data.csv')
-    df = data_preprocessing_pipeline_CreditCard_Data(df)
-    df.to_parquet('/opt/airflow/data/transformed_credit_card_data.parquet', index=False)
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['credit_card'])
+    transform_credit_card(chunked=CHUNKED_TRANSFORM)
+    publish_output('credit_card')
 
+@instrument('load', inputs=[output_path('credit_card')])
 def load_credit_card_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['credit_card'])
     engine = create_db_engine()
-    df = pd.read_parquet('/opt/airflow/data/transformed_credit_card_data.parquet')
-    upload_dataframe_to_temp_sql(df, 'temp_credit_card', engine)
-    unique_columns = ['value_date', 'narrative', 'amount', 'currency']
-    merge_data_from_temp_to_main_without_pk('temp_credit_card', 'credit_card', engine, unique_columns)
+    return load_credit_card(engine)
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['ERP-Oracle Collection']])
 def extract_erp_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='ERP-Oracle Collection')
-    df.to_csv('/opt/airflow/data/erp_data.csv', index=False)
+    extract_sheets({'ERP-Oracle Collection': EXTRACT_TARGETS['ERP-Oracle Collection']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['ERP-Oracle Collection']], outputs=[output_path('erp_data')])
 def transform_erp_data():
-    df = pd.read_csv('/opt/airflow/data/erp_data.csv')
-    df = data_preprocessing_pipeline_ERP_Data(df)
-    df.to_parquet('/opt/airflow/data/transformed_erp_data.parquet', index=False)
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['erp_data'])
+    transform_erp(chunked=CHUNKED_TRANSFORM)
+    publish_output('erp_data')
 
+@instrument('load', inputs=[output_path('erp_data')])
 def load_erp_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['erp_data'])
     engine = create_db_engine()
-    df = pd.read_parquet('/opt/airflow/data/transformed_erp_data.parquet')
-    upload_dataframe_to_temp_sql(df, 'temp_erp_data', engine)
-    merge_data_from_temp_to_main_with_pk('temp_erp_data', 'erp_data', engine)
+    return load_erp(engine)
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Oracle Data']])
 def extract_oracle_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Oracle Data')
-    df.to_csv('/opt/airflow/data/oracle_data.csv', index=False)
+    extract_sheets({'Oracle Data': EXTRACT_TARGETS['Oracle Data']})
 
+@instrument('transform', inputs=[EXTRACT_TARGETS['Oracle Data']], outputs=[output_path('oracle_data')])
 def transform_oracle_data():
-    df = pd.read_csv('/opt/airflow/data/oracle_data.csv')
-    df = data_preprocessing_pipeline_Oracle_Data(df)
-    df.to_parquet('/opt/airflow/data/transformed_oracle_data.parquet', index=False)
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['oracle_data'])
+    transform_oracle(chunked=CHUNKED_TRANSFORM)
+    publish_output('oracle_data')
 
+@instrument('load', inputs=[output_path('oracle_data')])
 def load_oracle_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['oracle_data'])
     engine = create_db_engine()
-    df = pd.read_parquet('/opt/airflow/data/transformed_oracle_data.parquet')
-    upload_dataframe_to_temp_sql(df, 'temp_oracle_data', engine)
-    unique_columns = ['operating_unit_name', 'oracle_reference_order_number', 'ecom_reference_order_number', 'order_type', 'order_type_name', 'ordered_item', 'ordered_quantity', 'pricing_quantity_uom', 'unit_selling_price', 'unit_list_price', 'ordered_date', 'customer_name', 'tax_code']
-    merge_data_from_temp_to_main_without_pk('temp_oracle_data', 'oracle_data', engine, unique_columns)
+    return load_oracle(engine)
 
+@instrument('extract', inputs=[SOURCE_WORKBOOK], outputs=[EXTRACT_TARGETS['Daily Rate']])
 def extract_daily_rate_data():
-    df = read_data_from_excel('/opt/airflow/data/Final File.xlsx', sheet_name='Daily Rate')
-    df.to_csv('/opt/airflow/data/daily_rate_data.csv', index=False)
+    extract_sheets({'Daily Rate': EXTRACT_TARGETS['Daily Rate']})
 
+@instrument('load', inputs=[EXTRACT_TARGETS['Daily Rate']])
 def load_daily_rate_data():
+    skip_if_unchanged(TABLE_SOURCE_SHEETS['daily_rate'])
     engine = create_db_engine()
-    df = pd.read_csv('/opt/airflow/data/daily_rate_data.csv')
-    df.columns = [col.lower() for col in df.columns]
-    upload_dataframe_to_temp_sql(df, 'temp_daily_rate', engine)
-    inspector = inspect(engine)
-    main_table_columns = [column['name'] for column in inspector.get_columns('daily_rate') if column['name'] != 'id']
-    unique_columns = [col for col in df.columns if col in main_table_columns]
-    merge_data_from_temp_to_main_without_pk('temp_daily_rate', 'daily_rate', engine, unique_columns)
+    return load_daily_rate(engine)
 
+@instrument('reconciliation')
 def execute_cosmaline_reconciliation():
+    skip_reconciliation_if_unchanged('cosmaline_reconciliation.sql')
     execute_reconciliation_script('cosmaline_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_credit_card_reconciliaiton():
+    skip_reconciliation_if_unchanged('credit_card_reconciliaiton.sql')
     execute_reconciliation_script('credit_card_reconciliaiton.sql')
 
+@instrument('reconciliation')
 def execute_ecom_orders_not_in_oracle_reconciliation():
+    skip_reconciliation_if_unchanged('ecom_orders_not_in_oracle_reconciliation.sql')
     execute_reconciliation_script('ecom_orders_not_in_oracle_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_ecom_orders_not_in_shipping_reconciliation():
+    skip_reconciliation_if_unchanged('ecom_orders_not_in_shipping_reconciliation.sql')
     execute_reconciliation_script('ecom_orders_not_in_shipping_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_ecom_reconciliation():
+    skip_reconciliation_if_unchanged('ecom_reconciliation.sql')
     execute_reconciliation_script('ecom_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_invalid_oracle_order_numbers_reconciliation():
+    skip_reconciliation_if_unchanged('invalid_oracle_order_numbers_reconciliation.sql')
     execute_reconciliation_script('invalid_oracle_order_numbers_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_invalid_shipping_order_numbers_reconciliation():
+    skip_reconciliation_if_unchanged('invalid_shipping_order_numbers_reconciliation.sql')
     execute_reconciliation_script('invalid_shipping_order_numbers_reconciliation.sql')
 
+@instrument('reconciliation')
 def execute_token_reconciliation():
+    skip_reconciliation_if_unchanged('token_reconciliation.sql')
     execute_reconciliation_script('token_reconciliation.sql')
     
+@instrument('load')
 def cleanup_temp_tables_task():
     engine = create_db_engine()
     cleanup_temp_tables(engine)
     
+@instrument('model', outputs=[data_path('data_for_model.csv')])
 def extract_data_for_models():
     df = fetch_data_from_db_for_models()
-    df.to_csv('/opt/airflow/data/data_for_model.csv')
+    df.to_csv(data_path('data_for_model.csv'))
 
+@instrument('model', inputs=[data_path('data_for_model.csv')], outputs=[data_path('data_for_model.parquet')])
 def transform_data_for_model():
-    df = pd.read_csv('/opt/airflow/data/data_for_model.csv')
+    df = pd.read_csv(data_path('data_for_model.csv'))
     df = preprocessing_pipeline_for_model(df)
-    df.to_parquet('/opt/airflow/data/data_for_model.parquet', index=False)
+    df.to_parquet(data_path('data_for_model.parquet'), index=False)
     
-def generate_and_save_apriori_results():
-    df = pd.read_parquet('/opt/airflow/data/data_for_model.parquet')
-    apriori_results = generate_apriori_results(df)
-    apriori_results.to_parquet('/opt/airflow/data/apriori_results.parquet', index=False)
-
-def generate_and_save_fpgrowth_results():
-    df = pd.read_parquet('/opt/airflow/data/data_for_model.parquet')
-    fpgrowth_results = generate_fpgrowth_results(df)
-    fpgrowth_results.to_parquet('/opt/airflow/data/fpgrowth_results.parquet', index=False)
+@instrument('model', inputs=[data_path('data_for_model.parquet')], outputs=[data_path('frequent_itemsets.parquet')])
+def generate_and_save_association_rules():
+    # Mine the frequent itemsets once and derive both rule sets from them
+    df = pd.read_parquet(data_path('data_for_model.parquet'))
+    frequent_itemsets, products, apriori_results, fpgrowth_results = generate_rule_sets(df, ITEMSET_STORE if INCREMENTAL_MINING else None)
+    write_itemsets(frequent_itemsets, data_path('frequent_itemsets.parquet'))
+    products.to_parquet(data_path('rule_products.parquet'), index=False)
+    apriori_results.to_parquet(data_path('apriori_results.parquet'), index=False)
+    fpgrowth_results.to_parquet(data_path('fpgrowth_results.parquet'), index=False)
     
-def sanitize_column_names(df):
-    """
-    Rename DataFrame columns to be valid SQL identifiers by replacing spaces and special characters with underscores.
-    """
-    df.columns = [col.replace(' ', '_').replace('.', '').lower() for col in df.columns]
-    return df
-
-def handle_inf_values(df):
+def remove_duplicates(table_name, engine, primary_key='id', hash_column='row_hash'):
     """
-    Replaces inf and -inf values with NaN, and then replaces NaN with 0 in the DataFrame.
+    Removes the duplicate rows of a table, keeping the most recent one of each row hash.
+    The rows to keep are collected with a single GROUP BY on the indexed hash column, and everything else
+    is deleted with one join on the primary key, so the cost grows linearly with the table.
 
     Parameters:
-    df (DataFrame): The DataFrame to process.
+        table_name (str): The name of the SQL table.
+        engine: The SQLAlchemy engine object connected to the database.
+        primary_key (str): The primary key of the table.
+        hash_column (str): The column holding the hash of the row.
 
     Returns:
-    DataFrame: The processed DataFrame with inf and NaN values handled.
-    """
-    # Replace inf and -inf with NaN
-    df.replace([float('inf'), float('-inf')], pd.NA, inplace=True)
-    # Replace NaN with 0
-    df.fillna(0, inplace=True)
-    return df
-    
-def round_float_columns(df, decimal_places=3):
-    float_cols = df.select_dtypes(include=['float64']).columns
-    df[float_cols] = df[float_cols].round(decimal_places)
-    return df
-
-def remove_duplicates(table_name, engine, columns, primary_key='id'):
-    column_list = ', '.join(columns)
-    # Exclude 'db_entry_time' and 'db_update_time' from duplicate check
-    duplicate_check_columns = [col for col in columns if col not in ['db_entry_time', 'db_update_time']]
-
-    delete_duplicates_query = f"""
-    DELETE t1 FROM {table_name} t1
-    INNER JOIN {table_name} t2 
-    WHERE 
-        t1.{primary_key} < t2.{primary_key} AND
-        { ' AND '.join([f't1.{col} = t2.{col}' for col in duplicate_check_columns]) };
+        int: The number of rows removed.
     """
+    start_time = time.perf_counter()
+    keep_table_name = f"{table_name}_keep"
 
     with engine.connect() as conn:
-        conn.execute(delete_duplicates_query)
+        conn.execute(f"DROP TEMPORARY TABLE IF EXISTS {keep_table_name}")
+        conn.execute(f"""
+        CREATE TEMPORARY TABLE {keep_table_name} (PRIMARY KEY ({primary_key}))
+        SELECT MAX({primary_key}) AS {primary_key}
+        FROM {table_name}
+        WHERE {hash_column} IS NOT NULL
+        GROUP BY {hash_column}
+        """)
+        result = conn.execute(f"""
+        DELETE t FROM {table_name} t
+        LEFT JOIN {keep_table_name} k ON t.{primary_key} = k.{primary_key}
+        WHERE t.{hash_column} IS NOT NULL AND k.{primary_key} IS NULL
+        """)
+        removed_rows = result.rowcount
+        conn.execute(f"DROP TEMPORARY TABLE IF EXISTS {keep_table_name}")
         conn.execute("COMMIT;")
+
+    print(f"Removed {removed_rows} duplicate rows from {table_name} in {time.perf_counter() - start_time:.2f} seconds.")
+    return removed_rows
     
+@instrument('load', inputs=[data_path('apriori_results.parquet'), data_path('rule_products.parquet')])
 def insert_apriori_results():
     engine = create_db_engine()
     
     # Insert Apriori results
-    apriori_results = pd.read_parquet('/opt/airflow/data/apriori_results.parquet')
-    apriori_results = sanitize_column_names(apriori_results)
-    apriori_results = handle_inf_values(apriori_results)
-    apriori_results = round_float_columns(apriori_results, decimal_places=3)
-    upload_dataframe_to_temp_sql(apriori_results, 'apriori_temp_results', engine, index=False)
-    columns = ['antecedents', 'consequents', 'antecedent_support', 'consequent_support', 'support', 'confidence', 'lift', 'leverage', 'conviction', 'zhangs_metric']
-    merge_data_from_temp_to_main_without_pk('apriori_temp_results', 'apriori_results', engine, columns)
-    remove_duplicates('apriori_results', engine, columns)
+    row_count = load_rules('apriori_results', engine)
+    remove_duplicates('apriori_results', engine)
+    return row_count
 
+@instrument('load', inputs=[data_path('fpgrowth_results.parquet'), data_path('rule_products.parquet')])
 def insert_fpgrowth_results():
     engine = create_db_engine()
     
     # Insert FP-Growth results
-    fpgrowth_results = pd.read_parquet('/opt/airflow/data/fpgrowth_results.parquet')
-    fpgrowth_results = sanitize_column_names(fpgrowth_results)
-    fpgrowth_results = handle_inf_values(fpgrowth_results)
-    fpgrowth_results = round_float_columns(fpgrowth_results, decimal_places=3)
-    upload_dataframe_to_temp_sql(fpgrowth_results, 'fpgrowth_temp_results', engine, index=False)
-    columns = ['antecedents', 'consequents', 'antecedent_support', 'consequent_support', 'support', 'confidence', 'lift', 'leverage', 'conviction', 'zhangs_metric']
-    merge_data_from_temp_to_main_without_pk('fpgrowth_temp_results', 'fpgrowth_results', engine, columns)
-    remove_duplicates('fpgrowth_results', engine, columns)
+    row_count = load_rules('fpgrowth_results', engine)
+    remove_duplicates('fpgrowth_results', engine)
+    return row_count
 
 #---------------------------------------------------------------Report
 
+# Files of the report, kept next to the report scripts
+REPORT_DIR = '/opt/airflow/scripts/models'
+REPORT_DATA = os.path.join(REPORT_DIR, 'data', 'data_for_report.csv')
+TRANSFORMED_REPORT_DATA = os.path.join(REPORT_DIR, 'data', 'transformed_data_for_report.parquet')
+TRANSFORMED_REPORT_DATA_EXPANDED = os.path.join(REPORT_DIR, 'data', 'transformed_data_expanded_for_report.parquet')
+REPORT_VISUALS_DIR = os.path.join(REPORT_DIR, 'visuals')
+
+@instrument('report', outputs=[REPORT_DATA])
 def extract_data_for_report():
     df = fetch_data_from_db_for_models()
-    df.to_csv('/opt/airflow/scripts/models/data/data_for_report.csv')
+    df.to_csv(REPORT_DATA)
     
+@instrument('report', inputs=[REPORT_DATA], outputs=[TRANSFORMED_REPORT_DATA, TRANSFORMED_REPORT_DATA_EXPANDED])
 def transform_data_for_report():
-    df = pd.read_csv('/opt/airflow/scripts/models/data/data_for_report.csv')
+    df = pd.read_csv(REPORT_DATA)
     df = preprocessing_pipeline_for_report(df)
     df_expanded = expand_column_to_rows(df, 'product_category')
-    df.to_parquet('/opt/airflow/scripts/models/data/transformed_data_for_report.parquet', index=False)
-    df_expanded.to_parquet('/opt/airflow/scripts/models/data/transformed_data_expanded_for_report.parquet', index=False)
+    df.to_parquet(TRANSFORMED_REPORT_DATA, index=False)
+    df_expanded.to_parquet(TRANSFORMED_REPORT_DATA_EXPANDED, index=False)
         
 
+@instrument('report', inputs=[REPORT_VISUALS_DIR], outputs=[os.path.join(REPORT_DIR, 'sales_report.pdf')])
 def create_pdf_report_task():
     # Define the output directory and the path for the PDF report
-    output_dir = '/opt/airflow/scripts/models'
+    output_dir = REPORT_DIR
     pdf_path = os.path.join(output_dir, 'sales_report.pdf')
 
     # Call the function to generate the PDF report
     generate_pdf_report(output_dir, pdf_path)
     print(f"PDF report generated and saved to {pdf_path}")
 
+@instrument('report', inputs=[TRANSFORMED_REPORT_DATA, TRANSFORMED_REPORT_DATA_EXPANDED], outputs=[REPORT_VISUALS_DIR])
 def generate_visualizations_task():
-    output_dir = '/opt/airflow/scripts/models/visuals'
-    transformed_data_path = '/opt/airflow/scripts/models/data/transformed_data_for_report.parquet'
-    transformed_data_expanded_path = '/opt/airflow/scripts/models/data/transformed_data_expanded_for_report.parquet'
+    output_dir = REPORT_VISUALS_DIR
+    transformed_data_path = TRANSFORMED_REPORT_DATA
+    transformed_data_expanded_path = TRANSFORMED_REPORT_DATA_EXPANDED
     df = pd.read_parquet(transformed_data_path)
     df_expanded = pd.read_parquet(transformed_data_expanded_path)
 
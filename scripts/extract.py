@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
+import openpyxl
 from load import create_db_engine
+from staging import write_staged_chunks
 from sqlalchemy import create_engine, Table, Column, String, MetaData, select
 
+DEFAULT_CHUNKSIZE = 50000
+
 def read_data_from_excel(filepath, sheet_name='Website ECOM Data'):
     """
     Reads data from an Excel file into a Pandas DataFrame.
@@ -21,8 +25,97 @@ def read_data_from_excel(filepath, sheet_name='Website ECOM Data'):
     except Exception as e:
         print(f"An error occurred while reading the data: {e}")
         return None
-    
 
+def iter_sheet_chunks(worksheet, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Walks the rows of a read-only worksheet lazily and yields them as fixed-size DataFrame chunks.
+    The first row is used as the header; columns without a header and fully empty rows are skipped.
+
+    Parameters:
+        worksheet: An openpyxl worksheet, ideally from a workbook opened with read_only=True.
+        chunksize (int): The maximum number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows. A sheet with a header but no rows yields one empty DataFrame.
+    """
+    if hasattr(worksheet, 'reset_dimensions'):
+        # Some writers store a wrong sheet size; read until the last row actually present
+        worksheet.reset_dimensions()
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    positions = [i for i, name in enumerate(header) if name is not None]
+    columns = [header[i] for i in positions]
+
+    buffer = []
+    emitted = False
+    for row in rows:
+        values = [row[i] if i < len(row) else None for i in positions]
+        if all(value is None for value in values):
+            continue
+        buffer.append(values)
+        if len(buffer) >= chunksize:
+            yield pd.DataFrame(buffer, columns=columns)
+            emitted = True
+            buffer = []
+
+    if buffer or not emitted:
+        yield pd.DataFrame(buffer, columns=columns)
+
+def read_excel_in_chunks(filepath, sheet_name, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Streams a sheet of an Excel file in openpyxl read-only mode, so memory stays bounded by the chunk size.
+
+    Parameters:
+        filepath (str): The path to the Excel file.
+        sheet_name (str): The sheet name to read data from.
+        chunksize (int): The maximum number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows of the sheet.
+    """
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        yield from iter_sheet_chunks(workbook[sheet_name], chunksize)
+    finally:
+        workbook.close()
+
+def extract_sheets_to_files(filepath, targets, schemas=None, chunksize=DEFAULT_CHUNKSIZE, chunk_filters=None):
+    """
+    Reads several sheets of an Excel workbook in a single pass and writes each one to its staged file.
+    The workbook is opened only once in read-only mode and every sheet is streamed in chunks,
+    so memory stays flat no matter how many rows a sheet has. Sheets are staged as typed
+    Arrow IPC files that the transform stage reads back through a memory map.
+
+    Parameters:
+        filepath (str): The path to the Excel file.
+        targets (dict): Mapping of sheet name to the path of the staged file the sheet should be written to.
+        schemas (dict): Optional mapping of sheet name to its declared pyarrow schema.
+        chunksize (int): The maximum number of rows held in memory at once.
+        chunk_filters (dict): Optional mapping of sheet name to a function applied to every chunk
+            before it is staged, e.g. to keep only the rows past a watermark.
+
+    Returns:
+        dict: Mapping of sheet name to the number of rows staged.
+    """
+    schemas = schemas or {}
+    chunk_filters = chunk_filters or {}
+    row_counts = {}
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        for sheet_name, output_path in targets.items():
+            chunks = iter_sheet_chunks(workbook[sheet_name], chunksize)
+            if sheet_name in chunk_filters:
+                chunks = map(chunk_filters[sheet_name], chunks)
+            row_count = write_staged_chunks(chunks, output_path, schemas.get(sheet_name))
+            row_counts[sheet_name] = row_count
+            print(f"Extracted {row_count} rows from sheet '{sheet_name}' to {output_path}.")
+    finally:
+        workbook.close()
+    return row_counts
+    
 def fetch_data_from_db_for_models():
     engine = create_db_engine()
     connection = engine.connect()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """
+    Computes the SHA-256 content hash of a file, reading it in blocks.
+
+    Parameters:
+        path (str): The path of the file.
+        block_size (int): The number of bytes read at a time.
+
+    Returns:
+        str: The hexadecimal digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint_key(source_file, sheet_name):
+    """
+    Builds the key a sheet of a source file is stored under in the fingerprint store.
+    """
+    return f"{source_file}::{sheet_name}"
+
+def load_fingerprints(path):
+    """
+    Loads a fingerprint store from a JSON file. A missing store is treated as empty.
+
+    Parameters:
+        path (str): The path of the JSON file.
+
+    Returns:
+        dict: The content of the store.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def save_fingerprints(fingerprints, path):
+    """
+    Saves a fingerprint store to a JSON file. The file is replaced atomically so a failed write
+    never leaves a truncated store behind.
+
+    Parameters:
+        fingerprints (dict): The content of the store.
+        path (str): The path of the JSON file.
+
+    Returns:
+        None
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(fingerprints, file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def stage_fingerprints(current, store_path, pending_path):
+    """
+    Compares the fingerprints of the freshly extracted sheets with those of the last successful run
+    and records them, with the list of changed sheets, as pending for the current run.
+
+    Parameters:
+        current (dict): Mapping of fingerprint key to the fingerprint of the extracted sheet.
+        store_path (str): The store holding the fingerprints of the last successful run.
+        pending_path (str): The store holding the fingerprints of the current run.
+
+    Returns:
+        list: The keys of the sheets whose content changed since the last successful run.
+    """
+    committed = load_fingerprints(store_path)
+    pending = load_fingerprints(pending_path)
+    fingerprints = pending.get('fingerprints', {})
+    changed = set(pending.get('changed', []))
+
+    for key, fingerprint in current.items():
+        fingerprints[key] = fingerprint
+        if committed.get(key) == fingerprint:
+            changed.discard(key)
+        else:
+            changed.add(key)
+
+    save_fingerprints({'fingerprints': fingerprints, 'changed': sorted(changed)}, pending_path)
+    return [key for key in current if key in changed]
+
+def has_changed(keys, pending_path):
+    """
+    Tells whether any of the given sheets changed in the current run.
+    Sheets the current run knows nothing about are treated as changed.
+
+    Parameters:
+        keys (list): The fingerprint keys of the sheets to check.
+        pending_path (str): The store holding the fingerprints of the current run.
+
+    Returns:
+        bool: True if at least one of the sheets has to be processed.
+    """
+    pending = load_fingerprints(pending_path)
+    fingerprints = pending.get('fingerprints', {})
+    changed = set(pending.get('changed', []))
+    return any(key not in fingerprints or key in changed for key in keys)
+
+def commit_fingerprints(store_path, pending_path):
+    """
+    Marks the fingerprints of the current run as those of the last successful run.
+
+    Parameters:
+        store_path (str): The store holding the fingerprints of the last successful run.
+        pending_path (str): The store holding the fingerprints of the current run.
+
+    Returns:
+        None
+    """
+    committed = load_fingerprints(store_path)
+    pending = load_fingerprints(pending_path)
+    committed.update(pending.get('fingerprints', {}))
+    save_fingerprints(committed, store_path)
+    if os.path.exists(pending_path):
+        os.remove(pending_path)
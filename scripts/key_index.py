@@ -0,0 +1,80 @@
+import pandas as pd
+
+# Columns of the ECOM key index: the shipping sheets are matched to the ECOM orders on either of them
+KEY_COLUMNS = ['AWB', 'order_number']
+
+
+def build_key_index(df):
+    """
+    Builds the key index of the transformed ECOM data: one row per order with its AWB written as text,
+    so the shipping sheets can be matched on either key without the full ECOM data.
+
+    Parameters:
+        df (pd.DataFrame): The transformed ECOM data, or at least its AWB and order_number columns.
+
+    Returns:
+        pd.DataFrame: The AWB and order_number of every order.
+    """
+    index = df[KEY_COLUMNS].drop_duplicates().reset_index(drop=True)
+    index['AWB'] = index['AWB'].map(str, na_action='ignore')
+    return index
+
+def write_key_index(df, path):
+    """
+    Builds the key index of the transformed ECOM data and saves it as a Parquet file.
+
+    Parameters:
+        df (pd.DataFrame): The transformed ECOM data, or at least its AWB and order_number columns.
+        path (str): The path of the key index.
+
+    Returns:
+        int: The number of rows in the key index.
+    """
+    index = build_key_index(df)
+    index.to_parquet(path, index=False)
+    return len(index)
+
+def read_key_index(path):
+    """
+    Reads a key index saved by write_key_index.
+
+    Parameters:
+        path (str): The path of the key index.
+
+    Returns:
+        pd.DataFrame: The AWB and order_number of every order.
+    """
+    return pd.read_parquet(path, columns=KEY_COLUMNS)
+
+def key_lookup(index, key, value):
+    """
+    Turns two columns of a key index into a lookup from one to the other. Missing keys are left out,
+    and a key given more than once maps to the value of its first row.
+
+    Parameters:
+        index (pd.DataFrame): The key index, or any DataFrame holding both columns.
+        key (str): The column looked up.
+        value (str): The column returned.
+
+    Returns:
+        pd.Series: The values, indexed by their unique key.
+    """
+    pairs = index[[key, value]].dropna(subset=[key])
+    pairs = pairs[~pairs[key].duplicated()]
+    return pd.Series(pairs[value].to_numpy(), index=pd.Index(pairs[key]), name=value)
+
+def lookup_keys(values, index, key, value):
+    """
+    Probes a key index with the values of a column, the way a left merge on the key would,
+    without copying the rest of the index.
+
+    Parameters:
+        values (pd.Series): The keys to look up.
+        index (pd.DataFrame): The key index, or any DataFrame holding both columns.
+        key (str): The column looked up.
+        value (str): The column returned.
+
+    Returns:
+        pd.Series: The value matching every key, aligned with the input; missing where there is no match.
+    """
+    return values.map(key_lookup(index, key, value))
@@ -0,0 +1,84 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Partition column added to every row: the date of its business date column
+PARTITION_COLUMN = 'business_date'
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.date32())]), flavor='hive')
+
+# Rows per row group of the partition files. Every row group keeps min/max statistics of its columns,
+# which lets readers skip the row groups a filter rules out.
+ROWS_PER_GROUP = 65536
+
+
+def source_dir(lake_dir, source):
+    """
+    Gives the directory holding the partitions of a source in the lake.
+    """
+    return os.path.join(lake_dir, f"source={source}")
+
+def write_partitions(path, lake_dir, source, date_column):
+    """
+    Writes a transformed output into the lake, partitioned by the date of its business date column.
+    The partitions of the dates found in the output are replaced, every other partition is kept,
+    so the lake builds up the history of a source run after run. Rows without a date go to the
+    partition of missing dates. The output is streamed one record batch at a time.
+
+    Parameters:
+        path (str): The path of the transformed output, a Parquet file or directory of Parquet parts.
+        lake_dir (str): The root directory of the lake.
+        source (str): The name the source is stored under in the lake.
+        date_column (str): The timestamp column the rows are partitioned by.
+
+    Returns:
+        None
+    """
+    dataset = ds.dataset(path, format='parquet')
+    columns = {name: ds.field(name) for name in dataset.schema.names}
+    columns[PARTITION_COLUMN] = ds.field(date_column).cast(pa.date32(), safe=False)
+    scanner = ds.Scanner.from_dataset(dataset, columns=columns)
+
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        scanner,
+        source_dir(lake_dir, source),
+        format=file_format,
+        file_options=file_format.make_write_options(write_statistics=True),
+        partitioning=PARTITIONING,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+        min_rows_per_group=ROWS_PER_GROUP,
+        max_rows_per_group=ROWS_PER_GROUP,
+    )
+
+def read_partitions(lake_dir, source, start=None, end=None, columns=None, filter=None):
+    """
+    Reads the rows of a source from the lake. Only the partitions between the start and end dates are opened,
+    and any further filter is pushed down to the row group statistics of the files.
+
+    Parameters:
+        lake_dir (str): The root directory of the lake.
+        source (str): The name the source is stored under in the lake.
+        start (date-like): The first business date to read. Defaults to the oldest one.
+        end (date-like): The last business date to read. Defaults to the most recent one.
+        columns (list): Optional subset of columns to read.
+        filter (pyarrow.dataset.Expression): Optional filter on the rows, e.g. ds.field('currency') == 'USD'.
+
+    Returns:
+        pd.DataFrame: The matching rows, with their business_date.
+    """
+    path = source_dir(lake_dir, source)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No partitions of {source} in {lake_dir}")
+    dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING)
+
+    conditions = [] if filter is None else [filter]
+    if start is not None:
+        conditions.append(ds.field(PARTITION_COLUMN) >= pa.scalar(pd.Timestamp(start).date(), pa.date32()))
+    if end is not None:
+        conditions.append(ds.field(PARTITION_COLUMN) <= pa.scalar(pd.Timestamp(end).date(), pa.date32()))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -1,26 +1,117 @@
+import os
+import tempfile
 import pandas as pd
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
 import numpy as np
 from sqlalchemy import inspect
+from sqlalchemy import table, column, MetaData, Table, Column, Index
+from schemas import STAGING_TABLE_SCHEMAS
+from transform import add_row_hash, ROW_HASH_VERSION
+
+# Engines are shared by every task running in the same worker process, keyed by their settings,
+# so tasks reuse pooled connections instead of opening a new one each time
+_ENGINES = {}
+
+DB_CONN_ID = os.environ.get('ETL_DB_CONN_ID', 'capstone_db')
+
+# Table recording the version of the row hash normalization of every main table
+ROW_HASH_VERSIONS_TABLE = 'row_hash_versions'
+
+def get_db_settings(conn_id=DB_CONN_ID):
+    """
+    Reads the database connection settings. An Airflow connection with the given id is used when it exists,
+    otherwise the ETL_DB_USER, ETL_DB_PASSWORD, ETL_DB_HOST, ETL_DB_PORT and ETL_DB_NAME environment variables,
+    falling back to the defaults of the docker-compose setup.
+
+    Parameters:
+        conn_id (str): The id of the Airflow connection.
+
+    Returns:
+        dict: The user, password, host, port and database to connect to.
+    """
+    try:
+        from airflow.hooks.base import BaseHook
+        connection = BaseHook.get_connection(conn_id)
+        return {
+            'user': connection.login,
+            'password': connection.password,
+            'host': connection.host,
+            'port': connection.port or 3306,
+            'database': connection.schema,
+        }
+    except Exception:
+        # Airflow is not installed or the connection is not defined
+        pass
+
+    return {
+        'user': os.environ.get('ETL_DB_USER', 'root'),
+        'password': os.environ.get('ETL_DB_PASSWORD', 'password'),
+        'host': os.environ.get('ETL_DB_HOST', 'host.docker.internal'),
+        'port': int(os.environ.get('ETL_DB_PORT', '3306')),
+        'database': os.environ.get('ETL_DB_NAME', 'CapstoneTest'),
+    }
+
+def get_pool_settings():
+    """
+    Reads the connection pool settings from the ETL_DB_POOL_SIZE, ETL_DB_MAX_OVERFLOW, ETL_DB_POOL_RECYCLE
+    and ETL_DB_ECHO environment variables.
+
+    Returns:
+        dict: The keyword arguments of create_engine for the pool.
+    """
+    return {
+        'pool_size': int(os.environ.get('ETL_DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('ETL_DB_MAX_OVERFLOW', '10')),
+        'pool_recycle': int(os.environ.get('ETL_DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': True,
+        'echo': os.environ.get('ETL_DB_ECHO', 'false').lower() == 'true',
+    }
 
 def create_db_engine():
     """
-    Creates a SQLAlchemy engine with hardcoded credentials.
-    
+    Returns the SQLAlchemy engine of the current process, creating it on the first call.
+    Later calls with the same settings reuse the engine and its connection pool.
+
     Returns:
         engine: An SQLAlchemy Engine instance.
     """
-    user = 'root'
-    password = 'password'  
-    host = 'host.docker.internal'
-    database = 'CapstoneTest'
-    url = f'mysql+pymysql://{user}:{password}@{host}/{database}'
-    engine = create_engine(url, echo=True)  # Set echo=False in production for less verbosity
-    return engine
+    settings = get_db_settings()
+    pool_settings = get_pool_settings()
+    key = (tuple(sorted(settings.items())), tuple(sorted(pool_settings.items())))
+    if key not in _ENGINES:
+        url = URL.create(
+            'mysql+pymysql',
+            username=settings['user'],
+            password=settings['password'],
+            host=settings['host'],
+            port=settings['port'],
+            database=settings['database'],
+        )
+        # local_infile lets the bulk loader use LOAD DATA LOCAL INFILE
+        _ENGINES[key] = create_engine(url, connect_args={'local_infile': True}, **pool_settings)
+    return _ENGINES[key]
+
+def dispose_db_engines():
+    """
+    Closes the pooled connections of every engine of the current process and forgets the engines.
+    """
+    for engine in _ENGINES.values():
+        engine.dispose()
+    _ENGINES.clear()
+
+def _reset_engines_after_fork():
+    # A forked process must not use the connections of its parent, so it starts new pools
+    for engine in _ENGINES.values():
+        engine.dispose(close=False)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_engines_after_fork)
 
 def upload_dataframe_to_temp_sql(df, temp_table_name, engine, index=False):
     """
     Uploads a DataFrame to a specified temporary SQL table using SQLAlchemy engine.
+    Errors are printed and raised again, so the tasks merging from the table fail on the upload.
 
     Parameters:
         df (pd.DataFrame): The DataFrame to upload.
@@ -36,7 +127,208 @@ def upload_dataframe_to_temp_sql(df, temp_table_name, engine, index=False):
         print("Data uploaded successfully to the temporary table.")
     except Exception as e:
         print(f"An error occurred while uploading data: {e}")
-        
+        raise
+
+def write_load_data_file(df, path):
+    """
+    Writes a DataFrame to a file in the default text format of MySQL's LOAD DATA:
+    tab-separated fields, one row per line, NULL written as \\N and special characters escaped with a backslash.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The path of the file.
+
+    Returns:
+        None
+    """
+    fields = []
+    for name in df.columns:
+        values = df[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+        elif pd.api.types.is_bool_dtype(values):
+            text = values.astype(int).astype(str)
+        else:
+            text = values.astype(str)
+            if not pd.api.types.is_numeric_dtype(values):
+                text = (text.str.replace('\\', '\\\\', regex=False)
+                            .str.replace('\t', '\\t', regex=False)
+                            .str.replace('\n', '\\n', regex=False)
+                            .str.replace('\r', '\\r', regex=False))
+        fields.append(text.mask(values.isna(), '\\N'))
+
+    lines = fields[0].str.cat(fields[1:], sep='\t') if len(fields) > 1 else fields[0]
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.writelines(line + '\n' for line in lines)
+
+def load_data_infile(df, temp_table_name, engine):
+    """
+    Bulk loads a DataFrame into an existing table with MySQL's LOAD DATA LOCAL INFILE.
+    The connection has to allow local_infile.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to load.
+        temp_table_name (str): The name of the table to load into.
+        engine: The SQLAlchemy engine object connected to the database.
+
+    Returns:
+        None
+    """
+    fd, path = tempfile.mkstemp(suffix='.tsv')
+    os.close(fd)
+    try:
+        write_load_data_file(df, path)
+        columns = ', '.join(f"`{name}`" for name in df.columns)
+        load_sql = f"""
+        LOAD DATA LOCAL INFILE '{path}'
+        INTO TABLE {temp_table_name}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+        LINES TERMINATED BY '\\n'
+        ({columns})
+        """
+        with engine.begin() as connection:
+            connection.execute(load_sql)
+    finally:
+        os.remove(path)
+
+def insert_in_chunks(df, temp_table_name, engine, chunksize=10000):
+    """
+    Inserts a DataFrame into an existing table with one executemany call per chunk,
+    which the MySQL driver sends as multi-row INSERT statements.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to insert.
+        temp_table_name (str): The name of the table to insert into.
+        engine: The SQLAlchemy engine object connected to the database.
+        chunksize (int): The number of rows sent per executemany call.
+
+    Returns:
+        None
+    """
+    target = table(temp_table_name, *[column(name) for name in df.columns])
+    with engine.begin() as connection:
+        for start in range(0, len(df), chunksize):
+            chunk = df.iloc[start:start + chunksize]
+            values = chunk.astype(object).to_numpy()
+            for position, name in enumerate(chunk.columns):
+                # Drivers expect plain datetime objects rather than pandas Timestamps
+                if pd.api.types.is_datetime64_any_dtype(chunk[name]):
+                    values[:, position] = chunk[name].array.to_pydatetime()
+            values[chunk.isna().to_numpy()] = None
+            records = [dict(zip(chunk.columns, row)) for row in values]
+            connection.execute(target.insert(), records)
+
+def staging_table(temp_table_name, metadata=None):
+    """
+    Builds the SQLAlchemy table of a temporary table from its declared schema, with an index on each merge key.
+
+    Parameters:
+        temp_table_name (str): The name of the temporary SQL table, as declared in STAGING_TABLE_SCHEMAS.
+        metadata (MetaData): The metadata the table is attached to. A new one is used if None.
+
+    Returns:
+        Table: The declared table.
+    """
+    schema = STAGING_TABLE_SCHEMAS[temp_table_name]
+    columns = [Column(name, column_type) for name, column_type in schema['columns']]
+    declared = Table(temp_table_name, metadata or MetaData(), *columns)
+    for position, key in enumerate(schema['indexes']):
+        Index(f"ix_{temp_table_name}_{position}", *[declared.c[name] for name in key])
+    return declared
+
+def prepare_staging_table(temp_table_name, engine):
+    """
+    Makes a temporary table ready to receive a new upload. The table is created from its declared schema
+    the first time, then emptied and reused on the following runs. A table whose columns no longer match
+    the declared schema is recreated.
+
+    Parameters:
+        temp_table_name (str): The name of the temporary SQL table, as declared in STAGING_TABLE_SCHEMAS.
+        engine: The SQLAlchemy engine object connected to the database.
+
+    Returns:
+        None
+    """
+    declared = staging_table(temp_table_name)
+    inspector = inspect(engine)
+    if inspector.has_table(temp_table_name):
+        existing_columns = [existing['name'] for existing in inspector.get_columns(temp_table_name)]
+        if existing_columns == [declared_column.name for declared_column in declared.columns]:
+            truncate_staging_table(temp_table_name, engine)
+            return
+        print(f"The columns of {temp_table_name} changed, recreating it.")
+        declared.drop(engine)
+    declared.create(engine)
+
+def truncate_staging_table(temp_table_name, engine):
+    """
+    Empties a temporary table while keeping its definition and indexes.
+    """
+    with engine.begin() as connection:
+        if engine.dialect.name == 'mysql':
+            connection.execute(f"TRUNCATE TABLE {temp_table_name}")
+        else:
+            connection.execute(f"DELETE FROM {temp_table_name}")
+
+def release_staging_table(temp_table_name, engine):
+    """
+    Frees a temporary table once it has been merged from: a table with a declared schema is emptied
+    and kept for the next run, any other table is dropped.
+    """
+    if temp_table_name in STAGING_TABLE_SCHEMAS:
+        truncate_staging_table(temp_table_name, engine)
+    else:
+        with engine.begin() as connection:
+            connection.execute(f"DROP TABLE IF EXISTS {temp_table_name}")
+
+def bulk_upload_dataframe_to_temp_sql(df, temp_table_name, engine, index=False, chunksize=10000):
+    """
+    Uploads a DataFrame to a specified temporary SQL table in bulk.
+    Tables with a declared schema are emptied and reused, other tables are recreated with the column types
+    to_sql would give them. The table is then filled with LOAD DATA LOCAL INFILE
+    on MySQL. If the server or the connection does not allow it, or on other databases, the rows are
+    inserted with chunked executemany calls instead.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to upload.
+        temp_table_name (str): The name of the temporary SQL table to which the data should be uploaded.
+        engine: The SQLAlchemy engine object connected to the database.
+        index (bool): Whether to write the DataFrame's index as a column in the table.
+        chunksize (int): The number of rows per executemany call of the fallback path.
+
+    Returns:
+        None
+    """
+    if index:
+        df = df.reset_index()
+    try:
+        if temp_table_name in STAGING_TABLE_SCHEMAS:
+            declared_columns = [name for name, _ in STAGING_TABLE_SCHEMAS[temp_table_name]['columns']]
+            extra_columns = [name for name in df.columns if name not in declared_columns]
+            if extra_columns:
+                print(f"Warning: {extra_columns} not in the declared schema of {temp_table_name} and were not uploaded")
+                df = df[[name for name in df.columns if name in declared_columns]]
+            prepare_staging_table(temp_table_name, engine)
+        else:
+            with engine.begin() as connection:
+                connection.execute(f"DROP TABLE IF EXISTS {temp_table_name}")
+                connection.execute(pd.io.sql.get_schema(df, temp_table_name, con=engine))
+
+        if engine.dialect.name == 'mysql':
+            try:
+                load_data_infile(df, temp_table_name, engine)
+                print(f"Loaded {len(df)} rows into {temp_table_name} with LOAD DATA LOCAL INFILE.")
+                return
+            except Exception as e:
+                print(f"LOAD DATA LOCAL INFILE failed, falling back to chunked inserts: {e}")
+
+        insert_in_chunks(df, temp_table_name, engine, chunksize)
+        print(f"Inserted {len(df)} rows into {temp_table_name} in chunks of {chunksize}.")
+    except Exception as e:
+        print(f"An error occurred while uploading data: {e}")
+        raise
+
 from sqlalchemy import inspect
 
 def merge_data_from_temp_to_main_with_pk(temp_table_name, main_table_name, engine):
@@ -106,10 +398,171 @@ def merge_data_from_temp_to_main_without_pk(temp_table_name, main_table_name, en
         print(f"Rows affected: {result.rowcount}")
     print(f"Data from {temp_table_name} merged into {main_table_name} successfully.")
 
-    
+
+def merge_data_from_temp_to_main_by_hash(temp_table_name, main_table_name, engine, columns, hash_column='row_hash'):
+    """
+    Merges data from a temporary table to the main table for tables without a primary key, comparing rows
+    on the indexed hash of their columns instead of on every column.
+
+    Parameters:
+        temp_table_name (str): The name of the temporary SQL table.
+        main_table_name (str): The name of the main SQL table.
+        engine: The SQLAlchemy engine object connected to the database.
+        columns (list): List of columns to insert, the same ones the hash was computed from.
+        hash_column (str): The name of the hash column on both tables.
+
+    Returns:
+        None
+    """
+    # Exclude 'db_entry_time' and 'db_update_time' from the columns list
+    columns = [col for col in columns if col not in ['db_entry_time', 'db_update_time']] + [hash_column]
+
+    merge_sql = f"""
+    INSERT INTO {main_table_name} ({', '.join(columns)})
+    SELECT {', '.join([f'{temp_table_name}.{col}' for col in columns])}
+    FROM {temp_table_name}
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM {main_table_name}
+        WHERE {main_table_name}.{hash_column} = {temp_table_name}.{hash_column}
+    )
+    """
+
+    with engine.connect() as connection:
+        result = connection.execute(merge_sql)
+        print(f"Rows affected: {result.rowcount}")
+    print(f"Data from {temp_table_name} merged into {main_table_name} successfully.")
+
+def row_hash_version(main_table_name, engine):
+    """
+    Gives the version of the row hash normalization the hashes of a main table were computed with.
+    Tables hashed before versions were recorded are at version 1.
+    """
+    if not inspect(engine).has_table(ROW_HASH_VERSIONS_TABLE):
+        return 1
+    with engine.connect() as connection:
+        version = connection.execute(f"SELECT version FROM {ROW_HASH_VERSIONS_TABLE} WHERE table_name = '{main_table_name}'").scalar()
+    return 1 if version is None else version
+
+def record_row_hash_version(main_table_name, engine, version):
+    """
+    Records the version of the row hash normalization the hashes of a main table were computed with.
+    """
+    with engine.begin() as connection:
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {ROW_HASH_VERSIONS_TABLE} (table_name VARCHAR(64) PRIMARY KEY, version INT NOT NULL)")
+        connection.execute(f"DELETE FROM {ROW_HASH_VERSIONS_TABLE} WHERE table_name = '{main_table_name}'")
+        connection.execute(f"INSERT INTO {ROW_HASH_VERSIONS_TABLE} (table_name, version) VALUES ('{main_table_name}', {int(version)})")
+
+def ensure_row_hash_column(main_table_name, engine, columns, hash_column='row_hash', primary_key='id', version=ROW_HASH_VERSION, migrate=None):
+    """
+    Adds the indexed hash column to a main table that does not have it yet, and computes it for the rows already stored.
+    When the stored hashes were computed with an older version of the normalization, they are all computed again,
+    so the rows already stored keep matching the same rows in later loads.
+
+    Parameters:
+        main_table_name (str): The name of the main SQL table.
+        engine: The SQLAlchemy engine object connected to the database.
+        columns (list): List of columns the hash is computed from.
+        hash_column (str): The name of the hash column.
+        primary_key (str): The primary key of the main table.
+        version (int): The version the hashes have to be at.
+        migrate (function): Optional function rewriting the stored rows of an older version before they are
+                            hashed again, called with the table name and the engine.
+
+    Returns:
+        None
+    """
+    inspector = inspect(engine)
+    if hash_column in [column['name'] for column in inspector.get_columns(main_table_name)]:
+        stored_version = row_hash_version(main_table_name, engine)
+        if stored_version >= version:
+            return
+        with engine.connect() as connection:
+            connection.execute(f"UPDATE {main_table_name} SET {hash_column} = NULL")
+        print(f"The hashes of {main_table_name} are at version {stored_version}, computing them again at version {version}.")
+    else:
+        with engine.connect() as connection:
+            connection.execute(f"ALTER TABLE {main_table_name} ADD COLUMN {hash_column} CHAR(32) NULL")
+            connection.execute(f"CREATE INDEX ix_{main_table_name}_{hash_column} ON {main_table_name} ({hash_column})")
+        print(f"Added {hash_column} to {main_table_name}.")
+
+    if migrate is not None:
+        migrate(main_table_name, engine)
+    backfill_row_hashes(main_table_name, engine, columns, hash_column, primary_key)
+    record_row_hash_version(main_table_name, engine, version)
+
+def backfill_row_hashes(main_table_name, engine, columns, hash_column='row_hash', primary_key='id'):
+    """
+    Computes the hash column of the rows of a main table that do not have one yet.
+    The hashes are computed from the stored values, so they match those of the same rows in later loads.
+
+    Parameters:
+        main_table_name (str): The name of the main SQL table.
+        engine: The SQLAlchemy engine object connected to the database.
+        columns (list): List of columns the hash is computed from.
+        hash_column (str): The name of the hash column.
+        primary_key (str): The primary key of the main table.
+
+    Returns:
+        None
+    """
+    stored = pd.read_sql(f"SELECT {primary_key}, {', '.join(columns)} FROM {main_table_name} WHERE {hash_column} IS NULL", engine)
+    if stored.empty:
+        return
+
+    hashes = add_row_hash(stored, columns, hash_column)[[primary_key, hash_column]]
+    hashes_table_name = f"temp_{main_table_name}_{hash_column}"
+    bulk_upload_dataframe_to_temp_sql(hashes, hashes_table_name, engine)
+    with engine.connect() as connection:
+        connection.execute(f"""
+        UPDATE {main_table_name}
+        INNER JOIN {hashes_table_name} ON {main_table_name}.{primary_key} = {hashes_table_name}.{primary_key}
+        SET {main_table_name}.{hash_column} = {hashes_table_name}.{hash_column}
+        """)
+    release_staging_table(hashes_table_name, engine)
+    print(f"Computed {hash_column} for {len(hashes)} rows of {main_table_name}.")
+
+def sort_stored_itemsets(main_table_name, engine, columns=('antecedents', 'consequents'), separator=', ', primary_key='id'):
+    """
+    Rewrites the itemsets of a stored rule table with their products in name order, the order rules are written in.
+    Rules written with their products in another order then get the same row hash as the same rules in later loads,
+    and those stored twice become duplicates that remove_duplicates deletes.
+
+    Parameters:
+        main_table_name (str): The name of the rule table.
+        engine: The SQLAlchemy engine object connected to the database.
+        columns (tuple): The columns holding itemsets.
+        separator (str): The string the products of an itemset are joined with.
+        primary_key (str): The primary key of the table.
+
+    Returns:
+        int: The number of rows rewritten.
+    """
+    stored = pd.read_sql(f"SELECT {primary_key}, {', '.join(columns)} FROM {main_table_name}", engine)
+    sorted_itemsets = stored.copy()
+    for name in columns:
+        sorted_itemsets[name] = stored[name].map(lambda itemset: separator.join(sorted(itemset.split(separator))), na_action='ignore')
+    changed = sorted_itemsets[(sorted_itemsets[list(columns)] != stored[list(columns)]).any(axis=1) & stored[list(columns)].notna().all(axis=1)]
+    if changed.empty:
+        return 0
+
+    sorted_table_name = f"temp_{main_table_name}_sorted"
+    bulk_upload_dataframe_to_temp_sql(changed, sorted_table_name, engine)
+    assignments = ', '.join(f"{main_table_name}.{name} = {sorted_table_name}.{name}" for name in columns)
+    with engine.connect() as connection:
+        connection.execute(f"""
+        UPDATE {main_table_name}
+        INNER JOIN {sorted_table_name} ON {main_table_name}.{primary_key} = {sorted_table_name}.{primary_key}
+        SET {assignments}
+        """)
+    release_staging_table(sorted_table_name, engine)
+    print(f"Sorted the itemsets of {len(changed)} rows of {main_table_name}.")
+    return len(changed)
+
 def cleanup_temp_tables(engine):
     """
     Drops the temporary tables used during the ETL process.
+    Temporary tables with a declared schema are only emptied, so the next run can reuse them.
 
     Parameters:
         engine: The SQLAlchemy engine object connected to the database.
@@ -140,9 +593,14 @@ def cleanup_temp_tables(engine):
         'fpgrowth_temp_results' 
     ]
     
+    inspector = inspect(engine)
     with engine.connect() as connection:
         for table in temp_tables:
-            connection.execute(f"DROP TABLE IF EXISTS {table}")
+            if table in STAGING_TABLE_SCHEMAS:
+                if inspector.has_table(table):
+                    connection.execute(f"TRUNCATE TABLE {table}")
+            else:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
     print("Temporary tables dropped successfully.")
 
 
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def basket_matrix(df, order_column='ecom_reference_order_number', item_column='product_name'):
+    """
+    Builds the orders x products basket matrix as a sparse boolean CSR matrix. Orders and products are
+    turned into integer codes and every (order, product) pair is set once, so the matrix never goes
+    through a dense table of counts. Rows with a missing order or product are left out.
+
+    Parameters:
+        df (pd.DataFrame): The order lines.
+        order_column (str): The column identifying the order of a line.
+        item_column (str): The column identifying the product of a line.
+
+    Returns:
+        tuple: The CSR matrix, and the sorted orders and products its rows and columns stand for.
+    """
+    lines = df[[order_column, item_column]].dropna()
+    order_codes, orders = pd.factorize(lines[order_column], sort=True)
+    item_codes, items = pd.factorize(lines[item_column], sort=True)
+
+    pairs = np.unique(order_codes.astype(np.int64) * len(items) + item_codes)
+    rows, columns = np.divmod(pairs, len(items)) if len(items) else (pairs, pairs)
+    matrix = sparse.csr_matrix((np.ones(len(pairs), dtype=bool), (rows, columns)), shape=(len(orders), len(items)))
+    return matrix, pd.Index(orders, name=order_column), pd.Index(items, name=item_column)
+
+def build_basket(df, order_column='ecom_reference_order_number', item_column='product_name', sparse_columns=True):
+    """
+    Builds the basket of every order as a boolean DataFrame, one row per order and one column per product,
+    True when the product is in the order. Both layouts are built from the sparse basket matrix.
+
+    Parameters:
+        df (pd.DataFrame): The order lines.
+        order_column (str): The column identifying the order of a line.
+        item_column (str): The column identifying the product of a line.
+        sparse_columns (bool): Whether the columns are kept sparse. A dense bool frame takes one byte per
+                               order and product, and is the faster input for the mlxtend miners.
+
+    Returns:
+        pd.DataFrame: The basket matrix, with a Sparse[bool] or bool column per product.
+    """
+    matrix, orders, items = basket_matrix(df, order_column, item_column)
+    if sparse_columns:
+        # from_spmatrix would give bool columns a fill value of 0, so the columns are cast to False-filled bools
+        basket = pd.DataFrame.sparse.from_spmatrix(matrix.astype(np.uint8), index=orders, columns=items)
+        return basket.astype(pd.SparseDtype(bool, False))
+    return pd.DataFrame(matrix.toarray(), index=orders, columns=items)
+
+def count_items_per_order(df, order_column='ecom_reference_order_number', item_column='product_name'):
+    """
+    Counts the distinct products of every order.
+    """
+    matrix, orders, _ = basket_matrix(df, order_column, item_column)
+    return pd.Series(np.asarray(matrix.sum(axis=1)).ravel(), index=orders)
+
+def count_item_frequencies(df, order_column='ecom_reference_order_number', item_column='product_name'):
+    """
+    Counts the orders every product appears in.
+    """
+    matrix, _, items = basket_matrix(df, order_column, item_column)
+    return pd.Series(np.asarray(matrix.sum(axis=0)).ravel(), index=items)
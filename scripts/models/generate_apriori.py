@@ -1,34 +1,26 @@
-from mlxtend.frequent_patterns import apriori, association_rules
 import pandas as pd
 
-def generate_apriori_results(df):
-    # Create a basket matrix (binary matrix)
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
+from models.itemsets import mine_frequent_itemsets, itemsets_above, association_rules
+from models.rule_table import encode_rules
 
-    # Convert quantities to a binary format (purchased or not purchased)
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
+APRIORI_MIN_SUPPORT = 0.01
 
-    # Apply the Apriori algorithm
-    frequent_itemsets = apriori(basket_sets, min_support=0.01, use_colnames=True)
+def generate_apriori_results(df, frequent_itemsets=None):
+    # Find the frequent itemsets (the same ones the Apriori algorithm finds),
+    # or keep those of itemsets already mined at a lower support
+    if frequent_itemsets is None:
+        frequent_itemsets = mine_frequent_itemsets(df, min_support=APRIORI_MIN_SUPPORT)
+    else:
+        frequent_itemsets = itemsets_above(frequent_itemsets, APRIORI_MIN_SUPPORT)
 
     # Generate association rules
     rules = association_rules(frequent_itemsets, metric="lift", min_threshold=1)
 
     # Filter rules based on support, confidence, and lift
-    filtered_rules = rules[(rules['support'] >= 0.01) & 
+    filtered_rules = rules[(rules['support'] >= APRIORI_MIN_SUPPORT) & 
                            (rules['confidence'] >= 0.5) & 
                            (rules['lift'] > 1)]
     
-    # Convert frozenset to string
-    filtered_rules['antecedents'] = filtered_rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-    filtered_rules['consequents'] = filtered_rules['consequents'].apply(lambda x: ', '.join(list(x)))
+    # Store the itemsets as sorted product ID arrays, the names are only joined when the rules are inserted
+    return encode_rules(filtered_rules)
 
-    # Ensure data types match the MySQL table schema
-    filtered_rules['support'] = filtered_rules['support'].astype(float)
-    filtered_rules['confidence'] = filtered_rules['confidence'].astype(float)
-    filtered_rules['lift'] = filtered_rules['lift'].astype(float)
-
-    return filtered_rules
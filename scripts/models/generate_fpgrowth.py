@@ -1,17 +1,17 @@
-from mlxtend.frequent_patterns import fpgrowth, association_rules
 import pandas as pd
 
-def generate_fpgrowth_results(df):
-    # Prepare the data
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
+from models.itemsets import mine_frequent_itemsets, itemsets_above, association_rules
+from models.rule_table import encode_rules
 
-    # Apply the FP-Growth algorithm
-    min_support_threshold = 0.005
-    frequent_itemsets = fpgrowth(basket_sets, min_support=min_support_threshold, use_colnames=True)
+FPGROWTH_MIN_SUPPORT = 0.005
+
+def generate_fpgrowth_results(df, frequent_itemsets=None):
+    # Find the frequent itemsets (the same ones the FP-Growth algorithm finds),
+    # or keep those of itemsets already mined at a lower support
+    if frequent_itemsets is None:
+        frequent_itemsets = mine_frequent_itemsets(df, min_support=FPGROWTH_MIN_SUPPORT)
+    else:
+        frequent_itemsets = itemsets_above(frequent_itemsets, FPGROWTH_MIN_SUPPORT)
 
     # Generate association rules
     min_confidence_threshold = 0.5
@@ -20,13 +20,6 @@ def generate_fpgrowth_results(df):
     # Filter rules based on lift
     filtered_rules = rules[rules['lift'] > 1]
     
-    # Convert frozenset to string
-    filtered_rules['antecedents'] = filtered_rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-    filtered_rules['consequents'] = filtered_rules['consequents'].apply(lambda x: ', '.join(list(x)))
-
-    # Ensure data types match the MySQL table schema
-    filtered_rules['support'] = filtered_rules['support'].astype(float)
-    filtered_rules['confidence'] = filtered_rules['confidence'].astype(float)
-    filtered_rules['lift'] = filtered_rules['lift'].astype(float)
+    # Store the itemsets as sorted product ID arrays, the names are only joined when the rules are inserted
+    return encode_rules(filtered_rules)
 
-    return filtered_rules
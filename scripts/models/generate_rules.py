@@ -0,0 +1,36 @@
+import numpy as np
+
+from models.basket import basket_matrix
+from models.itemsets import eclat
+from models.incremental_itemsets import mine_itemsets_incrementally
+from models.generate_apriori import generate_apriori_results, APRIORI_MIN_SUPPORT
+from models.generate_fpgrowth import generate_fpgrowth_results, FPGROWTH_MIN_SUPPORT
+from models.rule_table import product_dictionary
+
+# Support the shared itemsets are mined at: the lowest one of the two rule sets
+MIN_SUPPORT = min(APRIORI_MIN_SUPPORT, FPGROWTH_MIN_SUPPORT)
+
+def generate_rule_sets(df, store_dir=None):
+    """
+    Mines the frequent itemsets of the order lines once, at the lowest support of the two rule sets,
+    and derives both the Apriori and the FP-Growth rules from them. Itemsets and rules hold product IDs,
+    named by the product dictionary.
+
+    Parameters:
+        df (pd.DataFrame): The order lines, with ecom_reference_order_number and product_name columns.
+        store_dir (str): Optional directory of an itemset store, to update the itemsets of the last run
+                         with the orders added since instead of mining them in full.
+
+    Returns:
+        tuple: The frequent itemsets, the product dictionary, the Apriori rules and the FP-Growth rules.
+    """
+    # The basket matrix is built once, for the mining and the product dictionary
+    basket = basket_matrix(df)
+    matrix, _, products = basket
+    if store_dir is None:
+        frequent_itemsets = eclat(matrix, np.arange(len(products)), MIN_SUPPORT)
+    else:
+        frequent_itemsets = mine_itemsets_incrementally(basket, MIN_SUPPORT, store_dir)
+    apriori_results = generate_apriori_results(df, frequent_itemsets)
+    fpgrowth_results = generate_fpgrowth_results(df, frequent_itemsets)
+    return frequent_itemsets, product_dictionary(products), apriori_results, fpgrowth_results
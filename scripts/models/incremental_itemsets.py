@@ -0,0 +1,288 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from pandas.util import hash_pandas_object
+from scipy import sparse
+
+from models.itemsets import item_bitsets, count_bits, eclat
+
+# Number of itemsets whose order bitsets are intersected at once when counting
+COUNT_BATCH_SIZE = 4096
+
+# Files of an itemset store
+STORE_FILES = {'itemsets': 'itemsets.parquet', 'orders': 'orders.parquet', 'meta': 'store.json'}
+
+
+def order_fingerprints(basket):
+    """
+    Fingerprints the distinct products of every order, so an order counted by an earlier run can be told apart
+    from one whose lines have changed since. The fingerprint of an order is the sum of the hashes of its products,
+    which does not depend on the order of its lines.
+
+    Parameters:
+        basket (tuple): The basket matrix with its orders and products, as returned by basket_matrix.
+
+    Returns:
+        pd.Series: The uint64 fingerprint of every order, indexed by order.
+    """
+    matrix, orders, products = basket
+    matrix = sparse.csr_matrix(matrix)
+    product_hashes = hash_pandas_object(pd.Series(products, dtype=object), index=False).to_numpy()
+    fingerprints = np.zeros(len(orders), dtype=np.uint64)
+    # uint64 sums wrap around, so every fingerprint stays a 64-bit hash
+    np.add.at(fingerprints, np.repeat(np.arange(len(orders)), np.diff(matrix.indptr)), product_hashes[matrix.indices])
+    return pd.Series(fingerprints, index=pd.Index(orders).astype(str), name='fingerprint')
+
+def count_itemsets(bitsets, itemsets):
+    """
+    Counts the orders holding every itemset, by intersecting the bitsets of its products.
+
+    Parameters:
+        bitsets (np.ndarray): The order bitsets of every product, as built by itemsets.item_bitsets.
+        itemsets (list): The itemsets, as tuples of product IDs.
+
+    Returns:
+        np.ndarray: The number of orders holding every itemset.
+    """
+    counts = np.zeros(len(itemsets), dtype=np.int64)
+    sizes = np.array([len(itemset) for itemset in itemsets], dtype=np.int64)
+    for size in np.unique(sizes):
+        positions = np.flatnonzero(sizes == size)
+        ids = np.array([itemsets[position] for position in positions], dtype=np.int64).reshape(len(positions), size)
+        for start in range(0, len(positions), COUNT_BATCH_SIZE):
+            batch = ids[start:start + COUNT_BATCH_SIZE]
+            intersection = bitsets[batch[:, 0]]
+            for column in range(1, size):
+                intersection = intersection & bitsets[batch[:, column]]
+            counts[positions[start:start + COUNT_BATCH_SIZE]] = count_bits(intersection)
+    return counts
+
+def itemset_ids(itemsets, products):
+    """
+    Looks up the product IDs of itemsets of product names.
+
+    Parameters:
+        itemsets (pd.Series): The itemsets, as tuples of product names.
+        products (pd.Index): The sorted products of the basket matrix.
+
+    Returns:
+        list: The itemsets as tuples of product IDs.
+
+    Raises:
+        KeyError: If a product of an itemset is not in the basket matrix.
+    """
+    positions = {product: position for position, product in enumerate(products)}
+    try:
+        return [tuple(positions[product] for product in itemset) for itemset in itemsets]
+    except KeyError as error:
+        raise KeyError(f"Product {error.args[0]!r} of the itemset store is not in the basket matrix") from None
+
+def subsets_frequent(itemset, frequent):
+    """
+    Tells whether every subset of an itemset with one product less is frequent.
+    """
+    return all(itemset[:index] + itemset[index + 1:] in frequent for index in range(len(itemset))) if len(itemset) > 1 else True
+
+def negative_border(frequent, n_items):
+    """
+    Finds the negative border of a set of frequent itemsets: the itemsets that are not frequent but all of
+    whose subsets are. They are the candidates Apriori counts and rejects, and any itemset becoming frequent
+    as orders are added has one of them as a subset.
+
+    Parameters:
+        frequent (iterable): The frequent itemsets, as sorted tuples of product IDs.
+        n_items (int): The number of products.
+
+    Returns:
+        list: The itemsets of the negative border, as sorted tuples of product IDs.
+    """
+    frequent = set(frequent)
+    border = [(item,) for item in range(n_items) if (item,) not in frequent]
+    level = sorted(itemset for itemset in frequent if len(itemset) == 1)
+    while level:
+        # Join the itemsets of the level sharing all but their last product, as apriori-gen does
+        prefixes = {}
+        for itemset in level:
+            prefixes.setdefault(itemset[:-1], []).append(itemset[-1])
+        next_level = []
+        for prefix, last_items in prefixes.items():
+            for position, first in enumerate(last_items):
+                for second in last_items[position + 1:]:
+                    candidate = prefix + (first, second)
+                    if subsets_frequent(candidate, frequent):
+                        (next_level if candidate in frequent else border).append(candidate)
+        level = sorted(next_level)
+    return border
+
+def build_itemset_store(basket, min_support):
+    """
+    Mines the frequent itemsets of the order lines in full and keeps the order counts of both them and
+    their negative border, along with the fingerprint of every order counted. The border products that are
+    not frequent are counted from the columns of the matrix, and only the frequent products get a bitset.
+
+    Parameters:
+        basket (tuple): The basket matrix with its orders and products, as returned by basket_matrix.
+        min_support (float): The minimum share of orders an itemset must appear in.
+
+    Returns:
+        dict: The store, holding its 'min_support', its 'itemsets' (sorted tuples of product names, with their
+              'count' and whether they are 'frequent') and the 'orders' fingerprints.
+    """
+    matrix, _, products = basket
+    frequent_itemsets = eclat(matrix, np.arange(len(products)), min_support)
+    frequent = [tuple(sorted(itemset)) for itemset in frequent_itemsets['itemsets']]
+    border = negative_border(frequent, len(products))
+
+    columns = sparse.csc_matrix(matrix, dtype=bool)
+    frequent_products = np.array([itemset[0] for itemset in frequent if len(itemset) == 1], dtype=np.int64)
+    bitsets = item_bitsets(columns[:, frequent_products])
+    # Every product of a border itemset of two or more products is frequent
+    larger = [tuple(np.searchsorted(frequent_products, itemset).tolist()) for itemset in border if len(itemset) > 1]
+    border_counts = np.concatenate([np.diff(columns.indptr)[[itemset[0] for itemset in border if len(itemset) == 1]],
+                                    count_itemsets(bitsets, larger)]).astype(np.int64)
+
+    counts = np.concatenate([np.rint(frequent_itemsets['support'].to_numpy() * matrix.shape[0]).astype(np.int64), border_counts])
+    names = products.to_numpy(dtype=object)
+    border = [itemset for itemset in border if len(itemset) == 1] + [itemset for itemset in border if len(itemset) > 1]
+    itemsets = pd.DataFrame({
+        'itemsets': [tuple(names[list(itemset)]) for itemset in frequent + border],
+        'count': counts,
+        'frequent': np.arange(len(counts)) < len(frequent),
+    })
+    return {'min_support': min_support, 'itemsets': itemsets, 'orders': order_fingerprints(basket)}
+
+def update_itemset_store(store, basket, min_support):
+    """
+    Brings an itemset store up to date with the order lines, in the style of FUP with a negative border.
+    Only the orders the store has not counted yet are scanned, to add their counts to those of the frequent
+    itemsets and of the negative border. As long as no itemset of the border becomes frequent, no other
+    itemset can, so the new frequent itemsets and border are read off the updated counts.
+
+    The itemsets are mined again in full when there is no store, when it was built at another support, when
+    an order it counted has changed or disappeared, or when an itemset of the border becomes frequent.
+
+    Parameters:
+        store (dict): The store, as built by build_itemset_store, or None.
+        basket (tuple): The basket matrix of all the order lines with its orders and products, as returned by basket_matrix.
+        min_support (float): The minimum share of orders an itemset must appear in.
+
+    Returns:
+        tuple: The updated store, and the reason the itemsets were mined in full, or None when they were updated.
+    """
+    if store is None:
+        return build_itemset_store(basket, min_support), 'no itemset store'
+    if store['min_support'] != min_support:
+        return build_itemset_store(basket, min_support), f"the store was built at a support of {store['min_support']}"
+
+    fingerprints = order_fingerprints(basket)
+    counted = store['orders']
+    if not counted.index.isin(fingerprints.index).all():
+        return build_itemset_store(basket, min_support), 'orders were removed'
+    if (fingerprints.reindex(counted.index) != counted).any():
+        return build_itemset_store(basket, min_support), 'orders were changed'
+
+    matrix, orders, products = basket
+    new_orders = ~orders.astype(str).isin(counted.index)
+    bitsets = item_bitsets(matrix[np.flatnonzero(new_orders)])
+    n_orders = matrix.shape[0]
+
+    # Products seen for the first time are new singletons of the border, never counted before
+    itemsets = store['itemsets']
+    stored = set(itemsets['itemsets'])
+    new_products = [(product,) for product in products if (product,) not in stored]
+    itemsets = pd.concat([itemsets, pd.DataFrame({'itemsets': new_products, 'count': np.zeros(len(new_products), dtype=np.int64), 'frequent': False})],
+                         ignore_index=True)
+
+    ids = itemset_ids(itemsets['itemsets'], products)
+    counts = itemsets['count'].to_numpy() + count_itemsets(bitsets, ids)
+    reaches_support = counts / n_orders >= min_support
+    was_frequent = itemsets['frequent'].to_numpy()
+    if (reaches_support & ~was_frequent).any():
+        return build_itemset_store(basket, min_support), 'the negative border was crossed'
+
+    # Itemsets no longer frequent stay in the border when all their subsets still are,
+    # and the border is unchanged when every frequent itemset stays frequent
+    frequent = reaches_support & was_frequent
+    if (frequent == was_frequent).all():
+        keep = np.ones(len(ids), dtype=bool)
+    else:
+        frequent_ids = {itemset for itemset, is_frequent in zip(ids, frequent) if is_frequent}
+        keep = frequent | np.array([not is_frequent and subsets_frequent(itemset, frequent_ids) for itemset, is_frequent in zip(ids, frequent)], dtype=bool)
+    itemsets = pd.DataFrame({'itemsets': itemsets['itemsets'][keep].tolist(), 'count': counts[keep], 'frequent': frequent[keep]})
+    return {'min_support': min_support, 'itemsets': itemsets, 'orders': fingerprints}, None
+
+def store_frequent_itemsets(store, products):
+    """
+    Gives the frequent itemsets of a store as mine_frequent_itemsets would find them in the order lines
+    the store is up to date with, over their product IDs and in the same order.
+
+    Parameters:
+        store (dict): The store.
+        products (pd.Index): The sorted products of the basket matrix of the order lines.
+
+    Returns:
+        pd.DataFrame: The frequent itemsets, with their 'support' and 'itemsets' (frozensets of product IDs).
+    """
+    frequent = store['itemsets'][store['itemsets']['frequent']]
+    ids = itemset_ids(frequent['itemsets'], products)
+    order = sorted(range(len(ids)), key=lambda position: (len(ids[position]), ids[position]))
+    return pd.DataFrame({
+        'support': frequent['count'].to_numpy()[order] / len(store['orders']) if order else np.array([], dtype=float),
+        'itemsets': [frozenset(ids[position]) for position in order],
+    })
+
+def write_itemset_store(store, store_dir):
+    """
+    Saves an itemset store to a directory, every itemset as its list of products. Each file is replaced
+    atomically, and the metadata holding the number of orders counted is written last.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    files = {name: os.path.join(store_dir, file_name) for name, file_name in STORE_FILES.items()}
+    itemsets = store['itemsets'].assign(itemsets=store['itemsets']['itemsets'].map(list))
+    itemsets.to_parquet(f"{files['itemsets']}.tmp", index=False)
+    os.replace(f"{files['itemsets']}.tmp", files['itemsets'])
+    store['orders'].rename_axis('order').reset_index().to_parquet(f"{files['orders']}.tmp", index=False)
+    os.replace(f"{files['orders']}.tmp", files['orders'])
+    with open(f"{files['meta']}.tmp", 'w') as file:
+        json.dump({'min_support': store['min_support'], 'order_count': len(store['orders'])}, file, indent=2)
+    os.replace(f"{files['meta']}.tmp", files['meta'])
+
+def read_itemset_store(store_dir):
+    """
+    Reads an itemset store saved by write_itemset_store. A missing or partly written store is treated as none.
+    """
+    files = {name: os.path.join(store_dir, file_name) for name, file_name in STORE_FILES.items()}
+    if not all(os.path.exists(path) for path in files.values()):
+        return None
+    with open(files['meta'], 'r') as file:
+        meta = json.load(file)
+    orders = pd.read_parquet(files['orders'])
+    if len(orders) != meta['order_count']:
+        return None
+    itemsets = pd.read_parquet(files['itemsets'])
+    itemsets['itemsets'] = itemsets['itemsets'].map(tuple)
+    return {'min_support': meta['min_support'], 'itemsets': itemsets,
+            'orders': pd.Series(orders['fingerprint'].to_numpy(), index=orders['order'].astype(str), name='fingerprint')}
+
+def mine_itemsets_incrementally(basket, min_support, store_dir):
+    """
+    Finds the frequent itemsets of the order lines by updating the itemset store of the last run with the
+    orders added since, and saves the updated store. Gives the same itemsets as mine_frequent_itemsets.
+
+    Parameters:
+        basket (tuple): The basket matrix of all the order lines with its orders and products, as returned by basket_matrix.
+        min_support (float): The minimum share of orders an itemset must appear in.
+        store_dir (str): The directory of the itemset store.
+
+    Returns:
+        pd.DataFrame: The frequent itemsets, as returned by mine_frequent_itemsets.
+    """
+    previous = read_itemset_store(store_dir)
+    store, reason = update_itemset_store(previous, basket, min_support)
+    if reason is None:
+        print(f"Updated the itemset store with {len(store['orders']) - len(previous['orders'])} new orders.")
+    else:
+        print(f"Mined the itemsets of {len(store['orders'])} orders in full: {reason}.")
+    write_itemset_store(store, store_dir)
+    return store_frequent_itemsets(store, basket[2])
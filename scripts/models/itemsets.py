@@ -0,0 +1,195 @@
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from models.basket import basket_matrix
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Metric columns of the rules, as named by mlxtend and stored in the apriori_results and fpgrowth_results tables
+RULE_METRICS = ['antecedent support', 'consequent support', 'support', 'confidence', 'lift', 'leverage', 'conviction', 'zhangs_metric']
+
+
+def item_bitsets(matrix):
+    """
+    Turns an orders x products matrix into the vertical layout Eclat works on: one row of packed bits per product,
+    bit i set when the product is in order i.
+
+    Parameters:
+        matrix (scipy.sparse.spmatrix): The boolean basket matrix, as built by basket_matrix.
+
+    Returns:
+        np.ndarray: A uint8 array of shape (products, ceil(orders / 8)).
+    """
+    coo = matrix.tocoo()
+    bitsets = np.zeros((matrix.shape[1], (matrix.shape[0] + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(bitsets, (coo.col, coo.row >> 3), (128 >> (coo.row & 7)).astype(np.uint8))
+    return bitsets
+
+def count_bits(bitsets):
+    """
+    Counts the set bits of every row of packed bits, i.e. the orders holding every itemset.
+    """
+    return POPCOUNT[bitsets].sum(axis=-1, dtype=np.int64)
+
+def eclat(matrix, items, min_support, max_len=None):
+    """
+    Finds the frequent itemsets of a basket matrix with Eclat. Every itemset keeps the bitset of the orders
+    holding it, and is extended depth first with the products coming after its last one, the support of
+    every extension being counted with a single AND and popcount over all the candidates at once.
+
+    Gives the same itemsets and supports as mlxtend's apriori and fpgrowth with use_colnames=True.
+
+    Parameters:
+        matrix (scipy.sparse.spmatrix): The boolean basket matrix, as built by basket_matrix.
+        items (list-like): The product of every column of the matrix.
+        min_support (float): The minimum share of orders an itemset must appear in.
+        max_len (int): Optional maximum number of products in an itemset.
+
+    Returns:
+        pd.DataFrame: The frequent itemsets, with their 'support' and 'itemsets' (frozensets of products),
+                      ordered by size and then by column position as mlxtend's apriori does.
+    """
+    n_orders = matrix.shape[0]
+    items = np.asarray(items, dtype=object)
+    if n_orders == 0:
+        return pd.DataFrame({'support': pd.Series(dtype=float), 'itemsets': pd.Series(dtype=object)})
+
+    # Only the frequent products get a bitset, so memory grows with them rather than with every product
+    matrix = sparse.csc_matrix(matrix, dtype=bool)
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+    counts = np.diff(matrix.indptr)
+    frequent = np.flatnonzero(counts / n_orders >= min_support)
+    # Extending the least frequent products first keeps the candidate bitsets sparse and short lived
+    frequent = frequent[np.argsort(counts[frequent], kind='stable')]
+    bitsets = item_bitsets(matrix[:, frequent])
+
+    found = []
+    def extend(prefix, candidates, candidate_bitsets, candidate_counts):
+        for position, item in enumerate(candidates):
+            itemset = prefix + (item,)
+            found.append((candidate_counts[position], tuple(sorted(itemset))))
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            extension_bitsets = candidate_bitsets[position + 1:] & candidate_bitsets[position]
+            extension_counts = count_bits(extension_bitsets)
+            keep = extension_counts / n_orders >= min_support
+            if keep.any():
+                extend(itemset, candidates[position + 1:][keep], extension_bitsets[keep], extension_counts[keep])
+
+    extend((), frequent, bitsets, counts[frequent])
+    found.sort(key=lambda entry: (len(entry[1]), entry[1]))
+    return pd.DataFrame({
+        'support': np.array([count for count, _ in found], dtype=float) / n_orders,
+        'itemsets': [frozenset(items[list(itemset)]) for _, itemset in found],
+    })
+
+def mine_frequent_itemsets(df, min_support, max_len=None):
+    """
+    Builds the basket matrix of the order lines and finds its frequent itemsets. Products are identified
+    by their column in the matrix, i.e. the product IDs of rule_table.product_dictionary.
+
+    Parameters:
+        df (pd.DataFrame): The order lines, with ecom_reference_order_number and product_name columns.
+        min_support (float): The minimum share of orders an itemset must appear in.
+        max_len (int): Optional maximum number of products in an itemset.
+
+    Returns:
+        pd.DataFrame: The frequent itemsets, as returned by eclat, with frozensets of product IDs.
+    """
+    matrix, _, _ = basket_matrix(df)
+    return eclat(matrix, np.arange(matrix.shape[1]), min_support, max_len)
+
+def itemsets_above(frequent_itemsets, min_support):
+    """
+    Keeps the itemsets reaching a higher minimum support. Every subset of an itemset is at least as frequent
+    as the itemset itself, so the result is exactly what mining at that support would give.
+    """
+    return frequent_itemsets[frequent_itemsets['support'] >= min_support].reset_index(drop=True)
+
+def write_itemsets(frequent_itemsets, path):
+    """
+    Saves frequent itemsets to a Parquet file, every itemset as its sorted list of products.
+    """
+    frequent_itemsets.assign(itemsets=frequent_itemsets['itemsets'].map(sorted)).to_parquet(path, index=False)
+
+def read_itemsets(path):
+    """
+    Reads frequent itemsets saved by write_itemsets, every itemset back as a frozenset.
+    """
+    frequent_itemsets = pd.read_parquet(path)
+    frequent_itemsets['itemsets'] = frequent_itemsets['itemsets'].map(frozenset)
+    return frequent_itemsets
+
+def rule_metrics(sAC, sA, sC):
+    """
+    Computes the metrics of rules A -> C from the supports of A and C together, of A and of C,
+    with the formulas of mlxtend.
+
+    Returns:
+        dict: Mapping of metric name to array of values, in the order of RULE_METRICS.
+    """
+    confidence = sAC / sA
+    leverage = sAC - sA * sC
+    conviction = np.full(confidence.shape, np.inf)
+    below_one = confidence < 1.0
+    conviction[below_one] = (1.0 - sC[below_one]) / (1.0 - confidence[below_one])
+    denominator = np.maximum(sAC * (1 - sA), sA * (sC - sAC))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zhangs_metric = np.where(denominator == 0, 0, leverage / denominator)
+    return {
+        'antecedent support': sA,
+        'consequent support': sC,
+        'support': sAC,
+        'confidence': confidence,
+        'lift': confidence / sC,
+        'leverage': leverage,
+        'conviction': conviction,
+        'zhangs_metric': zhangs_metric,
+    }
+
+def association_rules(frequent_itemsets, metric='confidence', min_threshold=0.8):
+    """
+    Generates the association rules of a set of frequent itemsets: every split of an itemset into an antecedent
+    and a consequent whose metric reaches the threshold. The metrics of all the candidate rules are computed
+    together on arrays of supports.
+
+    Gives the same rules and metrics as mlxtend's association_rules, with the columns of RULE_METRICS.
+
+    Parameters:
+        frequent_itemsets (pd.DataFrame): The frequent itemsets, with 'support' and 'itemsets' columns.
+        metric (str): The metric the rules are filtered on, one of RULE_METRICS.
+        min_threshold (float): The minimum value of the metric.
+
+    Returns:
+        pd.DataFrame: The rules, with 'antecedents' and 'consequents' frozensets and their metrics.
+    """
+    if metric not in RULE_METRICS:
+        raise ValueError(f"Metric must be one of {RULE_METRICS}, got '{metric}'")
+    if frequent_itemsets.empty:
+        raise ValueError("The DataFrame of frequent itemsets is empty.")
+
+    supports = dict(zip(frequent_itemsets['itemsets'].map(frozenset), frequent_itemsets['support']))
+    antecedents, consequents, rule_supports = [], [], []
+    for itemset, support in supports.items():
+        for size in range(len(itemset) - 1, 0, -1):
+            for antecedent in combinations(itemset, r=size):
+                antecedent = frozenset(antecedent)
+                consequent = itemset.difference(antecedent)
+                antecedents.append(antecedent)
+                consequents.append(consequent)
+                rule_supports.append((support, supports[antecedent], supports[consequent]))
+
+    rule_supports = np.array(rule_supports, dtype=float).reshape(-1, 3).T
+    metrics = rule_metrics(*rule_supports)
+    keep = metrics[metric] >= min_threshold
+    rules = pd.DataFrame({
+        'antecedents': pd.Series(antecedents, dtype=object)[keep].reset_index(drop=True),
+        'consequents': pd.Series(consequents, dtype=object)[keep].reset_index(drop=True),
+    })
+    for name in RULE_METRICS:
+        rules[name] = metrics[name][keep]
+    return rules
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from models.itemsets import RULE_METRICS
+
+# Columns of the rules holding itemsets
+ITEMSET_COLUMNS = ['antecedents', 'consequents']
+
+
+def product_dictionary(products):
+    """
+    Lists the product ID of every product of the basket matrix: its column. Products are numbered in name
+    order, so the sorted IDs of an itemset also list its products in name order.
+
+    Parameters:
+        products (pd.Index): The sorted products of the basket matrix, as returned by basket_matrix.
+
+    Returns:
+        pd.DataFrame: The 'product_id' and 'product_name' of every product.
+    """
+    return pd.DataFrame({'product_id': np.arange(len(products), dtype=np.int32), 'product_name': np.asarray(products, dtype=object)})
+
+def encode_itemsets(itemsets):
+    """
+    Turns itemsets of product IDs into sorted int32 arrays, the form they are stored in.
+    """
+    return pd.Series([np.sort(np.fromiter(itemset, dtype=np.int32, count=len(itemset))) for itemset in itemsets],
+                     index=itemsets.index, dtype=object)
+
+def encode_rules(rules):
+    """
+    Stores the antecedents and consequents of rules over product IDs as sorted int32 arrays.
+
+    Parameters:
+        rules (pd.DataFrame): The rules, as returned by itemsets.association_rules.
+
+    Returns:
+        pd.DataFrame: The rules with encoded itemsets and a fresh index.
+    """
+    encoded = rules.assign(**{column: encode_itemsets(rules[column]) for column in ITEMSET_COLUMNS})
+    return encoded.reset_index(drop=True)
+
+def rule_keys(rules):
+    """
+    Gives the key of every encoded rule: the tuples of its antecedent and consequent IDs.
+    Two rules are the same rule exactly when their keys are equal.
+    """
+    return pd.Series(list(zip(map(tuple, rules['antecedents']), map(tuple, rules['consequents']))), index=rules.index, dtype=object)
+
+def drop_duplicate_rules(rules):
+    """
+    Keeps the first of every set of encoded rules with the same antecedents and consequents.
+    """
+    return rules[~rule_keys(rules).duplicated()]
+
+def decode_itemsets(itemsets, products, separator=', '):
+    """
+    Turns encoded itemsets into readable strings, the names of their products joined in ID order.
+    The names of every product of every itemset are looked up at once.
+
+    Parameters:
+        itemsets (pd.Series): The itemsets, as arrays of product IDs.
+        products (pd.DataFrame): The product dictionary, as built by product_dictionary.
+        separator (str): The string the names are joined with.
+
+    Returns:
+        pd.Series: The string of every itemset.
+    """
+    if itemsets.empty:
+        return pd.Series(index=itemsets.index, dtype=object)
+    lengths = itemsets.map(len).to_numpy()
+    ids = np.concatenate(itemsets.tolist()).astype(np.int64)
+    names = products.set_index('product_id')['product_name'].reindex(ids).to_numpy()
+    positions = np.repeat(np.arange(len(itemsets)), lengths)
+    joined = pd.Series(names, index=positions).groupby(level=0).agg(separator.join)
+    return pd.Series(joined.reindex(np.arange(len(itemsets)), fill_value='').to_numpy(), index=itemsets.index)
+
+def rules_to_table(rules, products, decimal_places=3):
+    """
+    Turns encoded rules into the rows of the apriori_results and fpgrowth_results tables: duplicate rules are
+    dropped on their integer keys, the itemsets are decoded into product names, the metrics are renamed to
+    their column names, and infinite or missing metrics are set to 0 before rounding.
+
+    Parameters:
+        rules (pd.DataFrame): The encoded rules, as returned by encode_rules.
+        products (pd.DataFrame): The product dictionary, as built by product_dictionary.
+        decimal_places (int): The number of decimals the metrics are rounded to.
+
+    Returns:
+        pd.DataFrame: The rows of the table.
+    """
+    rules = drop_duplicate_rules(rules).reset_index(drop=True)
+    table = pd.DataFrame({column: decode_itemsets(rules[column], products) for column in ITEMSET_COLUMNS})
+    metrics = rules[RULE_METRICS].astype(float).replace([np.inf, -np.inf], np.nan).fillna(0).round(decimal_places)
+    metrics.columns = [name.replace(' ', '_') for name in RULE_METRICS]
+    return pd.concat([table, metrics], axis=1)
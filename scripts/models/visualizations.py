@@ -6,6 +6,8 @@ import seaborn as sns
 import squarify
 import os
 
+from models.basket import count_items_per_order, count_item_frequencies
+
 def save_summary_statistics(df, file_path):
     summary_stats = df[['ordered_quantity', 'unit_selling_price', 'unit_list_price']].describe()
     with open(file_path, 'w') as f:
@@ -361,15 +363,8 @@ def plot_top_distributors_treemap(df, file_path):
     print(f"Treemap of top distributing companies saved to {file_path}")
 
 def plot_transaction_diversity(df, file_path):
-    # Create a basket matrix (binary matrix)
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-
     # Count the number of unique items per transaction
-    unique_items_per_transaction = basket_sets.sum(axis=1)
+    unique_items_per_transaction = count_items_per_order(df)
 
     # Plot the distribution of the number of items per transaction
     plt.figure(figsize=(10, 6))
@@ -383,15 +378,8 @@ def plot_transaction_diversity(df, file_path):
     print(f"Distribution of the number of items per transaction plot saved to {file_path}")
 
 def plot_item_frequencies(df, file_path):
-    # Create a basket matrix (binary matrix)
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-
     # Count the frequency of each item across all transactions
-    item_frequencies = basket_sets.sum(axis=0)
+    item_frequencies = count_item_frequencies(df)
 
     # Plot the distribution of item frequencies
     plt.figure(figsize=(10, 6))
@@ -405,15 +393,8 @@ def plot_item_frequencies(df, file_path):
     print(f"Distribution of item frequencies plot saved to {file_path}")
 
 def save_transaction_diversity_stats(df, file_path):
-    # Create a basket matrix (binary matrix)
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-
     # Count the number of unique items per transaction
-    unique_items_per_transaction = basket_sets.sum(axis=1)
+    unique_items_per_transaction = count_items_per_order(df)
 
     # Calculate basic statistics
     stats = unique_items_per_transaction.describe()
@@ -427,15 +408,8 @@ def save_transaction_diversity_stats(df, file_path):
     print(f"Transaction diversity statistics saved to {file_path}")
 
 def save_item_frequencies_stats(df, file_path):
-    # Create a basket matrix (binary matrix)
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-
     # Count the frequency of each item across all transactions
-    item_frequencies = basket_sets.sum(axis=0)
+    item_frequencies = count_item_frequencies(df)
 
     # Calculate basic statistics
     stats = item_frequencies.describe()
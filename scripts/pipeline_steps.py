@@ -0,0 +1,334 @@
+import os
+from functools import partial
+import pandas as pd
+
+from extract import extract_sheets_to_files
+from schemas import SHEET_SCHEMAS, RULE_FIELDS
+from staging import read_staged_data, iter_staged_batches, write_parquet_parts
+from key_index import KEY_COLUMNS, write_key_index, read_key_index
+from lake import write_partitions
+from transform import add_row_hash
+from transform_pipelines import (concatenate_Aramex_Cosmaline,
+                       convert_data_types_aramex_cosmaline,
+                       data_preprocessing_pipeline_ECOM_Data,
+                       data_preprocessing_pipeline_Aramex_Data,
+                       data_preprocessing_pipeline_Cosmaline_Data,
+                       data_preprocessing_pipeline_CreditCard_Data,
+                       data_preprocessing_pipeline_ERP_Data,
+                       data_preprocessing_pipeline_Oracle_Data,
+                       data_preprocessing_pipeline_ECOM_Data_in_chunks,
+                       data_preprocessing_pipeline_Aramex_Data_in_chunks,
+                       data_preprocessing_pipeline_CreditCard_Data_in_chunks,
+                       data_preprocessing_pipeline_ERP_Data_in_chunks,
+                       data_preprocessing_pipeline_Oracle_Data_in_chunks)
+from load import bulk_upload_dataframe_to_temp_sql, merge_data_from_temp_to_main_with_pk, merge_data_from_temp_to_main_by_hash, ensure_row_hash_column, sort_stored_itemsets
+from models.rule_table import rules_to_table
+
+# Directory every staged and transformed file is written to, and the workbook the sources are extracted from.
+# Both default to the layout of the Airflow containers.
+DATA_DIR = os.environ.get('ETL_DATA_DIR', '/opt/airflow/data')
+SOURCE_WORKBOOK = os.environ.get('ETL_SOURCE_WORKBOOK', os.path.join(DATA_DIR, 'Final File.xlsx'))
+
+# Root directory of the lake keeping the history of the transformed outputs, partitioned by source and business date
+LAKE_DIR = os.environ.get('ETL_LAKE_DIR', os.path.join(DATA_DIR, 'lake'))
+
+# Sheet of the source workbook -> staged file written by the extract stage
+STAGED_FILES = {
+    'Website ECOM Data': 'ecom_data.arrow',
+    'Shipped & Collected - Aramex': 'aramex_data.arrow',
+    'Shipped & Collected - Cosmaline': 'cosmaline_data.arrow',
+    'Collected - Credit Card': 'credit_card_data.arrow',
+    'ERP-Oracle Collection': 'erp_data.arrow',
+    'Oracle Data': 'oracle_data.arrow',
+    'Daily Rate': 'daily_rate_data.arrow',
+}
+
+# Output of every transform step. The ECOM key index holds the AWB and order_number of every transformed
+# ECOM order and is probed by the Aramex and Cosmaline transforms.
+OUTPUT_FILES = {
+    'ecom_orders': 'transformed_ecom_data.parquet',
+    'ecom_key_index': 'ecom_key_index.parquet',
+    'aramex': 'transformed_aramex_data.parquet',
+    'cosmaline': 'transformed_cosmaline_data.parquet',
+    'shippedandcollected_aramex_cosmaline': 'aramex_cosmaline_data.parquet',
+    'credit_card': 'transformed_credit_card_data.parquet',
+    'erp_data': 'transformed_erp_data.parquet',
+    'oracle_data': 'transformed_oracle_data.parquet',
+}
+
+# Transformed outputs kept in the lake, with the column giving the business date of their rows
+LAKE_DATE_COLUMNS = {
+    'ecom_orders': 'created_at',
+    'shippedandcollected_aramex_cosmaline': 'Delivery_Date',
+    'credit_card': 'value_date',
+    'erp_data': 'RECEIPT_DATE',
+    'oracle_data': 'ordered_date',
+}
+
+# Columns identifying a row of the main tables without a primary key; their hash is the merge key
+RULE_COLUMNS = [spec['canonical'] for spec in RULE_FIELDS]
+ROW_HASH_COLUMNS = {
+    'credit_card': ['value_date', 'narrative', 'amount', 'currency'],
+    'oracle_data': ['operating_unit_name', 'oracle_reference_order_number', 'ecom_reference_order_number', 'order_type', 'order_type_name', 'ordered_item', 'ordered_quantity', 'pricing_quantity_uom', 'unit_selling_price', 'unit_list_price', 'ordered_date', 'customer_name', 'tax_code'],
+    'daily_rate': ['date', 'rate'],
+    'apriori_results': RULE_COLUMNS,
+    'fpgrowth_results': RULE_COLUMNS,
+}
+
+# Rule table -> temporary table its rules are uploaded to
+RULE_STAGING_TABLES = {
+    'apriori_results': 'apriori_temp_results',
+    'fpgrowth_results': 'fpgrowth_temp_results',
+}
+
+def data_path(file_name, data_dir=None):
+    """
+    Gives the path of a file of the data directory.
+
+    Parameters:
+        file_name (str): The name of the file.
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+
+    Returns:
+        str: The path of the file.
+    """
+    return os.path.join(data_dir or DATA_DIR, file_name)
+
+def staged_path(sheet_name, data_dir=None):
+    """
+    Gives the path of the staged file of a sheet.
+    """
+    return data_path(STAGED_FILES[sheet_name], data_dir)
+
+def output_path(name, data_dir=None):
+    """
+    Gives the path of the output of a transform step.
+    """
+    return data_path(OUTPUT_FILES[name], data_dir)
+
+def extract_targets(data_dir=None, sheet_names=None):
+    """
+    Maps the sheets to extract to their staged files.
+
+    Parameters:
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+        sheet_names (list): The sheets to extract. Defaults to every sheet.
+
+    Returns:
+        dict: Mapping of sheet name to the path of its staged file.
+    """
+    return {sheet_name: staged_path(sheet_name, data_dir) for sheet_name in (sheet_names or STAGED_FILES)}
+
+def extract_sheet(sheet_name, workbook=None, data_dir=None):
+    """
+    Stages a single sheet of the source workbook.
+
+    Parameters:
+        sheet_name (str): The sheet to extract.
+        workbook (str): The path of the source workbook. Defaults to SOURCE_WORKBOOK.
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+
+    Returns:
+        int: The number of rows staged.
+    """
+    row_counts = extract_sheets_to_files(workbook or SOURCE_WORKBOOK, extract_targets(data_dir, [sheet_name]), SHEET_SCHEMAS)
+    return row_counts[sheet_name]
+
+def transform_ecom(data_dir=None, chunked=False):
+    """
+    Transforms the staged ECOM data and writes its key index.
+
+    Parameters:
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+        chunked (bool): Whether the staged data is transformed one extracted chunk at a time.
+
+    Returns:
+        int: The number of rows written.
+    """
+    path = staged_path('Website ECOM Data', data_dir)
+    if chunked:
+        chunks = data_preprocessing_pipeline_ECOM_Data_in_chunks(iter_staged_batches(path))
+    else:
+        chunks = [data_preprocessing_pipeline_ECOM_Data(read_staged_data(path))]
+    row_count = write_parquet_parts(chunks, output_path('ecom_orders', data_dir))
+    write_key_index(pd.read_parquet(output_path('ecom_orders', data_dir), columns=KEY_COLUMNS), output_path('ecom_key_index', data_dir))
+    return row_count
+
+def transform_aramex(data_dir=None, chunked=False):
+    """
+    Transforms the staged Aramex data, looking its order numbers up in the ECOM key index.
+    """
+    path = staged_path('Shipped & Collected - Aramex', data_dir)
+    ecom_data = read_key_index(output_path('ecom_key_index', data_dir))
+    if chunked:
+        chunks = data_preprocessing_pipeline_Aramex_Data_in_chunks(partial(iter_staged_batches, path), ecom_data)
+    else:
+        chunks = [data_preprocessing_pipeline_Aramex_Data(read_staged_data(path), ecom_data)]
+    return write_parquet_parts(chunks, output_path('aramex', data_dir))
+
+def transform_cosmaline(data_dir=None, chunked=False):
+    """
+    Transforms the staged Cosmaline data, looking its AWBs up in the ECOM key index.
+    The Cosmaline data is always transformed as a single DataFrame.
+    """
+    df = read_staged_data(staged_path('Shipped & Collected - Cosmaline', data_dir))
+    ecom_data = read_key_index(output_path('ecom_key_index', data_dir))
+    df = data_preprocessing_pipeline_Cosmaline_Data(df, ecom_data)
+    return write_parquet_parts([df], output_path('cosmaline', data_dir))
+
+def concatenate_aramex_cosmaline(data_dir=None, chunked=False):
+    """
+    Concatenates the transformed Aramex and Cosmaline data.
+    """
+    aramex_data = pd.read_parquet(output_path('aramex', data_dir))
+    cosmaline_data = pd.read_parquet(output_path('cosmaline', data_dir))
+    aramex_data = convert_data_types_aramex_cosmaline(aramex_data)
+    cosmaline_data = convert_data_types_aramex_cosmaline(cosmaline_data)
+    combined_df = concatenate_Aramex_Cosmaline(aramex_data, cosmaline_data)
+    return write_parquet_parts([combined_df], output_path('shippedandcollected_aramex_cosmaline', data_dir))
+
+def transform_credit_card(data_dir=None, chunked=False):
+    """
+    Transforms the staged Credit Card data and adds the hash of every row.
+    """
+    path = staged_path('Collected - Credit Card', data_dir)
+    if chunked:
+        chunks = data_preprocessing_pipeline_CreditCard_Data_in_chunks(iter_staged_batches(path))
+    else:
+        chunks = [data_preprocessing_pipeline_CreditCard_Data(read_staged_data(path))]
+    chunks = (add_row_hash(df, ROW_HASH_COLUMNS['credit_card']) for df in chunks)
+    return write_parquet_parts(chunks, output_path('credit_card', data_dir))
+
+def transform_erp(data_dir=None, chunked=False):
+    """
+    Transforms the staged ERP data.
+    """
+    path = staged_path('ERP-Oracle Collection', data_dir)
+    if chunked:
+        chunks = data_preprocessing_pipeline_ERP_Data_in_chunks(iter_staged_batches(path))
+    else:
+        chunks = [data_preprocessing_pipeline_ERP_Data(read_staged_data(path))]
+    return write_parquet_parts(chunks, output_path('erp_data', data_dir))
+
+def transform_oracle(data_dir=None, chunked=False):
+    """
+    Transforms the staged Oracle data and adds the hash of every row.
+    """
+    path = staged_path('Oracle Data', data_dir)
+    if chunked:
+        chunks = data_preprocessing_pipeline_Oracle_Data_in_chunks(iter_staged_batches(path))
+    else:
+        chunks = [data_preprocessing_pipeline_Oracle_Data(read_staged_data(path))]
+    chunks = (add_row_hash(df, ROW_HASH_COLUMNS['oracle_data']) for df in chunks)
+    return write_parquet_parts(chunks, output_path('oracle_data', data_dir))
+
+def publish_output(name, data_dir=None, lake_dir=None):
+    """
+    Writes a transformed output into the lake, replacing the partitions of the business dates it holds.
+
+    Parameters:
+        name (str): The output, as declared in LAKE_DATE_COLUMNS.
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+        lake_dir (str): The root directory of the lake. Defaults to LAKE_DIR.
+
+    Returns:
+        None
+    """
+    write_partitions(output_path(name, data_dir), lake_dir or LAKE_DIR, name, LAKE_DATE_COLUMNS[name])
+
+def load_ecom(engine, data_dir=None, row_filter=None):
+    """
+    Loads the transformed ECOM data into the ECOM_orders table.
+
+    Parameters:
+        engine: The SQLAlchemy engine object connected to the database.
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+        row_filter (function): Optional function keeping the rows to load, e.g. those past a watermark.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    df = pd.read_parquet(output_path('ecom_orders', data_dir))
+    if row_filter is not None:
+        df = row_filter(df)
+    bulk_upload_dataframe_to_temp_sql(df, 'temp_ecom_orders', engine)
+    merge_data_from_temp_to_main_with_pk('temp_ecom_orders', 'ECOM_orders', engine)
+    return len(df)
+
+def load_aramex_cosmaline(engine, data_dir=None):
+    """
+    Loads the concatenated Aramex and Cosmaline data into the shippedandcollected_aramex_cosmaline table.
+    Returns the number of rows loaded.
+    """
+    combined_df = pd.read_parquet(output_path('shippedandcollected_aramex_cosmaline', data_dir))
+    bulk_upload_dataframe_to_temp_sql(combined_df, 'temp_shippedandcollected_aramex_cosmaline', engine)
+    merge_data_from_temp_to_main_with_pk('temp_shippedandcollected_aramex_cosmaline', 'shippedandcollected_aramex_cosmaline', engine)
+    return len(combined_df)
+
+def load_credit_card(engine, data_dir=None):
+    """
+    Loads the transformed Credit Card data into the credit_card table, merging on the hash of every row.
+    Returns the number of rows loaded.
+    """
+    df = pd.read_parquet(output_path('credit_card', data_dir))
+    bulk_upload_dataframe_to_temp_sql(df, 'temp_credit_card', engine)
+    ensure_row_hash_column('credit_card', engine, ROW_HASH_COLUMNS['credit_card'])
+    merge_data_from_temp_to_main_by_hash('temp_credit_card', 'credit_card', engine, ROW_HASH_COLUMNS['credit_card'])
+    return len(df)
+
+def load_erp(engine, data_dir=None):
+    """
+    Loads the transformed ERP data into the erp_data table.
+    Returns the number of rows loaded.
+    """
+    df = pd.read_parquet(output_path('erp_data', data_dir))
+    bulk_upload_dataframe_to_temp_sql(df, 'temp_erp_data', engine)
+    merge_data_from_temp_to_main_with_pk('temp_erp_data', 'erp_data', engine)
+    return len(df)
+
+def load_oracle(engine, data_dir=None):
+    """
+    Loads the transformed Oracle data into the oracle_data table, merging on the hash of every row.
+    Returns the number of rows loaded.
+    """
+    df = pd.read_parquet(output_path('oracle_data', data_dir))
+    bulk_upload_dataframe_to_temp_sql(df, 'temp_oracle_data', engine)
+    ensure_row_hash_column('oracle_data', engine, ROW_HASH_COLUMNS['oracle_data'])
+    merge_data_from_temp_to_main_by_hash('temp_oracle_data', 'oracle_data', engine, ROW_HASH_COLUMNS['oracle_data'])
+    return len(df)
+
+def load_daily_rate(engine, data_dir=None):
+    """
+    Loads the staged Daily Rate data into the daily_rate table, merging on the hash of every row.
+    The Daily Rate sheet has no transform step.
+    Returns the number of rows loaded.
+    """
+    df = read_staged_data(staged_path('Daily Rate', data_dir))
+    df.columns = [col.lower() for col in df.columns]
+    df = add_row_hash(df, ROW_HASH_COLUMNS['daily_rate'])
+    bulk_upload_dataframe_to_temp_sql(df, 'temp_daily_rate', engine)
+    ensure_row_hash_column('daily_rate', engine, ROW_HASH_COLUMNS['daily_rate'])
+    merge_data_from_temp_to_main_by_hash('temp_daily_rate', 'daily_rate', engine, ROW_HASH_COLUMNS['daily_rate'])
+    return len(df)
+
+def load_rules(table_name, engine, data_dir=None):
+    """
+    Loads the rules generated by one of the miners into the apriori_results or fpgrowth_results table,
+    merging on the hash of every row. The itemsets stored before rules were written in name order are
+    sorted the first time the row hashes are computed.
+
+    Parameters:
+        table_name (str): The rule table, 'apriori_results' or 'fpgrowth_results'.
+        engine: The SQLAlchemy engine object connected to the database.
+        data_dir (str): The data directory. Defaults to DATA_DIR.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    rules = pd.read_parquet(data_path(f"{table_name}.parquet", data_dir))
+    products = pd.read_parquet(data_path('rule_products.parquet', data_dir))
+    df = add_row_hash(rules_to_table(rules, products, decimal_places=3), ROW_HASH_COLUMNS[table_name])
+    bulk_upload_dataframe_to_temp_sql(df, RULE_STAGING_TABLES[table_name], engine)
+    ensure_row_hash_column(table_name, engine, ROW_HASH_COLUMNS[table_name], migrate=sort_stored_itemsets)
+    merge_data_from_temp_to_main_by_hash(RULE_STAGING_TABLES[table_name], table_name, engine, ROW_HASH_COLUMNS[table_name])
+    return len(df)
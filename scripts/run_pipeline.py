@@ -0,0 +1,222 @@
+"""
+Runs the extract, transform and load stages of the ETL outside Airflow, e.g. for local backfills and tests.
+The extract and transform steps follow the dependencies of etl_dag and the independent ones run in parallel
+in a process pool. Steps hand their data to each other through the staged Arrow IPC files, which the workers
+read through a memory map, and the Parquet outputs, so no DataFrame is pickled between processes.
+
+Usage:
+    python scripts/run_pipeline.py [--workbook PATH] [--data-dir DIR] [--workers N] [--chunked] [--load] [--lake-dir DIR]
+"""
+import argparse
+import os
+import sys
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Add the scripts directory to the system path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from load import create_db_engine
+from pipeline_steps import (DATA_DIR, SOURCE_WORKBOOK, LAKE_DIR, LAKE_DATE_COLUMNS, extract_sheet, publish_output,
+                            transform_ecom, transform_aramex, transform_cosmaline, concatenate_aramex_cosmaline,
+                            transform_credit_card, transform_erp, transform_oracle,
+                            load_ecom, load_aramex_cosmaline, load_credit_card, load_erp, load_oracle, load_daily_rate)
+
+# Extract step of every sheet. Each one opens the workbook in its own worker and streams only its sheet.
+EXTRACT_STEPS = {
+    'extract_ecom_data': 'Website ECOM Data',
+    'extract_aramex_data': 'Shipped & Collected - Aramex',
+    'extract_cosmaline_data': 'Shipped & Collected - Cosmaline',
+    'extract_credit_card_data': 'Collected - Credit Card',
+    'extract_erp_data': 'ERP-Oracle Collection',
+    'extract_oracle_data': 'Oracle Data',
+    'extract_daily_rate_data': 'Daily Rate',
+}
+
+# Transform steps and the steps they depend on, as in etl_dag: the Aramex and Cosmaline data
+# are enriched with the ECOM key index, every other source is transformed on its own
+TRANSFORM_STEPS = {
+    'transform_ecom_data': (transform_ecom, ['extract_ecom_data']),
+    'transform_aramex_data': (transform_aramex, ['extract_aramex_data', 'transform_ecom_data']),
+    'transform_cosmaline_data': (transform_cosmaline, ['extract_cosmaline_data', 'transform_ecom_data']),
+    'concatenate_aramex_cosmaline_data': (concatenate_aramex_cosmaline, ['transform_aramex_data', 'transform_cosmaline_data']),
+    'transform_credit_card_data': (transform_credit_card, ['extract_credit_card_data']),
+    'transform_erp_data': (transform_erp, ['extract_erp_data']),
+    'transform_oracle_data': (transform_oracle, ['extract_oracle_data']),
+}
+
+# Load steps, in an order following the dependencies of etl_dag: the shipping and Oracle data after the ECOM data.
+# They run one after the other in the main process, so the merges never compete for the same tables.
+LOAD_STEPS = [
+    ('load_ecom_data', load_ecom),
+    ('load_concatenated_data', load_aramex_cosmaline),
+    ('load_oracle_data', load_oracle),
+    ('load_erp_data', load_erp),
+    ('load_credit_card_data', load_credit_card),
+    ('load_daily_rate_data', load_daily_rate),
+]
+
+def build_steps(workbook=SOURCE_WORKBOOK, data_dir=DATA_DIR, chunked=False):
+    """
+    Builds the graph of extract and transform steps of a workbook.
+
+    Parameters:
+        workbook (str): The path of the source workbook.
+        data_dir (str): The directory the staged and transformed files are written to.
+        chunked (bool): Whether the sources are transformed one extracted chunk at a time.
+
+    Returns:
+        dict: Mapping of step name to the function it runs and the names of the steps it depends on.
+    """
+    steps = {name: (partial(extract_sheet, sheet_name, workbook, data_dir), []) for name, sheet_name in EXTRACT_STEPS.items()}
+    for name, (function, dependencies) in TRANSFORM_STEPS.items():
+        steps[name] = (partial(function, data_dir=data_dir, chunked=chunked), dependencies)
+    return steps
+
+def _run_step(name, function):
+    """
+    Runs a single step in a worker process and times it.
+    """
+    start_time = time.perf_counter()
+    result = function()
+    return name, result, time.perf_counter() - start_time
+
+def _check_dependencies(steps):
+    """
+    Raises a ValueError when a step depends on a step missing from the graph.
+    """
+    unknown = {dependency for _, dependencies in steps.values() for dependency in dependencies} - set(steps)
+    if unknown:
+        raise ValueError(f"Unknown dependencies: {sorted(unknown)}")
+
+def run_steps_in_order(steps):
+    """
+    Runs a graph of steps one after the other in the current process, every step after the steps it depends on.
+    Used where the graph itself runs in a worker process, e.g. when several workbooks are processed in parallel.
+
+    Parameters:
+        steps (dict): Mapping of step name to the function it runs and the names of the steps it depends on.
+
+    Returns:
+        dict: Mapping of step name to the value returned by its function.
+    """
+    _check_dependencies(steps)
+    results = {}
+    pending = dict(steps)
+    while pending:
+        ready = [name for name, (_, dependencies) in pending.items() if all(dependency in results for dependency in dependencies)]
+        if not ready:
+            raise ValueError(f"Circular dependencies between {sorted(pending)}")
+        for name in ready:
+            function, _ = pending.pop(name)
+            name, results[name], duration = _run_step(name, function)
+            print(f"{name} finished in {duration:.2f} seconds.")
+    return results
+
+def run_steps(steps, max_workers=None):
+    """
+    Runs a graph of steps in a process pool, starting every step as soon as the steps it depends on are done.
+    A failing step stops the run once the steps already started are done.
+
+    Parameters:
+        steps (dict): Mapping of step name to the function it runs and the names of the steps it depends on.
+            The functions are called without arguments and must be picklable, e.g. partials of module level functions.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        dict: Mapping of step name to the value returned by its function.
+    """
+    _check_dependencies(steps)
+    results = {}
+    pending = dict(steps)
+    running = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, (function, dependencies) in list(pending.items()):
+                if all(dependency in results for dependency in dependencies):
+                    running[executor.submit(_run_step, name, function)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Circular dependencies between {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                name, result, duration = future.result()
+                results[name] = result
+                print(f"{name} finished in {duration:.2f} seconds.")
+    return results
+
+def publish_outputs(data_dir=DATA_DIR, lake_dir=LAKE_DIR):
+    """
+    Writes the transformed outputs of a data directory into the lake.
+
+    Parameters:
+        data_dir (str): The directory holding the transformed outputs.
+        lake_dir (str): The root directory of the lake.
+
+    Returns:
+        None
+    """
+    start_time = time.perf_counter()
+    for name in LAKE_DATE_COLUMNS:
+        publish_output(name, data_dir, lake_dir)
+    print(f"Published {data_dir} to {lake_dir} in {time.perf_counter() - start_time:.2f} seconds.")
+
+def load_outputs(engine, data_dir=DATA_DIR):
+    """
+    Loads the transformed outputs of a data directory into the database, one table after the other in the order of LOAD_STEPS.
+    Every table is merged on its primary key or row hash, so loading the same outputs again changes nothing.
+
+    Parameters:
+        engine: The SQLAlchemy engine object connected to the database.
+        data_dir (str): The directory holding the transformed outputs.
+
+    Returns:
+        None
+    """
+    for name, function in LOAD_STEPS:
+        start_time = time.perf_counter()
+        function(engine, data_dir=data_dir)
+        print(f"{name} finished in {time.perf_counter() - start_time:.2f} seconds.")
+
+def run_pipeline(workbook=SOURCE_WORKBOOK, data_dir=DATA_DIR, max_workers=None, chunked=False, load=False, lake_dir=LAKE_DIR):
+    """
+    Extracts every sheet of a workbook, transforms the sources in parallel, writes them into the lake and optionally loads them.
+
+    Parameters:
+        workbook (str): The path of the source workbook.
+        data_dir (str): The directory the staged and transformed files are written to.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+        chunked (bool): Whether the sources are transformed one extracted chunk at a time.
+        load (bool): Whether the transformed data is loaded into the database.
+        lake_dir (str): The root directory of the lake.
+
+    Returns:
+        dict: Mapping of step name to the value returned by its function; transform steps return the number of rows they wrote.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    start_time = time.perf_counter()
+    results = run_steps(build_steps(workbook, data_dir, chunked), max_workers)
+    publish_outputs(data_dir, lake_dir)
+
+    if load:
+        load_outputs(create_db_engine(), data_dir)
+
+    print(f"Pipeline finished in {time.perf_counter() - start_time:.2f} seconds.")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Runs the ETL pipeline outside Airflow.')
+    parser.add_argument('--workbook', default=SOURCE_WORKBOOK, help='Path of the source workbook.')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Directory the staged and transformed files are written to.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--chunked', action='store_true', help='Transform the sources one extracted chunk at a time.')
+    parser.add_argument('--load', action='store_true', help='Load the transformed data into the database.')
+    parser.add_argument('--lake-dir', default=LAKE_DIR, help='Root directory of the lake the transformed data is written into.')
+    args = parser.parse_args(argv)
+    run_pipeline(args.workbook, args.data_dir, args.workers, args.chunked, args.load, args.lake_dir)
+
+if __name__ == '__main__':
+    main()
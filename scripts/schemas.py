@@ -0,0 +1,283 @@
+import pyarrow as pa
+from sqlalchemy import String, DateTime, Float, Integer
+
+# Format text values of date columns are parsed with; cells already holding dates are kept as they are.
+ISO_DATE = 'ISO8601'
+
+def field(name, dtype, canonical=None, nullable=True, parse_format=None, length=255):
+    """
+    Declares a column of a source.
+
+    Parameters:
+        name (str): The name of the column in the source.
+        dtype (str): The pandas dtype of the column: 'object' or 'str' for text, 'category' for text with few
+            distinct values, 'datetime64[ns]', 'float64', 'float32' or 'int32'.
+        canonical (str): The name of the column in the database. Defaults to the name in the source.
+        nullable (bool): Whether the column may hold missing values.
+        parse_format (str): The format text values of a date column are parsed with.
+        length (int): The length of the VARCHAR a text column is stored in.
+
+    Returns:
+        dict: The declaration of the column.
+    """
+    return {
+        'name': name,
+        'canonical': canonical or name,
+        'dtype': dtype,
+        'nullable': nullable,
+        'parse_format': parse_format,
+        'length': length,
+    }
+
+# Columns of the association rules, as the rows of the apriori_results and fpgrowth_results tables.
+# Itemsets are the names of their products joined by commas, so they get a longer VARCHAR.
+RULE_FIELDS = [
+    field('antecedents', 'str', length=1000),
+    field('consequents', 'str', length=1000),
+    field('antecedent_support', 'float64'),
+    field('consequent_support', 'float64'),
+    field('support', 'float64'),
+    field('confidence', 'float64'),
+    field('lift', 'float64'),
+    field('leverage', 'float64'),
+    field('conviction', 'float64'),
+    field('zhangs_metric', 'float64'),
+]
+
+# Schema registry: one entry per source, listing every column with its canonical name, dtype,
+# nullable flag and parse format. It is the single declaration the extract stage types the staged
+# sheets with, the transform stage converts dtypes with and the load stage creates the staging tables from.
+# Nullable flags follow the main tables. 'Aramex & Cosmaline' is not a sheet but the concatenation
+# of both shipping sources, in the shape it is loaded in, and the rule sources are the association rules
+# generated by the models.
+SOURCE_SCHEMAS = {
+    'Website ECOM Data': {
+        'fields': [
+            field('Order Number', 'object', 'order_number', nullable=False),
+            field('Shipper Name', 'category', 'shipper_name', nullable=False),
+            field('Created At', 'datetime64[ns]', 'created_at', nullable=False, parse_format=ISO_DATE),
+            field('Delivered At', 'datetime64[ns]', 'delivered_at', parse_format=ISO_DATE),
+            field('Billing Type', 'category', 'billing_type', length=50),
+            field('Amount', 'float64', 'amount'),
+            field('Currency', 'category', 'currency', length=10),
+            field('Country', 'category', 'country', length=100),
+            field('AWB', 'object', 'AWB', length=100),
+        ],
+        'staging_table': 'temp_ecom_orders',
+        'indexes': [['order_number']],
+    },
+    'Shipped & Collected - Aramex': {
+        'fields': [
+            field('ShprNo', 'object'),
+            field('HAWB', 'object', 'AWB', nullable=False, length=100),
+            field('Delivery_Date', 'datetime64[ns]', nullable=False, parse_format=ISO_DATE),
+            field('CODAmount', 'float64', nullable=False),
+            field('CODCurrency', 'category', nullable=False, length=100),
+            field('O_CODAmount', 'float64', nullable=False),
+            field('Aramex_Inv_date', 'datetime64[ns]', parse_format=ISO_DATE),
+            field('TOKENNO', 'category', nullable=False),
+        ],
+    },
+    'Shipped & Collected - Cosmaline': {
+        'fields': [
+            field('Driver_Delivery_date', 'datetime64[ns]', 'Delivery_Date', nullable=False, parse_format=ISO_DATE),
+            field('OrderNo', 'object', 'order_number'),
+            field('Amount', 'float64', 'O_CODAmount', nullable=False),
+            field('Currency', 'category', 'CODCurrency', nullable=False, length=100),
+        ],
+    },
+    'Aramex & Cosmaline': {
+        'extracted': False,
+        'fields': [
+            field('ShprNo', 'object'),
+            field('AWB', 'str', nullable=False, length=100),
+            field('Delivery_Date', 'datetime64[ns]', nullable=False, parse_format=ISO_DATE),
+            field('CODAmount', 'float32', nullable=False),
+            field('CODCurrency', 'category', nullable=False, length=100),
+            field('O_CODAmount', 'float32', nullable=False),
+            field('Aramex_Inv_date', 'datetime64[ns]', parse_format=ISO_DATE),
+            field('TOKENNO', 'category', nullable=False),
+            field('order_number', 'object'),
+        ],
+        'staging_table': 'temp_shippedandcollected_aramex_cosmaline',
+        'indexes': [['AWB']],
+    },
+    'Collected - Credit Card': {
+        'fields': [
+            field('Value_date', 'datetime64[ns]', 'value_date', nullable=False, parse_format=ISO_DATE),
+            field('Narrative', 'str', 'narrative', nullable=False),
+            field('Amount', 'float32', 'amount', nullable=False),
+            field('Currency', 'str', 'currency', nullable=False, length=10),
+        ],
+        'staging_table': 'temp_credit_card',
+        'row_hash': True,
+    },
+    'ERP-Oracle Collection': {
+        'fields': [
+            field('RECEIPT_NUMBER', 'object', nullable=False),
+            field('CURRENCY_CODE', 'category', nullable=False, length=10),
+            field('EXCHANGE_RATE', 'float64', nullable=False),
+            field('RECEIPT_DATE', 'datetime64[ns]', nullable=False, parse_format=ISO_DATE),
+            field('CUSTOMER_NUMBER', 'object', nullable=False),
+            field('CUSTOMER_NAME', 'category', nullable=False),
+            field('RECEIPT_CLASS', 'category', nullable=False),
+            field('RECEIPT_AMOUNT', 'float64', nullable=False),
+            field('COMMENTS', 'object'),
+        ],
+        'staging_table': 'temp_erp_data',
+        'indexes': [['RECEIPT_NUMBER']],
+    },
+    'Oracle Data': {
+        'fields': [
+            field('OPERATING_UNIT_NAME', 'category', 'operating_unit_name', nullable=False),
+            field('ORACLE_REFERENCE_ORDER_NUMBER', 'int32', 'oracle_reference_order_number', nullable=False),
+            field('ECOM_REFERENCE_ORDER_NUMBER', 'object', 'ecom_reference_order_number', nullable=False),
+            field('ORDER_TYPE', 'category', 'order_type', nullable=False),
+            field('ORDER_TYPE_NAME', 'category', 'order_type_name', nullable=False),
+            field('ORDERED_ITEM', 'object', 'ordered_item', nullable=False),
+            field('ORDERED_QUANTITY', 'int32', 'ordered_quantity', nullable=False),
+            field('PRICING_QUANTITY_UOM', 'category', 'pricing_quantity_uom', nullable=False),
+            field('UNIT_SELLING_PRICE (after discount without vat)', 'float32', 'unit_selling_price', nullable=False),
+            field('UNIT_LIST_PRICE( original price before discount without vat)', 'float32', 'unit_list_price', nullable=False),
+            field('ORDERED_DATE', 'datetime64[ns]', 'ordered_date', nullable=False, parse_format=ISO_DATE),
+            field('CUSTOMER_NAME', 'category', 'customer_name', nullable=False),
+            field('TAX_CODE', 'category', 'tax_code', nullable=False),
+        ],
+        'staging_table': 'temp_oracle_data',
+        'row_hash': True,
+    },
+    'Daily Rate': {
+        'fields': [
+            field('Date', 'datetime64[ns]', 'date', nullable=False, parse_format=ISO_DATE),
+            field('Rate', 'float64', 'rate', nullable=False),
+        ],
+        'staging_table': 'temp_daily_rate',
+        'row_hash': True,
+    },
+    'Apriori Results': {
+        'extracted': False,
+        'fields': RULE_FIELDS,
+        'staging_table': 'apriori_temp_results',
+        'row_hash': True,
+    },
+    'FP-Growth Results': {
+        'extracted': False,
+        'fields': RULE_FIELDS,
+        'staging_table': 'fpgrowth_temp_results',
+        'row_hash': True,
+    },
+}
+
+# Categorical columns are staged as plain strings, since an Arrow IPC file holds a single dictionary
+# per column and the chunks of a sheet are written before all its values are known. They are
+# dictionary encoded when the staged file is read back.
+ARROW_TYPES = {
+    'object': pa.string(),
+    'str': pa.string(),
+    'category': pa.string(),
+    'datetime64[ns]': pa.timestamp('ns'),
+    'float64': pa.float64(),
+    'float32': pa.float32(),
+    'int32': pa.int32(),
+}
+
+def arrow_schema(source):
+    """
+    Builds the Arrow schema a source is staged with. The nullable flag, parse format and categorical
+    dtype of every column travel with the schema, so the extract stage types the values as it reads
+    them and the transform stage gets categorical columns back as pandas categoricals.
+
+    Parameters:
+        source (str): The source, as declared in SOURCE_SCHEMAS.
+
+    Returns:
+        pa.Schema: The schema of the staged source.
+    """
+    fields = []
+    for spec in SOURCE_SCHEMAS[source]['fields']:
+        metadata = {}
+        if spec['parse_format']:
+            metadata['parse_format'] = spec['parse_format']
+        if spec['dtype'] == 'category':
+            metadata['pandas_dtype'] = 'category'
+        fields.append(pa.field(spec['name'], ARROW_TYPES[spec['dtype']], nullable=spec['nullable'], metadata=metadata or None))
+    return pa.schema(fields)
+
+def canonical_names(source):
+    """
+    Gives the renaming from the names of a source to their canonical names.
+
+    Parameters:
+        source (str): The source, as declared in SOURCE_SCHEMAS.
+
+    Returns:
+        dict: Mapping of source name to canonical name, for the columns whose name changes.
+    """
+    return {spec['name']: spec['canonical'] for spec in SOURCE_SCHEMAS[source]['fields'] if spec['name'] != spec['canonical']}
+
+def sql_type(spec):
+    """
+    Gives the SQL type a declared column is stored with.
+    """
+    if spec['dtype'] in ('object', 'str', 'category'):
+        return String(spec['length'])
+    if spec['dtype'].startswith('datetime64'):
+        return DateTime()
+    if spec['dtype'].startswith('int'):
+        return Integer()
+    return Float()
+
+def staging_table_schema(source):
+    """
+    Builds the declaration of the staging table a source is loaded through, from its canonical columns.
+    Sources merged on the hash of their rows get a row_hash column, which is indexed as the merge key.
+
+    Parameters:
+        source (str): The source, as declared in SOURCE_SCHEMAS.
+
+    Returns:
+        dict: The columns, as (name, SQL type) pairs, and the indexed column lists of the table.
+    """
+    schema = SOURCE_SCHEMAS[source]
+    columns = [(spec['canonical'], sql_type(spec)) for spec in schema['fields']]
+    indexes = [list(index) for index in schema.get('indexes', [])]
+    if schema.get('row_hash'):
+        columns.append(('row_hash', String(32)))
+        indexes.append(['row_hash'])
+    return {'columns': columns, 'indexes': indexes}
+
+# Typed schema of every sheet staged by the extract stage.
+# Identifiers are kept as text because they are stored as VARCHAR in the database,
+# dates are real timestamps and amounts are floats, so the transform stage gets
+# the data back with its types instead of re-parsing text.
+SHEET_SCHEMAS = {
+    source: arrow_schema(source)
+    for source, schema in SOURCE_SCHEMAS.items()
+    if schema.get('extracted', True)
+}
+
+# Declared schema of every temporary table the load stage merges from.
+# Column types follow the main tables so the merge compares values of the same type,
+# and the merge keys are indexed. Tables without a primary key are merged on the hash of their row.
+# Staging columns stay nullable: rows breaking a NOT NULL constraint are rejected by the merge
+# instead of being silently coerced by LOAD DATA.
+STAGING_TABLE_SCHEMAS = {
+    schema['staging_table']: staging_table_schema(source)
+    for source, schema in SOURCE_SCHEMAS.items()
+    if 'staging_table' in schema
+}
+
+# Main tables merged on the hash of their rows, and those holding association rules
+ROW_HASH_TABLES = ['credit_card', 'oracle_data', 'daily_rate', 'apriori_results', 'fpgrowth_results']
+RULE_TABLES = ['apriori_results', 'fpgrowth_results']
+
+# Temporary tables the stored rows of a main table are rewritten through, joined to it on its id:
+# the row hashes computed for the rows stored without one, and the itemsets of the rules sorted into name order.
+STAGING_TABLE_SCHEMAS.update({
+    f"temp_{table}_row_hash": {'columns': [('id', Integer()), ('row_hash', String(32))], 'indexes': [['id']]}
+    for table in ROW_HASH_TABLES
+})
+STAGING_TABLE_SCHEMAS.update({
+    f"temp_{table}_sorted": {'columns': [('id', Integer()), ('antecedents', String(1000)), ('consequents', String(1000))], 'indexes': [['id']]}
+    for table in RULE_TABLES
+})
@@ -0,0 +1,261 @@
+"""
+Records how long every task of the DAG takes and how much data it moves, and summarizes the slowest stages.
+
+Every task wrapped with instrument appends one JSON line to the metrics file per call, holding its wall time,
+CPU time, the peak RSS reached while it runs, the rows and bytes of the files it reads and writes, and its status.
+
+Usage:
+    python scripts/stage_metrics.py [METRICS_FILE] [--top N] [--last-runs N] [--all]
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Add the scripts directory to the system path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from pipeline_steps import DATA_DIR
+
+# File the metrics of every task are appended to
+METRICS_FILE = os.environ.get('ETL_METRICS_FILE', os.path.join(DATA_DIR, 'stage_metrics.jsonl'))
+
+# Seconds between two samples of the resident set size of a running task
+RSS_SAMPLE_INTERVAL = 0.05
+
+# Columns of the summary, in the order they are printed
+SUMMARY_COLUMNS = ['stage', 'task', 'runs', 'median_wall_seconds', 'max_wall_seconds', 'median_cpu_seconds',
+                   'max_peak_rss_mb', 'median_rows_in', 'median_rows_out', 'rows_per_second', 'share_of_wall_time']
+
+
+def path_size(path):
+    """
+    Gives the size in bytes of a file, or of every file of a directory of parts. A missing path has no size.
+    """
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    return None
+
+def path_rows(path):
+    """
+    Gives the number of rows of a staged Arrow file or a Parquet file or directory, read from their metadata.
+    Other files, such as workbooks and CSV files, and missing paths have no row count.
+    """
+    if not os.path.exists(path):
+        return None
+    if path.endswith('.arrow'):
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    if path.endswith('.parquet'):
+        return ds.dataset(path, format='parquet').count_rows()
+    return None
+
+def measure_paths(paths):
+    """
+    Sums the rows and bytes of several files. A total is None as soon as one of the files has none.
+
+    Parameters:
+        paths (list): The paths of the files.
+
+    Returns:
+        tuple: The number of rows and the number of bytes.
+    """
+    rows, size = 0, 0
+    for path in paths:
+        path_row_count, path_byte_count = path_rows(path), path_size(path)
+        rows = None if rows is None or path_row_count is None else rows + path_row_count
+        size = None if size is None or path_byte_count is None else size + path_byte_count
+    return (rows, size) if paths else (None, None)
+
+def peak_rss_mb():
+    """
+    Gives the peak resident set size of the current process over its whole life, in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+def current_rss_mb():
+    """
+    Gives the current resident set size of the current process in megabytes, read from /proc on Linux.
+    Returns None where it cannot be read.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            resident_pages = int(file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+@contextlib.contextmanager
+def track_peak_rss(interval=RSS_SAMPLE_INTERVAL):
+    """
+    Tracks the peak resident set size of the current process while a task runs. The peak of getrusage is that
+    of the whole life of the process, which a reused worker carries over from its earlier tasks, so it is only
+    kept when the task raised it. Otherwise the peak is the highest current RSS sampled every interval seconds,
+    or the peak of the process where the current RSS cannot be read.
+
+    Parameters:
+        interval (float): The number of seconds between two samples.
+
+    Yields:
+        dict: Holds the peak in megabytes under 'peak_rss_mb' once the task is done.
+    """
+    memory = {}
+    samples = []
+    stop = threading.Event()
+
+    def sample():
+        while True:
+            rss = current_rss_mb()
+            if rss is not None:
+                samples.append(rss)
+            if stop.wait(interval):
+                return
+
+    start_peak = peak_rss_mb()
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield memory
+    finally:
+        stop.set()
+        sampler.join()
+        end_peak = peak_rss_mb()
+        memory['peak_rss_mb'] = end_peak if end_peak > start_peak or not samples else max(samples)
+
+def append_metrics(record, path):
+    """
+    Appends the metrics of a task to a JSON Lines file. Each record is written with a single call,
+    so tasks running in parallel processes never interleave their lines.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as file:
+        file.write(json.dumps(record, default=str) + '\n')
+
+def instrument(stage, metrics_file=None, inputs=(), outputs=()):
+    """
+    Decorates a task so every call appends its metrics to the metrics file. The task runs and raises
+    exactly as before; a failed or skipped call is recorded with its status and error.
+
+    The rows and bytes in and out are those of the input and output files, read from their metadata.
+    A task without output files, such as a load, gives its rows out by returning their count.
+
+    Parameters:
+        stage (str): The stage of the task, e.g. 'extract', 'transform', 'load' or 'reconciliation'.
+        metrics_file (str): The JSON Lines file the metrics are appended to. Defaults to METRICS_FILE.
+        inputs (list): The paths of the files the task reads.
+        outputs (list): The paths of the files the task writes.
+
+    Returns:
+        function: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            rows_in, bytes_in = measure_paths(inputs)
+            record = {
+                'run_id': os.environ.get('AIRFLOW_CTX_DAG_RUN_ID') or os.environ.get('ETL_RUN_ID'),
+                'stage': stage,
+                'task': function.__name__,
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'status': 'success',
+                'error': None,
+            }
+            start_time, start_cpu_time = time.perf_counter(), time.process_time()
+            result = None
+            try:
+                with track_peak_rss() as memory:
+                    result = function(*args, **kwargs)
+                return result
+            except Exception as error:
+                # Compared by name so the metrics do not depend on Airflow being installed
+                record['status'] = 'skipped' if type(error).__name__ == 'AirflowSkipException' else 'failed'
+                record['error'] = f"{type(error).__name__}: {error}"
+                raise
+            finally:
+                record['wall_seconds'] = round(time.perf_counter() - start_time, 4)
+                record['cpu_seconds'] = round(time.process_time() - start_cpu_time, 4)
+                record['peak_rss_mb'] = round(memory['peak_rss_mb'], 1)
+                rows_out, bytes_out = measure_paths(outputs) if record['status'] == 'success' else (None, None)
+                if rows_out is None and isinstance(result, int) and not isinstance(result, bool):
+                    rows_out = result
+                record.update(rows_in=rows_in, rows_out=rows_out, bytes_in=bytes_in, bytes_out=bytes_out)
+                append_metrics(record, metrics_file or METRICS_FILE)
+        return wrapper
+    return decorator
+
+def read_metrics(path):
+    """
+    Reads the metrics file into a DataFrame, one row per task call.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No metrics recorded in {path}")
+    df = pd.read_json(path, lines=True, dtype={'run_id': str})
+    df['started_at'] = pd.to_datetime(df['started_at'])
+    return df
+
+def summarize_metrics(df, top=10, last_runs=None, successful_only=True):
+    """
+    Ranks the tasks by their median wall time across runs.
+
+    Parameters:
+        df (pd.DataFrame): The metrics, as read by read_metrics.
+        top (int): The number of tasks to keep.
+        last_runs (int): Only consider the most recent runs. Defaults to all of them.
+        successful_only (bool): Whether failed and skipped calls are left out.
+
+    Returns:
+        pd.DataFrame: One row per task, slowest first.
+    """
+    if successful_only:
+        df = df[df['status'] == 'success']
+    if last_runs is not None:
+        run_starts = df.groupby('run_id', dropna=False)['started_at'].min().sort_values()
+        df = df[df['run_id'].isin(run_starts.index[-last_runs:])]
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    grouped = df.groupby(['stage', 'task'])
+    summary = pd.DataFrame({
+        'runs': grouped.size(),
+        'median_wall_seconds': grouped['wall_seconds'].median(),
+        'max_wall_seconds': grouped['wall_seconds'].max(),
+        'median_cpu_seconds': grouped['cpu_seconds'].median(),
+        'max_peak_rss_mb': grouped['peak_rss_mb'].max(),
+        'median_rows_in': grouped['rows_in'].median(),
+        'median_rows_out': grouped['rows_out'].median(),
+        'rows_per_second': grouped['rows_in'].sum(min_count=1) / grouped['wall_seconds'].sum(),
+        'share_of_wall_time': grouped['wall_seconds'].sum() / df['wall_seconds'].sum(),
+    }).reset_index()
+    summary = summary.sort_values('median_wall_seconds', ascending=False, ignore_index=True)
+    return summary[SUMMARY_COLUMNS].head(top)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarizes the slowest stages of the pipeline across runs.')
+    parser.add_argument('metrics_file', nargs='?', default=METRICS_FILE, help='JSON Lines file the task metrics are appended to.')
+    parser.add_argument('--top', type=int, default=10, help='Number of tasks to show.')
+    parser.add_argument('--last-runs', type=int, default=None, help='Only consider the most recent runs.')
+    parser.add_argument('--all', action='store_true', help='Include failed and skipped calls.')
+    args = parser.parse_args(argv)
+
+    summary = summarize_metrics(read_metrics(args.metrics_file), args.top, args.last_runs, not args.all)
+    with pd.option_context('display.max_columns', None, 'display.width', 200, 'display.float_format', '{:.2f}'.format):
+        print(summary.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
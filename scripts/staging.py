@@ -0,0 +1,208 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def _to_text(value):
+    """
+    Converts a single cell value to text, writing whole-number floats without a trailing '.0'.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def conform_to_schema(df, schema):
+    """
+    Converts a DataFrame into an Arrow table that follows the declared schema.
+    Values that cannot be converted to the declared type are stored as nulls and reported, including numbers
+    with a fraction or out of the range of an integer field.
+    Text dates are parsed with the 'parse_format' of their field metadata when it is declared,
+    and missing values in fields declared as not nullable are reported.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to convert.
+        schema (pa.Schema): The declared schema of the staged data.
+
+    Returns:
+        pa.Table: The typed table.
+    """
+    arrays = []
+    for field in schema:
+        if field.name not in df.columns:
+            print(f"Warning: {field.name} not in DataFrame")
+            arrays.append(pa.nulls(len(df), type=field.type))
+            continue
+
+        values = df[field.name]
+        if pa.types.is_timestamp(field.type):
+            parse_format = (field.metadata or {}).get(b'parse_format')
+            converted = pd.to_datetime(values, format=parse_format.decode() if parse_format else None, errors='coerce')
+        elif pa.types.is_integer(field.type):
+            converted = pd.to_numeric(values, errors='coerce')
+            limits = np.iinfo(field.type.to_pandas_dtype())
+            invalid = converted.notna() & ((converted % 1 != 0) | (converted < limits.min) | (converted > limits.max))
+            if invalid.any():
+                converted = converted.mask(invalid)
+        elif pa.types.is_floating(field.type):
+            converted = pd.to_numeric(values, errors='coerce')
+        elif pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+            converted = values
+        else:
+            converted = values.map(_to_text, na_action='ignore')
+
+        lost = converted.isna() & values.notna()
+        if lost.any():
+            print(f"Conversion error: Could not convert {lost.sum()} values of {field.name} to {field.type}")
+        array = pa.array(converted, type=field.type, from_pandas=True)
+        if not field.nullable and array.null_count:
+            print(f"Warning: {array.null_count} missing values in non-nullable column {field.name}")
+        arrays.append(array)
+
+    extra_columns = [column for column in df.columns if column not in schema.names]
+    if extra_columns:
+        print(f"Warning: {extra_columns} not in the declared schema and were not staged")
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def write_staged_chunks(chunks, path, schema=None):
+    """
+    Writes an iterator of DataFrame chunks to a single Arrow IPC file, one record batch group per chunk.
+
+    Parameters:
+        chunks (iterable): The DataFrame chunks to write.
+        path (str): The path of the staged file.
+        schema (pa.Schema): The declared schema. If None, it is inferred from the first chunk.
+
+    Returns:
+        int: The number of rows written.
+    """
+    writer = None
+    row_count = 0
+    try:
+        for chunk in chunks:
+            if schema is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            table = conform_to_schema(chunk, schema)
+            if writer is None:
+                writer = pa.ipc.new_file(path, schema)
+            writer.write_table(table)
+            row_count += table.num_rows
+        if writer is None and schema is not None:
+            writer = pa.ipc.new_file(path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return row_count
+
+def write_staged_data(df, path, schema=None):
+    """
+    Writes a DataFrame to an Arrow IPC file.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The path of the staged file.
+        schema (pa.Schema): The declared schema. If None, it is inferred from the DataFrame.
+
+    Returns:
+        int: The number of rows written.
+    """
+    return write_staged_chunks([df], path, schema)
+
+def read_staged_data(path, columns=None):
+    """
+    Reads a staged Arrow IPC file back into a DataFrame through a memory map, keeping the declared types.
+    Columns declared as categorical are dictionary encoded in Arrow, so they reach pandas as categoricals
+    without every row being materialized as a Python string first.
+
+    Parameters:
+        path (str): The path of the staged file.
+        columns (list): Optional subset of columns to read.
+
+    Returns:
+        pd.DataFrame: The staged data.
+    """
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return _to_pandas(table)
+
+def iter_staged_batches(path, columns=None):
+    """
+    Reads a staged Arrow IPC file back one record batch at a time, i.e. in the chunks it was extracted in,
+    so a source larger than memory can be transformed chunk by chunk.
+
+    Parameters:
+        path (str): The path of the staged file.
+        columns (list): Optional subset of columns to read.
+
+    Yields:
+        pd.DataFrame: The next chunk of the staged data. A file without rows yields one empty DataFrame.
+    """
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        if reader.num_record_batches == 0:
+            tables = [reader.schema.empty_table()]
+        else:
+            tables = (pa.Table.from_batches([reader.get_batch(index)]) for index in range(reader.num_record_batches))
+        for table in tables:
+            if columns is not None:
+                table = table.select(columns)
+            yield _to_pandas(table)
+
+def _to_pandas(table):
+    """
+    Converts a staged table to a DataFrame, dictionary encoding the columns declared as categorical first.
+    """
+    for index, field in enumerate(table.schema):
+        if (field.metadata or {}).get(b'pandas_dtype') == b'category':
+            encoded = table.column(index).dictionary_encode()
+            table = table.set_column(index, field.with_type(encoded.type), encoded)
+    return table.to_pandas()
+
+def _parquet_parts_schema(df):
+    """
+    Derives the Arrow schema every part of a partitioned Parquet output is written with from its first chunk.
+    Categorical columns get 32-bit dictionary indices whatever their number of categories, and columns
+    without a single value in the first chunk are stored as text.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for index, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(index, field.with_type(pa.string()))
+        elif pa.types.is_dictionary(field.type):
+            value_type = pa.string() if pa.types.is_null(field.type.value_type) else field.type.value_type
+            schema = schema.set(index, field.with_type(pa.dictionary(pa.int32(), value_type)))
+    return schema
+
+def write_parquet_parts(chunks, path):
+    """
+    Writes an iterator of DataFrame chunks as a partitioned Parquet output: a directory holding one part file
+    per chunk, which pd.read_parquet reads back as a single DataFrame. Whatever was at the path before is replaced.
+    Every part follows the schema of the first chunk so the parts can be read together.
+
+    Parameters:
+        chunks (iterable): The DataFrame chunks to write.
+        path (str): The path of the output directory.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    os.makedirs(path)
+
+    schema = None
+    row_count = 0
+    for number, chunk in enumerate(chunks):
+        if schema is None:
+            schema = _parquet_parts_schema(chunk)
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pq.write_table(table, os.path.join(path, f"part-{number:05d}.parquet"))
+        row_count += table.num_rows
+    return row_count
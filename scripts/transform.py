@@ -2,6 +2,31 @@ import pandas as pd
 import numpy as np
 import ast
 import re
+import hashlib
+import numbers
+from schemas import SOURCE_SCHEMAS, canonical_names
+from key_index import lookup_keys
+
+def normalize_text(values, normalize):
+    """
+    Applies a string normalization to a column. The categories of a categorical column are normalized
+    once instead of every row, and categories that become equal are merged.
+
+    Parameters:
+        values (pd.Series): The column to normalize.
+        normalize (function): The normalization, taking and returning a Series of strings.
+
+    Returns:
+        pd.Series: The normalized column, still categorical if it was.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return normalize(values)
+
+    normalized = normalize(values.cat.categories.to_series())
+    category_codes, categories = pd.factorize(normalized, sort=True)
+    codes = values.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, category_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=values.index, name=values.name)
 
 def lower_columns(dataframe, columns):
     """
@@ -16,7 +41,7 @@ def lower_columns(dataframe, columns):
     """
     for column in columns:
         if column in dataframe.columns:
-            dataframe[column] = dataframe[column].str.strip().str.lower().str.capitalize()
+            dataframe[column] = normalize_text(dataframe[column], lambda values: values.str.strip().str.lower().str.capitalize())
         else:
             print(f"Warning: {column} does not exist in the DataFrame.")
     return dataframe
@@ -34,7 +59,7 @@ def uppercase_columns(dataframe, columns):
     """
     for column in columns:
         if column in dataframe.columns:
-            dataframe[column] = dataframe[column].str.strip().str.upper()
+            dataframe[column] = normalize_text(dataframe[column], lambda values: values.str.strip().str.upper())
         else:
             print(f"Warning: {column} does not exist in the DataFrame.")
     return dataframe
@@ -65,9 +90,68 @@ def remove_duplicates(df):
     """
     return df.drop_duplicates()
 
+def remove_duplicates_across_chunks(df, seen_rows):
+    """
+    Removes duplicate rows from a chunk of a DataFrame processed chunk by chunk, keeping the first occurrence
+    over all the chunks. Rows are compared through a 64-bit hash of their values, so only the hashes of the
+    rows kept so far are held between chunks rather than the rows themselves.
+
+    Parameters:
+        df (pd.DataFrame): The chunk from which to remove duplicates.
+        seen_rows (set): The hashes of the rows kept from the previous chunks; updated with those of this chunk.
+
+    Returns:
+        pd.DataFrame: The chunk without the rows already seen, in this chunk or a previous one.
+    """
+    keys = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    unseen = np.fromiter((key not in seen_rows for key in keys.tolist()), dtype=bool, count=len(keys))
+    keep = unseen & ~pd.Index(keys).duplicated()
+    seen_rows.update(keys[keep].tolist())
+    return df[keep]
+
+def convert_data_types(df, source, canonical=False):
+    """
+    Converts the columns of the DataFrame to the dtypes declared for a source in SOURCE_SCHEMAS, in a single pass.
+    Columns already holding their declared dtype, as they do when read back from the typed staged files,
+    are left untouched, so no column is copied needlessly. Text dates are parsed with the declared format.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
+        source (str): The source the DataFrame comes from, as declared in SOURCE_SCHEMAS.
+        canonical (bool): Whether the columns already carry their canonical names instead of their source names.
+
+    Returns:
+        pd.DataFrame: The DataFrame with converted data types.
+    """
+    for spec in SOURCE_SCHEMAS[source]['fields']:
+        column = spec['canonical'] if canonical else spec['name']
+        dtype = spec['dtype']
+        if column not in df.columns:
+            print(f"Warning: {column} not in DataFrame")
+            continue
+
+        values = df[column]
+        try:
+            if dtype == 'str':
+                # Text columns hold only strings; missing values are written out as text like astype(str) does
+                if pd.api.types.infer_dtype(values, skipna=False) != 'string':
+                    df[column] = values.astype(str)
+            elif values.dtype == dtype:
+                continue
+            elif dtype == 'category':
+                df[column] = values.astype('category')
+            elif dtype.startswith('datetime64'):
+                df[column] = pd.to_datetime(values, format=spec['parse_format'])
+            else:
+                df[column] = values.astype(dtype)
+        except (ValueError, TypeError):
+            print(f"Conversion error: Could not convert {column} to {dtype}")
+
+    return df
+
 def convert_data_types_ECOM_Data(df):
     """
-    Converts the data types of specified columns in the DataFrame.
+    Converts the data types of the columns of the ECOM DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -75,34 +159,11 @@ def convert_data_types_ECOM_Data(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    # Define a dictionary mapping column names to desired data types
-    dtype_dict = {
-        'Order Number': 'object',
-        'Shipper Name': 'object',
-        'Created At': 'datetime64[ns]',
-        'Delivered At': 'datetime64[ns]',
-        'Billing Type': 'object',
-        'Amount': 'float64',
-        'Currency': 'object',
-        'Country': 'object',
-        'AWB': 'object'
-    }
-    
-    # Convert data types according to the dictionary
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Website ECOM Data')
 
 def convert_data_types_Aramex_Data(df):
     """
-    Converts the data types of specified columns in the DataFrame.
+    Converts the data types of the columns of the Aramex DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -110,32 +171,11 @@ def convert_data_types_Aramex_Data(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    # Define a dictionary mapping column names to desired data types
-    dtype_dict = {
-        'ShprNo': 'object',
-        'HAWB': 'object',
-        'Delivery_Date': 'datetime64[ns]',
-        'CODAmount': 'float64',
-        'O_CODAmount': 'float64',
-        'Aramex_Inv_date': 'datetime64[ns]',
-        'TOKENNO': 'object'
-    }
-    
-    # Convert data types according to the dictionary
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Shipped & Collected - Aramex')
 
 def convert_data_types_Cosmaline_Data(df):
     """
-    Converts the data types of specified columns in the DataFrame.
+    Converts the data types of the columns of the Cosmaline DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -143,29 +183,11 @@ def convert_data_types_Cosmaline_Data(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    # Define a dictionary mapping column names to desired data types
-    dtype_dict = {
-        'Currency': 'object',
-        'Driver_Delivery_date': 'datetime64[ns]',
-        'Amount': 'float64',
-        'OrderNo': 'object'
-    }
-    
-    # Convert data types according to the dictionary
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Shipped & Collected - Cosmaline')
 
 def convert_data_types_Credit_Card(df):
     """
-    Converts the data types of specified columns in the Credit Card DataFrame.
+    Converts the data types of the columns of the Credit Card DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -173,25 +195,7 @@ def convert_data_types_Credit_Card(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    # Define a dictionary mapping column names to desired data types
-    dtype_dict = {
-        'Value_date': 'datetime64[ns]',
-        'Narrative': 'str',
-        'Amount': 'float32',
-        'Currency': 'str'
-    }
-    
-    # Convert data types according to the dictionary
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Collected - Credit Card')
 
 def clean_tokens_by_date_Aramex_Data(df, date_column, token_column):
     """
@@ -205,13 +209,92 @@ def clean_tokens_by_date_Aramex_Data(df, date_column, token_column):
     Returns:
         pd.DataFrame: The DataFrame with tokens cleaned.
     """
-    def replace_with_mode(group):
-        mode_token = group[token_column].mode()[0]  # Calculate the mode token for the group
-        group[token_column] = mode_token  # Replace all tokens in the group with the mode token
-        return group
+    # Number the dates and the tokens in sorted order; missing values get -1
+    token_values = df[token_column]
+    if isinstance(token_values.dtype, pd.CategoricalDtype):
+        # Order categorical tokens by value rather than by the order of their categories
+        token_values = token_values.cat.reorder_categories(sorted(token_values.cat.categories))
+    date_codes, dates = pd.factorize(df[date_column], sort=True)
+    token_codes, tokens = pd.factorize(token_values, sort=True)
+
+    # Count every (date, token) pair in one pass. The pairs come out ordered by date and token,
+    # so taking the first pair with the highest count gives ties to the smallest token like Series.mode()
+    valid = (date_codes >= 0) & (token_codes >= 0)
+    pairs, counts = np.unique(date_codes[valid].astype(np.int64) * len(tokens) + token_codes[valid], return_counts=True)
+    pair_dates, pair_tokens = np.divmod(pairs, max(len(tokens), 1))
+    ranked = np.lexsort((pair_tokens, -counts, pair_dates))
+    first = ranked[np.r_[True, pair_dates[ranked][1:] != pair_dates[ranked][:-1]]] if len(ranked) else ranked
+    mode_codes = np.full(len(dates), -1, dtype=np.int64)
+    mode_codes[pair_dates[first]] = pair_tokens[first]
+
+    # Put the rows in date order, keeping their order within a date, and drop the rows without a date
+    # (stable sorts of 16-bit integers use a radix sort)
+    sort_codes = date_codes.astype(np.int16) if len(dates) < np.iinfo(np.int16).max else date_codes
+    order = np.argsort(sort_codes, kind='stable')
+    order = order[date_codes[order] >= 0]
+    df = df.take(order)
+    df.index = pd.RangeIndex(len(df))
+
+    # Broadcast the mode token of each date back to its rows
+    df[token_column] = pd.api.extensions.take(tokens, mode_codes[date_codes[order]], allow_fill=True)
+    return df
+
+def count_tokens_by_date(df, date_column, token_column, counts=None):
+    """
+    First phase of clean_tokens_by_date_Aramex_Data for data processed chunk by chunk:
+    counts how often each token appears on each date, adding to the counts of the previous chunks.
+
+    Parameters:
+        df (pd.DataFrame): The chunk containing the data.
+        date_column (str): The name of the column containing the dates.
+        token_column (str): The name of the column containing the tokens.
+        counts (pd.Series): The counts of the previous chunks, indexed by date and token. None for the first chunk.
 
-    # Group by the date column and apply the replacement function to each group
-    df = df.groupby(date_column).apply(replace_with_mode).reset_index(drop=True)
+    Returns:
+        pd.Series: The number of rows of every (date, token) pair seen so far.
+    """
+    pairs = pd.DataFrame({'date': df[date_column], 'token': df[token_column].astype(object)}).dropna()
+    chunk_counts = pairs.value_counts()
+    return chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+
+def mode_tokens_by_date(counts):
+    """
+    Picks the mode token of every date from the counts gathered by count_tokens_by_date.
+    Ties go to the smallest token, like Series.mode().
+
+    Parameters:
+        counts (pd.Series): The number of rows of every (date, token) pair. None when no rows were counted.
+
+    Returns:
+        pd.Series: The mode token, indexed by date.
+    """
+    if counts is None or counts.empty:
+        return pd.Series(dtype=object)
+    ranked = counts.rename('count').reset_index().sort_values(['date', 'count', 'token'], ascending=[True, False, True])
+    return ranked.drop_duplicates('date').set_index('date')['token']
+
+def apply_tokens_by_date(df, date_column, token_column, modes):
+    """
+    Second phase of clean_tokens_by_date_Aramex_Data for data processed chunk by chunk:
+    gives every row of the chunk the mode token of its date. Like the single-pass version, rows without
+    a date are dropped and the rows are put in date order, here within the chunk.
+
+    Parameters:
+        df (pd.DataFrame): The chunk containing the data.
+        date_column (str): The name of the column containing the dates.
+        token_column (str): The name of the column containing the tokens.
+        modes (pd.Series): The mode token of every date, from mode_tokens_by_date.
+
+    Returns:
+        pd.DataFrame: The chunk with tokens cleaned.
+    """
+    categorical = isinstance(df[token_column].dtype, pd.CategoricalDtype)
+    df = df[df[date_column].notna()]
+    df = df.take(np.argsort(df[date_column].to_numpy(), kind='stable'))
+    df.index = pd.RangeIndex(len(df))
+    df[token_column] = df[date_column].map(modes)
+    if categorical:
+        df[token_column] = df[token_column].astype('category')
     return df
 
 
@@ -226,6 +309,8 @@ def update_cod_currency_Aramex_data(df):
     Returns:
         pd.DataFrame: The DataFrame with updated CODCurrency column.
     """
+    if isinstance(df['CODCurrency'].dtype, pd.CategoricalDtype) and 'LBP' not in df['CODCurrency'].cat.categories:
+        df['CODCurrency'] = df['CODCurrency'].cat.add_categories('LBP')
     df.loc[df['CODAmount'] > 0, 'CODCurrency'] = 'LBP'
     return df
 
@@ -240,18 +325,8 @@ def rename_columns_for_website_ecom_data(df):
     Returns:
         pd.DataFrame: The DataFrame with renamed columns.
     """
-    # Encapsulated dictionary specific to the Website_ECOM_Data schema
-    column_rename_dict = {
-        'Order Number': 'order_number',
-        'Shipper Name': 'shipper_name',
-        'Created At': 'created_at',
-        'Delivered At': 'delivered_at',
-        'Billing Type': 'billing_type',
-        'Amount': 'amount',
-        'Currency': 'currency',
-        'Country': 'country',
-        'AWB': 'AWB'
-    }
+    # The canonical names are declared in the schema registry
+    column_rename_dict = canonical_names('Website ECOM Data')
 
     return df.rename(columns=column_rename_dict, inplace=False)
 
@@ -266,13 +341,8 @@ def rename_columns_for_Cosmaline_data(df):
     Returns:
         pd.DataFrame: The DataFrame with renamed columns.
     """
-    # Encapsulated dictionary specific to the Website_ECOM_Data schema
-    column_rename_dict = {
-        'Driver_Delivery_date': 'Delivery_Date',
-        'OrderNo': 'order_number',
-        'Amount': 'O_CODAmount',
-        'Currency': 'CODCurrency'
-    }
+    # The canonical names are declared in the schema registry
+    column_rename_dict = canonical_names('Shipped & Collected - Cosmaline')
 
     return df.rename(columns=column_rename_dict, inplace=False)
 
@@ -289,10 +359,7 @@ def add_cod_amount_column_Cosmaline_data(df):
     Returns:
         pd.DataFrame: The DataFrame with the new 'CODAmount' column added.
     """
-    df['CODAmount'] = df.apply(
-        lambda row: 0 if row['CODCurrency'] == 'USD' else row['O_CODAmount'],
-        axis=1
-    )
+    df['CODAmount'] = df['O_CODAmount'].where(df['CODCurrency'] != 'USD', 0)
     return df
 
 def add_new_columns_Cosmaline_Data(df):
@@ -325,10 +392,8 @@ def rename_columns_for_website_Aramex_data(df):
     Returns:
         pd.DataFrame: The DataFrame with renamed columns.
     """
-    # Encapsulated dictionary specific to the Website_ECOM_Data schema
-    column_rename_dict = {
-        'HAWB': 'AWB',
-    }
+    # The canonical names are declared in the schema registry
+    column_rename_dict = canonical_names('Shipped & Collected - Aramex')
 
     return df.rename(columns=column_rename_dict, inplace=False)
 
@@ -344,54 +409,108 @@ def rename_columns_to_lowercase(df):
     """
     return df.rename(columns=str.lower, inplace=False)
 
+# Version of the normalization of the row hash, bumped whenever it changes so the stored hashes are recomputed
+ROW_HASH_VERSION = 2
+
+def _format_number_for_hash(value):
+    """
+    Formats a number the same way whether it comes from a DataFrame or back from a FLOAT or INT database column.
+    Integers are written whole. Other numbers are written as the shortest text giving back their single-precision
+    value, the precision of a FLOAT column, so two numbers hash alike exactly when the column stores them alike.
+    """
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = np.float32(value)
+    if value.is_integer():
+        return str(int(value))
+    return np.format_float_positional(value, unique=True, trim='-')
+
+def _format_value_for_hash(value):
+    """
+    Formats a single value of a mixed-type column for the row hash.
+    """
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, numbers.Number):
+        return _format_number_for_hash(value)
+    if isinstance(value, pd.Timestamp) or hasattr(value, 'strftime'):
+        return pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+def add_row_hash(df, columns, hash_column='row_hash'):
+    """
+    Adds a column holding a stable MD5 hash of the given columns, used as the merge key of tables without a primary key.
+    Values are normalized before hashing so a row gives the same hash when it is read back from the database:
+    dates without fractional seconds, numbers at the single precision of a FLOAT column and missing values as \\N.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to process.
+        columns (list): List of column names identifying a row.
+        hash_column (str): The name of the hash column to add.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the hash column added.
+    """
+    fields = []
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif pd.api.types.is_bool_dtype(values):
+            text = values.astype(int).astype(str)
+        elif pd.api.types.is_integer_dtype(values):
+            text = values.astype(str)
+        elif pd.api.types.is_float_dtype(values):
+            text = values.map(_format_number_for_hash, na_action='ignore')
+        else:
+            text = values.map(_format_value_for_hash, na_action='ignore')
+        fields.append(text.astype(object).where(values.notna(), '\\N'))
+
+    keys = fields[0].str.cat(fields[1:], sep='\x1f') if len(fields) > 1 else fields[0]
+    df = df.copy()
+    df[hash_column] = [hashlib.md5(key.encode('utf-8')).hexdigest() for key in keys]
+    return df
+
 def add_order_number_Aramex_Data(df, ECOM_df):
     """
     Adds the order_number column from Website_ECOM_Data to ShippedandCollected_Aramex
-    based on matching AWB values.
+    based on matching AWB values. The AWB values are probed in a hash lookup of the ECOM keys,
+    so only the two key columns of the ECOM data are needed.
 
     Parameters:
-        ShippedandCollected_Aramex (pd.DataFrame): DataFrame containing shipment and collection data.
-        Website_ECOM_Data (pd.DataFrame): DataFrame containing e-commerce data with order numbers.
+        df (pd.DataFrame): DataFrame containing shipment and collection data.
+        ECOM_df (pd.DataFrame): The ECOM key index, or any DataFrame with the AWB and order_number of the orders.
 
     Returns:
         pd.DataFrame: Updated DataFrame with the order_number column added.
     """
     # Ensure AWB columns in both DataFrames have the same type
     df['AWB'] = df['AWB'].astype(str)
-    ECOM_df['AWB'] = ECOM_df['AWB'].astype(str)
+    ECOM_keys = ECOM_df[['AWB', 'order_number']].assign(AWB=ECOM_df['AWB'].map(str, na_action='ignore'))
     
-    # Merge DataFrames on the 'AWB' column, only adding the 'order_number' column to ShippedandCollected_Aramex
-    updated_df = pd.merge(
-        df, 
-        ECOM_df[['AWB', 'order_number']], 
-        on='AWB', 
-        how='left'
-    )
-    return updated_df
+    df['order_number'] = lookup_keys(df['AWB'], ECOM_keys, 'AWB', 'order_number')
+    return df.reset_index(drop=True)
 
 
 def add_AWB_Cosmaline_Data(df, ECOM_df):
     """
-    Merges df2 into df1 on the 'order_number' column, including only the 'AWB' column from df2.
+    Adds the AWB column from Website_ECOM_Data to the Cosmaline data based on matching order_number values,
+    probing a hash lookup of the ECOM keys.
 
     Parameters:
-        df1 (pd.DataFrame): The DataFrame to be merged into.
-        df2 (pd.DataFrame): The DataFrame containing 'order_number' and 'AWB' columns.
+        df (pd.DataFrame): The DataFrame the AWB is added to.
+        ECOM_df (pd.DataFrame): The ECOM key index, or any DataFrame with the order_number and AWB of the orders.
 
     Returns:
-        pd.DataFrame: The resulting DataFrame after the merge.
+        pd.DataFrame: The DataFrame with the AWB column added.
     """
-    updated_df = pd.merge(
-        df, 
-        ECOM_df[['order_number', 'AWB']], 
-        on='order_number', 
-        how='left'
-    )
-    return updated_df
+    df['AWB'] = lookup_keys(df['order_number'], ECOM_df, 'order_number', 'AWB')
+    return df.reset_index(drop=True)
 
 def concatenate_Aramex_Cosmaline(df1, df2):
     """
     Concatenates two DataFrames vertically and resets the index.
+    Categorical columns are given the union of their categories first, so they stay categorical.
 
     Parameters:
         df1 (pd.DataFrame): The first DataFrame.
@@ -400,12 +519,17 @@ def concatenate_Aramex_Cosmaline(df1, df2):
     Returns:
         pd.DataFrame: The concatenated DataFrame with reset index.
     """
+    for column in df1.columns.intersection(df2.columns):
+        if isinstance(df1[column].dtype, pd.CategoricalDtype) and isinstance(df2[column].dtype, pd.CategoricalDtype):
+            categories = df1[column].cat.categories.union(df2[column].cat.categories)
+            df1[column] = df1[column].cat.set_categories(categories)
+            df2[column] = df2[column].cat.set_categories(categories)
     concatenated_df = pd.concat([df1, df2], ignore_index=True)
     return concatenated_df
     
 def convert_data_types_ERP_Data(df):
     """
-    Converts the data types of specified columns in the DataFrame.
+    Converts the data types of the columns of the ERP DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -413,26 +537,11 @@ def convert_data_types_ERP_Data(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    # Define a dictionary mapping column names to desired data types
-    dtype_dict = {
-        'CUSTOMER_NUMBER': 'object'
-    }
-    
-    # Convert data types according to the dictionary
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'ERP-Oracle Collection')
 
 def convert_data_types_Oracle_Data(df):
     """
-    Converts the data types of specified columns in the Oracle Data DataFrame.
+    Converts the data types of the columns of the Oracle Data DataFrame to those declared in SOURCE_SCHEMAS.
     
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
@@ -440,32 +549,7 @@ def convert_data_types_Oracle_Data(df):
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    dtype_dict = {
-        'operating_unit_name': 'object',
-        'oracle_reference_order_number': 'int32',
-        'ecom_reference_order_number': 'object',
-        'order_type': 'object',
-        'order_type_name': 'object',
-        'ordered_item': 'object',
-        'ordered_quantity': 'int32',
-        'pricing_quantity_uom': 'object',
-        'unit_selling_price': 'float32',
-        'unit_list_price': 'float32',
-        'ordered_date': 'datetime64[ns]',
-        'customer_name': 'object',
-        'tax_code': 'object'
-    }
-    
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Oracle Data', canonical=True)
 
 
 def extract_token_ERP_Data(df, column_name):
@@ -524,57 +608,22 @@ def rename_columns_for_Oracle_data(df):
     Returns:
         pd.DataFrame: The DataFrame with renamed columns.
     """
-    # Encapsulated dictionary specific to the Website_ECOM_Data schema
-    column_rename_dict = {
-    'OPERATING_UNIT_NAME': 'operating_unit_name',
-    'ORACLE_REFERENCE_ORDER_NUMBER': 'oracle_reference_order_number',
-    'ECOM_REFERENCE_ORDER_NUMBER': 'ecom_reference_order_number',
-    'ORDER_TYPE': 'order_type',
-    'ORDER_TYPE_NAME': 'order_type_name',
-    'ORDERED_ITEM': 'ordered_item',
-    'ORDERED_QUANTITY': 'ordered_quantity',
-    'PRICING_QUANTITY_UOM': 'pricing_quantity_uom',
-    'UNIT_SELLING_PRICE (after discount without vat)': 'unit_selling_price',
-    'UNIT_LIST_PRICE( original price before discount without vat)': 'unit_list_price',
-    'ORDERED_DATE': 'ordered_date',
-    'CUSTOMER_NAME': 'customer_name',
-    'TAX_CODE': 'tax_code'
-}
+    # The canonical names are declared in the schema registry
+    column_rename_dict = canonical_names('Oracle Data')
 
     return df.rename(columns=column_rename_dict, inplace=False)
 
 def convert_data_types_aramex_cosmaline(df):
     """
-    Converts the data types of specified columns in the Aramex DataFrame to match the database schema.
-
+    Converts the data types of the columns of the concatenated Aramex and Cosmaline DataFrame to those declared in SOURCE_SCHEMAS.
+    
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns will have their data types converted.
         
     Returns:
         pd.DataFrame: The DataFrame with converted data types.
     """
-    dtype_dict = {
-        'AWB': 'str',  # Will be converted to varchar(100) in the database
-        'ShprNo': 'object',  # Will be converted to varchar(255) in the database
-        'Delivery_Date': 'datetime64[ns]',  # Will be converted to datetime in the database
-        'CODAmount': 'float32',  # Will be converted to float in the database
-        'CODCurrency': 'object',  # Will be converted to varchar(100) in the database
-        'O_CODAmount': 'float32',  # Will be converted to float in the database
-        'Aramex_Inv_date': 'datetime64[ns]',  # Will be converted to datetime in the database
-        'TOKENNO': 'object',  # Will be converted to varchar(255) in the database
-        'order_number': 'object'  # Will be converted to varchar(255) in the database
-    }
-    
-    for column, dtype in dtype_dict.items():
-        if column in df.columns:
-            try:
-                df[column] = df[column].astype(dtype)
-            except ValueError:
-                print(f"Conversion error: Could not convert {column} to {dtype}")
-        else:
-            print(f"Warning: {column} not in DataFrame")
-    
-    return df
+    return convert_data_types(df, 'Aramex & Cosmaline')
 
 #for model-------------------------------------------------------------------------------------------------
 
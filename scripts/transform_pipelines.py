@@ -5,10 +5,14 @@ from transform import (lower_columns,
                        uppercase_columns, 
                        remove_missing_values, 
                        remove_duplicates, 
+                       remove_duplicates_across_chunks, 
                        convert_data_types_ECOM_Data, 
                        convert_data_types_Aramex_Data, 
                        convert_data_types_Cosmaline_Data, 
                        clean_tokens_by_date_Aramex_Data, 
+                       count_tokens_by_date, 
+                       mode_tokens_by_date, 
+                       apply_tokens_by_date, 
                        update_cod_currency_Aramex_data, 
                        rename_columns_for_website_ecom_data, 
                        rename_columns_for_Cosmaline_data, 
@@ -28,12 +32,13 @@ from transform import (lower_columns,
                        convert_data_types_aramex_cosmaline)
 
 
-def data_preprocessing_pipeline_ECOM_Data(df):
+def data_preprocessing_pipeline_ECOM_Data(df, seen_rows=None):
     """
     Process a DataFrame through a series of cleaning and normalization steps.
 
     Parameters:
         df (pd.DataFrame): The DataFrame to be processed.
+        seen_rows (set): When the data is processed in chunks, the hashes of the rows kept from the previous chunks.
         
     Returns:
         pd.DataFrame: The processed DataFrame.
@@ -51,19 +56,24 @@ def data_preprocessing_pipeline_ECOM_Data(df):
     df = remove_missing_values(df)
     
     # Remove duplicate rows, keeping the first occurrence
-    df = remove_duplicates(df)
+    if seen_rows is None:
+        df = remove_duplicates(df)
+    else:
+        df = remove_duplicates_across_chunks(df, seen_rows)
     
     # Change Column Names
     df = rename_columns_for_website_ecom_data(df)
     
     return df
 
-def data_preprocessing_pipeline_Aramex_Data(df, ECOM_df):
+def data_preprocessing_pipeline_Aramex_Data(df, ECOM_df, token_modes=None):
     """
     Process a DataFrame through a series of cleaning and normalization steps.
 
     Parameters:
         df (pd.DataFrame): The DataFrame to be processed.
+        ECOM_df (pd.DataFrame): The ECOM key index the order numbers are looked up in.
+        token_modes (pd.Series): When the data is processed in chunks, the mode token of every date over all the chunks.
         
     Returns:
         pd.DataFrame: The processed DataFrame.
@@ -84,7 +94,10 @@ def data_preprocessing_pipeline_Aramex_Data(df, ECOM_df):
     df = update_cod_currency_Aramex_data(df)
     
     # Cleaning the TOKEN column to have the same TOken per day
-    df = clean_tokens_by_date_Aramex_Data(df, 'Aramex_Inv_date', 'TOKENNO')
+    if token_modes is None:
+        df = clean_tokens_by_date_Aramex_Data(df, 'Aramex_Inv_date', 'TOKENNO')
+    else:
+        df = apply_tokens_by_date(df, 'Aramex_Inv_date', 'TOKENNO', token_modes)
     
     # Adding the order_number column from the ECOm data
     df = add_order_number_Aramex_Data(df, ECOM_df)
@@ -102,6 +115,7 @@ def data_preprocessing_pipeline_Cosmaline_Data(df, ECOM_df):
 
     Parameters:
         df (pd.DataFrame): The DataFrame to be processed.
+        ECOM_df (pd.DataFrame): The ECOM key index the AWBs are looked up in.
         
     Returns:
         pd.DataFrame: The processed DataFrame.
@@ -214,4 +228,65 @@ def data_preprocessing_pipeline_Oracle_Data(df):
     df = convert_data_types_Oracle_Data(df)
     
     
-    return df
\ No newline at end of file
+    return df
+
+
+# Chunked execution: every pipeline below takes an iterator of chunks, e.g. the record batches of a staged file,
+# and yields the transformed chunks, so peak memory is bounded by the chunk size rather than by the source.
+
+def data_preprocessing_pipeline_ECOM_Data_in_chunks(chunks):
+    """
+    Runs the ECOM pipeline chunk by chunk. Duplicate rows are removed over all the chunks
+    by keeping the hashes of the rows already seen.
+
+    Parameters:
+        chunks (iterable): The DataFrame chunks to be processed.
+
+    Yields:
+        pd.DataFrame: The next processed chunk.
+    """
+    seen_rows = set()
+    for df in chunks:
+        yield data_preprocessing_pipeline_ECOM_Data(df, seen_rows)
+
+def data_preprocessing_pipeline_Aramex_Data_in_chunks(read_chunks, ECOM_df):
+    """
+    Runs the Aramex pipeline chunk by chunk, in two passes over the data: the first one counts
+    the tokens of every date, the second one gives every row the mode token of its date.
+
+    Parameters:
+        read_chunks (function): Called without arguments, returns a new iterator over the DataFrame chunks.
+        ECOM_df (pd.DataFrame): The ECOM key index the order numbers are looked up in.
+
+    Yields:
+        pd.DataFrame: The next processed chunk.
+    """
+    counts = None
+    for df in read_chunks():
+        df = convert_data_types_Aramex_Data(df)
+        counts = count_tokens_by_date(df, 'Aramex_Inv_date', 'TOKENNO', counts)
+    token_modes = mode_tokens_by_date(counts)
+
+    for df in read_chunks():
+        yield data_preprocessing_pipeline_Aramex_Data(df, ECOM_df, token_modes)
+
+def data_preprocessing_pipeline_CreditCard_Data_in_chunks(chunks):
+    """
+    Runs the Credit Card pipeline chunk by chunk; none of its steps depends on other rows.
+    """
+    for df in chunks:
+        yield data_preprocessing_pipeline_CreditCard_Data(df)
+
+def data_preprocessing_pipeline_ERP_Data_in_chunks(chunks):
+    """
+    Runs the ERP pipeline chunk by chunk; none of its steps depends on other rows.
+    """
+    for df in chunks:
+        yield data_preprocessing_pipeline_ERP_Data(df)
+
+def data_preprocessing_pipeline_Oracle_Data_in_chunks(chunks):
+    """
+    Runs the Oracle pipeline chunk by chunk; none of its steps depends on other rows.
+    """
+    for df in chunks:
+        yield data_preprocessing_pipeline_Oracle_Data(df)
@@ -0,0 +1,107 @@
+import json
+import os
+import pandas as pd
+
+
+def load_watermarks(path):
+    """
+    Loads a watermark store from a JSON file. A missing store is treated as empty.
+
+    Parameters:
+        path (str): The path of the JSON file.
+
+    Returns:
+        dict: Mapping of source to the timestamp of its most recent row.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return {source: pd.Timestamp(value) for source, value in json.load(file).items()}
+
+def save_watermarks(watermarks, path):
+    """
+    Saves a watermark store to a JSON file, replacing it atomically.
+
+    Parameters:
+        watermarks (dict): Mapping of source to the timestamp of its most recent row.
+        path (str): The path of the JSON file.
+
+    Returns:
+        None
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump({source: value.isoformat() for source, value in watermarks.items()}, file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def watermark_cutoff(source, store_path, lookback_days):
+    """
+    Gives the timestamp from which rows of a source have to be ingested again: the start of the day of
+    the watermark of the last successful run, minus the late-arrival lookback window. Whole days are
+    ingested again so every business date partition of the lake is rewritten with all its rows.
+
+    Parameters:
+        source (str): The source to look up.
+        store_path (str): The store holding the watermarks of the last successful run.
+        lookback_days (int): The number of days before the watermark that are ingested again to catch late rows.
+
+    Returns:
+        pd.Timestamp: The cutoff, or None when the source was never loaded.
+    """
+    watermark = load_watermarks(store_path).get(source)
+    if watermark is None:
+        return None
+    return (watermark - pd.Timedelta(days=lookback_days)).normalize()
+
+def rows_since(df, column, since):
+    """
+    Keeps the rows whose timestamp column is on or after the cutoff.
+    Rows without a timestamp are kept, since their age cannot be told.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to filter.
+        column (str): The name of the timestamp column.
+        since (pd.Timestamp): The cutoff.
+
+    Returns:
+        pd.DataFrame: The rows past the cutoff.
+    """
+    values = pd.to_datetime(df[column], errors='coerce')
+    return df[values.isna() | (values >= since)]
+
+def stage_watermarks(latest, pending_path):
+    """
+    Records the most recent timestamp seen for every source in the current run.
+
+    Parameters:
+        latest (dict): Mapping of source to the most recent timestamp extracted; None when no rows were extracted.
+        pending_path (str): The store holding the watermarks of the current run.
+
+    Returns:
+        None
+    """
+    pending = load_watermarks(pending_path)
+    for source, value in latest.items():
+        if value is None or pd.isna(value):
+            continue
+        value = pd.Timestamp(value)
+        pending[source] = max(pending[source], value) if source in pending else value
+    save_watermarks(pending, pending_path)
+
+def commit_watermarks(store_path, pending_path):
+    """
+    Advances the watermarks of the last successful run to those of the current run. Watermarks never move back.
+
+    Parameters:
+        store_path (str): The store holding the watermarks of the last successful run.
+        pending_path (str): The store holding the watermarks of the current run.
+
+    Returns:
+        None
+    """
+    committed = load_watermarks(store_path)
+    for source, value in load_watermarks(pending_path).items():
+        committed[source] = max(committed[source], value) if source in committed else value
+    save_watermarks(committed, store_path)
+    if os.path.exists(pending_path):
+        os.remove(pending_path)
@@ -3,6 +3,7 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import squarify
+from utils import count_items_per_order, count_item_frequencies
 
 def eda_page(data, data_expanded):
     st.title("Exploratory Data Analysis (EDA)")
@@ -405,12 +406,7 @@ def eda_page(data, data_expanded):
     col1, col2 = st.columns([1, 1])
     with col1:
         def plot_transaction_diversity(df):
-            basket = (df
-                    .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                    .count().unstack().reset_index().fillna(0)
-                    .set_index('ecom_reference_order_number'))
-            basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-            unique_items_per_transaction = basket_sets.sum(axis=1)
+            unique_items_per_transaction = count_items_per_order(df)
 
             fig, ax = plt.subplots(figsize=(6, 4))
             ax.hist(unique_items_per_transaction, bins=range(1, unique_items_per_transaction.max() + 1), edgecolor='k')
@@ -431,12 +427,7 @@ def eda_page(data, data_expanded):
     col1, col2 = st.columns([1, 1])
     with col1:
         def plot_item_frequencies(df):
-            basket = (df
-                    .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                    .count().unstack().reset_index().fillna(0)
-                    .set_index('ecom_reference_order_number'))
-            basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-            item_frequencies = basket_sets.sum(axis=0)
+            item_frequencies = count_item_frequencies(df)
 
             fig, ax = plt.subplots(figsize=(6, 4))
             ax.hist(item_frequencies, bins=range(1, item_frequencies.max() + 1), edgecolor='k')
@@ -457,12 +448,7 @@ def eda_page(data, data_expanded):
     col1, col2 = st.columns([1, 1])
     with col1:
         def save_transaction_diversity_stats(df):
-            basket = (df
-                      .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                      .count().unstack().reset_index().fillna(0)
-                      .set_index('ecom_reference_order_number'))
-            basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-            unique_items_per_transaction = basket_sets.sum(axis=1)
+            unique_items_per_transaction = count_items_per_order(df)
             stats = unique_items_per_transaction.describe()
             stats_df = pd.DataFrame(stats, columns=['Value']).reset_index()
             stats_df.columns = ['Statistic', 'Value']
@@ -479,12 +465,7 @@ def eda_page(data, data_expanded):
     col1, col2 = st.columns([1, 1])
     with col1:
         def save_item_frequencies_stats(df):
-            basket = (df
-                      .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                      .count().unstack().reset_index().fillna(0)
-                      .set_index('ecom_reference_order_number'))
-            basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-            item_frequencies = basket_sets.sum(axis=0)
+            item_frequencies = count_item_frequencies(df)
             stats = item_frequencies.describe()
             stats_df = pd.DataFrame(stats, columns=['Value']).reset_index()
             stats_df.columns = ['Statistic', 'Value']
@@ -1,6 +1,7 @@
 import streamlit as st
 from mlxtend.frequent_patterns import apriori, fpgrowth, association_rules
 import pandas as pd
+from utils import build_basket, join_itemsets
 
 def model_configuration_page(data):
     st.title("Model Configuration")
@@ -28,25 +29,20 @@ def model_configuration_page(data):
 
     # Function to run the chosen model
     def run_model(df, model_choice, min_support, min_confidence, min_lift):
-        basket = (df
-                .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                .count().unstack().reset_index().fillna(0)
-                .set_index('ecom_reference_order_number'))
-        basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
+        basket_sets = build_basket(df, sparse_columns=False)
 
         if model_choice == "Apriori":
-            frequent_itemsets = apriori(basket_sets, min_support=min_support, use_colnames=True)
+            frequent_itemsets = apriori(basket_sets, min_support=min_support)
         elif model_choice == "FP-Growth":
-            frequent_itemsets = fpgrowth(basket_sets, min_support=min_support, use_colnames=True)
+            frequent_itemsets = fpgrowth(basket_sets, min_support=min_support)
         
         if frequent_itemsets.empty:
             return None
         
         rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
-        filtered_rules = rules[(rules['lift'] >= min_lift)]
-        filtered_rules['antecedents'] = filtered_rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-        filtered_rules['consequents'] = filtered_rules['consequents'].apply(lambda x: ', '.join(list(x)))
-        filtered_rules.reset_index(drop=True, inplace=True)  # Reset the index
+        filtered_rules = rules[(rules['lift'] >= min_lift)].reset_index(drop=True)  # Reset the index
+        filtered_rules['antecedents'] = join_itemsets(filtered_rules['antecedents'], basket_sets.columns)
+        filtered_rules['consequents'] = join_itemsets(filtered_rules['consequents'], basket_sets.columns)
         return filtered_rules
 
     # Run Model Button
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+def basket_matrix(df, order_column='ecom_reference_order_number', item_column='product_name'):
+    # Sparse boolean orders x products matrix built from integer codes, same as scripts/models/basket.py
+    lines = df[[order_column, item_column]].dropna()
+    order_codes, orders = pd.factorize(lines[order_column], sort=True)
+    item_codes, items = pd.factorize(lines[item_column], sort=True)
+    pairs = np.unique(order_codes.astype(np.int64) * len(items) + item_codes)
+    rows, columns = np.divmod(pairs, len(items)) if len(items) else (pairs, pairs)
+    matrix = sparse.csr_matrix((np.ones(len(pairs), dtype=bool), (rows, columns)), shape=(len(orders), len(items)))
+    return matrix, pd.Index(orders, name=order_column), pd.Index(items, name=item_column)
+
+def build_basket(df, sparse_columns=True):
+    matrix, orders, items = basket_matrix(df)
+    if sparse_columns:
+        basket = pd.DataFrame.sparse.from_spmatrix(matrix.astype(np.uint8), index=orders, columns=items)
+        return basket.astype(pd.SparseDtype(bool, False))
+    return pd.DataFrame(matrix.toarray(), index=orders, columns=items)
+
+def count_items_per_order(df):
+    matrix, orders, _ = basket_matrix(df)
+    return pd.Series(np.asarray(matrix.sum(axis=1)).ravel(), index=orders)
+
+def count_item_frequencies(df):
+    matrix, _, items = basket_matrix(df)
+    return pd.Series(np.asarray(matrix.sum(axis=0)).ravel(), index=items)
+
+def join_itemsets(itemsets, items):
+    # Itemsets of column positions as their product names joined by commas, all the names looked up at once
+    positions = itemsets.map(sorted).explode()
+    names = pd.Series(np.asarray(items, dtype=object)[positions.to_numpy(dtype=np.int64)], index=positions.index)
+    return names.groupby(level=0, sort=False).agg(', '.join)
@@ -1,5 +1,7 @@
 import pandas as pd
 import ast
+import os
+import sys
 import re
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -12,6 +14,10 @@ import requests
 from io import BytesIO
 import plotly.express as px
 
+# The basket helpers are shared with the pages of capstoneStreamlitApp
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'capstoneStreamlitApp'))
+from utils import build_basket, count_items_per_order, count_item_frequencies, join_itemsets
+
 # Set the page layout to wide mode
 st.set_page_config(layout="wide")
 
@@ -870,12 +876,7 @@ def eda_page():
 
         with col1:
             # Distribution of the Number of Items per Transaction
-            basket = (st.session_state["data"]
-                        .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-                        .count().unstack().reset_index().fillna(0)
-                        .set_index('ecom_reference_order_number'))
-            basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
-            unique_items_per_transaction = basket_sets.sum(axis=1)
+            unique_items_per_transaction = count_items_per_order(st.session_state["data"])
 
             fig = px.histogram(
                 unique_items_per_transaction, 
@@ -894,7 +895,7 @@ def eda_page():
 
         with col2:
             # Distribution of Item Frequencies
-            item_frequencies = basket_sets.sum(axis=0)
+            item_frequencies = count_item_frequencies(st.session_state["data"])
 
             fig = px.histogram(
                 item_frequencies, 
@@ -957,17 +958,13 @@ def eda_page():
 
 def run_model(df, model_choice, min_support, min_confidence, min_lift):
     # Preprocess the data into a basket format
-    basket = (df
-              .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
-              .count().unstack().reset_index().fillna(0)
-              .set_index('ecom_reference_order_number'))
-    basket_sets = basket.applymap(lambda x: 1 if x > 0 else 0)
+    basket_sets = build_basket(df, sparse_columns=False)
 
-    # Choose between Apriori or FP-Growth
+    # Choose between Apriori or FP-Growth, the itemsets holding the column positions of their products
     if model_choice == "Apriori":
-        frequent_itemsets = apriori(basket_sets, min_support=min_support, use_colnames=True)
+        frequent_itemsets = apriori(basket_sets, min_support=min_support)
     elif model_choice == "FP-Growth":
-        frequent_itemsets = fpgrowth(basket_sets, min_support=min_support, use_colnames=True)
+        frequent_itemsets = fpgrowth(basket_sets, min_support=min_support)
     
     # Check if frequent itemsets are found
     if frequent_itemsets.empty:
@@ -975,14 +972,12 @@ def run_model(df, model_choice, min_support, min_confidence, min_lift):
 
     # Generate association rules based on confidence and lift thresholds
     rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
-    filtered_rules = rules[rules['lift'] >= min_lift]
-    
-    # Format the antecedents and consequents as strings for better readability
-    filtered_rules['antecedents'] = filtered_rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-    filtered_rules['consequents'] = filtered_rules['consequents'].apply(lambda x: ', '.join(list(x)))
+    # Reset the index
+    filtered_rules = rules[rules['lift'] >= min_lift].reset_index(drop=True)
     
-    # Reset the index and return the rules
-    filtered_rules.reset_index(drop=True, inplace=True)
+    # Format the antecedents and consequents as strings of product names for better readability
+    filtered_rules['antecedents'] = join_itemsets(filtered_rules['antecedents'], basket_sets.columns)
+    filtered_rules['consequents'] = join_itemsets(filtered_rules['consequents'], basket_sets.columns)
     return filtered_rules
 
 # Define the model configuration page function correctly
@@ -0,0 +1,110 @@
+'''
+test_find_workbooks:
+    -Purpose: Verify that find_workbooks lists the workbooks of a directory or glob pattern in the order of their dates.
+    -Setup: Create workbooks dated in their file names in both date formats, and an Excel lock file.
+    -Assertion: Check that the workbooks come out oldest first and that the lock file is ignored.
+
+test_combine_key_indexes:
+    -Purpose: Verify that every workbook gets the key index of itself and the older workbooks only.
+    -Setup: Write the key indexes of three workbooks, the last one giving an AWB of the first to another order.
+    -Assertion: Check the orders of every combined index, and that the duplicate AWB maps to the most recent order.
+
+test_backfill:
+    -Purpose: Verify that backfill transforms every workbook into its own data directory and reports them in date order.
+    -Setup: Write two daily workbooks, each shipping the order of the other, and backfill them without loading.
+    -Assertion: Check the reports, that the shipment of the second workbook got the order number of the first one
+                while that of the first did not get the order number of the second, and that the lake holds
+                a partition for the orders of each day.
+'''
+
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from backfill import find_workbooks, workbook_date, combine_key_indexes, backfill
+from pipeline_steps import output_path
+from key_index import write_key_index, read_key_index, lookup_keys
+from lake import read_partitions
+
+def write_daily_workbook(path, day, order_number, awb, shipped_awb):
+    date = pd.Timestamp(day)
+    sheets = {
+        'Website ECOM Data': {
+            'Order Number': [order_number], 'Shipper Name': ['Aramex'], 'Created At': [date], 'Delivered At': [date],
+            'Billing Type': ['Cash'], 'Amount': [10.0], 'Currency': ['usd'], 'Country': ['lb'], 'AWB': [awb],
+        },
+        'Shipped & Collected - Aramex': {
+            'ShprNo': ['1'], 'HAWB': [shipped_awb], 'Delivery_Date': [date], 'CODAmount': [10.0], 'CODCurrency': ['usd'],
+            'O_CODAmount': [10.0], 'Aramex_Inv_date': [date], 'TOKENNO': ['5555'],
+        },
+        'Shipped & Collected - Cosmaline': {'Driver_Delivery_date': [date], 'OrderNo': [order_number], 'Amount': [10.0], 'Currency': ['usd']},
+        'Collected - Credit Card': {'Value_date': [date], 'Narrative': ['payment'], 'Amount': [10.0], 'Currency': ['usd']},
+        'ERP-Oracle Collection': {
+            'RECEIPT_NUMBER': [f"R{order_number}"], 'CURRENCY_CODE': ['usd'], 'EXCHANGE_RATE': [1.0], 'RECEIPT_DATE': [date],
+            'CUSTOMER_NUMBER': ['C1'], 'CUSTOMER_NAME': ['Aramex'], 'RECEIPT_CLASS': ['Cash'], 'RECEIPT_AMOUNT': [10.0], 'COMMENTS': ['Token 5555'],
+        },
+        'Oracle Data': {
+            'OPERATING_UNIT_NAME': ['Unit1'], 'ORACLE_REFERENCE_ORDER_NUMBER': [1], 'ECOM_REFERENCE_ORDER_NUMBER': [order_number],
+            'ORDER_TYPE': ['Type1'], 'ORDER_TYPE_NAME': ['Name1'], 'ORDERED_ITEM': ['Item1'], 'ORDERED_QUANTITY': [1],
+            'PRICING_QUANTITY_UOM': ['EA'], 'UNIT_SELLING_PRICE (after discount without vat)': [10.0],
+            'UNIT_LIST_PRICE( original price before discount without vat)': [12.0], 'ORDERED_DATE': [date],
+            'CUSTOMER_NAME': ['Customer1'], 'TAX_CODE': ['TAX1'],
+        },
+        'Daily Rate': {'Date': [date], 'Rate': [89500.0]},
+    }
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, columns in sheets.items():
+            pd.DataFrame(columns).to_excel(writer, sheet_name=sheet_name, index=False)
+
+def test_find_workbooks(tmp_path):
+    for name in ['sales_20240103.xlsx', 'sales_2024-01-01.xlsx', 'sales_2024_01_02.xlsx', '~$sales_20240103.xlsx', 'notes.txt']:
+        (tmp_path / name).write_bytes(b'')
+
+    expected = ['sales_2024-01-01.xlsx', 'sales_2024_01_02.xlsx', 'sales_20240103.xlsx']
+    assert [os.path.basename(path) for path in find_workbooks(str(tmp_path))] == expected
+    assert [os.path.basename(path) for path in find_workbooks(str(tmp_path / 'sales_*.xlsx'))] == expected
+    assert workbook_date(str(tmp_path / 'sales_2024_01_02.xlsx')) == pd.Timestamp('2024-01-02')
+
+def test_combine_key_indexes(tmp_path):
+    data_dirs = [str(tmp_path / name) for name in ['0000_first', '0001_second', '0002_third']]
+    for data_dir, awbs, order_numbers in zip(data_dirs, [['111'], ['222'], ['111', '333']], [['1001'], ['1002'], ['1003', '1004']]):
+        os.makedirs(data_dir)
+        write_key_index(pd.DataFrame({'AWB': awbs, 'order_number': order_numbers}), output_path('ecom_key_index', data_dir))
+
+    assert combine_key_indexes(data_dirs) == [1, 2, 4]
+
+    indexes = [read_key_index(output_path('ecom_key_index', data_dir)) for data_dir in data_dirs]
+    assert [sorted(index['order_number']) for index in indexes] == [['1001'], ['1001', '1002'], ['1001', '1002', '1003', '1004']]
+    assert lookup_keys(pd.Series(['111']), indexes[1], 'AWB', 'order_number').tolist() == ['1001']
+    assert lookup_keys(pd.Series(['111']), indexes[2], 'AWB', 'order_number').tolist() == ['1003']
+
+def test_backfill(tmp_path):
+    source_dir = tmp_path / 'workbooks'
+    source_dir.mkdir()
+    write_daily_workbook(str(source_dir / 'daily_2024-01-02.xlsx'), '2024-01-02', '1002', '222', '111')
+    write_daily_workbook(str(source_dir / 'daily_2024-01-01.xlsx'), '2024-01-01', '1001', '111', '222')
+    work_dir = str(tmp_path / 'work')
+
+    lake_dir = str(tmp_path / 'lake')
+    reports = backfill(str(source_dir), work_dir, max_workers=2, load=False, lake_dir=lake_dir)
+
+    assert [report['date'] for report in reports] == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02')]
+    assert all(report['rows'] == 7 and report['seconds'] > 0 for report in reports)
+    data_dirs = sorted(os.listdir(work_dir))
+    assert data_dirs == ['0000_daily_2024-01-01', '0001_daily_2024-01-02']
+
+    shipped = pd.read_parquet(output_path('aramex', os.path.join(work_dir, data_dirs[1])))
+    assert shipped['order_number'].tolist() == ['1001']
+    # The first workbook never looks its shipments up in the orders of the second one
+    shipped = pd.read_parquet(output_path('aramex', os.path.join(work_dir, data_dirs[0])))
+    assert shipped['order_number'].isna().all()
+    ecom = pd.read_parquet(output_path('ecom_orders', os.path.join(work_dir, data_dirs[1])))
+    assert ecom['order_number'].tolist() == ['1002']
+
+    lake = read_partitions(lake_dir, 'ecom_orders')
+    assert sorted(zip(lake['business_date'].astype(str), lake['order_number'])) == [('2024-01-01', '1001'), ('2024-01-02', '1002')]
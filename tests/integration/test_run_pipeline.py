@@ -0,0 +1,155 @@
+'''
+test_run_steps_follows_dependencies:
+    -Purpose: Verify that run_steps only starts a step once the steps it depends on are done.
+    -Setup: Run steps appending their name to a file in a process pool with two workers.
+    -Assertion: Check that every step is written after its dependencies and that the returned values are collected.
+
+test_run_steps_rejects_bad_graphs:
+    -Purpose: Verify that run_steps rejects unknown and circular dependencies.
+    -Setup: Run a graph depending on a missing step and a graph with a cycle.
+    -Assertion: Check that both raise a ValueError.
+
+test_run_pipeline:
+    -Purpose: Verify that running the pipeline in a process pool gives the outputs of running its steps one after the other.
+    -Setup: Write a small workbook with every sheet, run it with run_pipeline and with the steps called in the order of the DAG.
+    -Assertion: Check that every transformed output is the same, in both the single and the chunked mode.
+'''
+
+import pytest
+import pandas as pd
+import sys
+import os
+from functools import partial
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from run_pipeline import run_steps, run_pipeline, EXTRACT_STEPS, TRANSFORM_STEPS
+from pipeline_steps import extract_sheet, output_path, OUTPUT_FILES
+
+def record_step(name, path):
+    with open(path, 'a') as file:
+        file.write(f"{name}\n")
+    return name.upper()
+
+def write_workbook(path):
+    sheets = {
+        'Website ECOM Data': pd.DataFrame({
+            'Order Number': ['1001', '1002', '1003'],
+            'Shipper Name': ['Aramex', 'Aramex', 'Cosmaline'],
+            'Created At': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+            'Delivered At': pd.to_datetime(['2024-01-04', '2024-01-05', '2024-01-05']),
+            'Billing Type': ['Cash', 'Cybersource', 'Cash'],
+            'Amount': [10.0, 20.0, 30.0],
+            'Currency': ['usd', 'usd', 'usd'],
+            'Country': ['lb', 'lb', 'lb'],
+            'AWB': ['111', '222', '444'],
+        }),
+        'Shipped & Collected - Aramex': pd.DataFrame({
+            'ShprNo': ['1', '2', '3'],
+            'HAWB': ['111', '222', '333'],
+            'Delivery_Date': pd.to_datetime(['2024-01-04', '2024-01-05', '2024-01-05']),
+            'CODAmount': [10.0, 20.0, 5.0],
+            'CODCurrency': ['usd', 'usd', 'lbp'],
+            'O_CODAmount': [10.0, 20.0, 5.0],
+            'Aramex_Inv_date': pd.to_datetime(['2024-01-10', '2024-01-10', '2024-01-10']),
+            'TOKENNO': ['5555', '5555', '6666'],
+        }),
+        'Shipped & Collected - Cosmaline': pd.DataFrame({
+            'Driver_Delivery_date': pd.to_datetime(['2024-01-05']),
+            'OrderNo': ['1003'],
+            'Amount': [30.0],
+            'Currency': ['usd'],
+        }),
+        'Collected - Credit Card': pd.DataFrame({
+            'Value_date': pd.to_datetime(['2024-01-02']),
+            'Narrative': ['payment 1002'],
+            'Amount': [20.0],
+            'Currency': ['usd'],
+        }),
+        'ERP-Oracle Collection': pd.DataFrame({
+            'RECEIPT_NUMBER': ['R1', 'R2'],
+            'CURRENCY_CODE': ['usd', 'usd'],
+            'EXCHANGE_RATE': [1.0, 1.0],
+            'RECEIPT_DATE': pd.to_datetime(['2024-01-11', '2024-01-12']),
+            'CUSTOMER_NUMBER': ['C1', 'C2'],
+            'CUSTOMER_NAME': ['Aramex', 'Cosmaline'],
+            'RECEIPT_CLASS': ['Cash', 'Cash'],
+            'RECEIPT_AMOUNT': [35.0, 30.0],
+            'COMMENTS': ['Token 5555', 'Cosmaline transfer'],
+        }),
+        'Oracle Data': pd.DataFrame({
+            'OPERATING_UNIT_NAME': ['Unit1', 'Unit1'],
+            'ORACLE_REFERENCE_ORDER_NUMBER': [1, 2],
+            'ECOM_REFERENCE_ORDER_NUMBER': ['1001', '1002'],
+            'ORDER_TYPE': ['Type1', 'Type1'],
+            'ORDER_TYPE_NAME': ['Name1', 'Name1'],
+            'ORDERED_ITEM': ['Item1', 'Item2'],
+            'ORDERED_QUANTITY': [1, 2],
+            'PRICING_QUANTITY_UOM': ['EA', 'EA'],
+            'UNIT_SELLING_PRICE (after discount without vat)': [10.0, 10.0],
+            'UNIT_LIST_PRICE( original price before discount without vat)': [12.0, 12.0],
+            'ORDERED_DATE': pd.to_datetime(['2024-01-01 10:00:00', '2024-01-02 11:00:00']),
+            'CUSTOMER_NAME': ['Customer1', 'Customer2'],
+            'TAX_CODE': ['TAX1', 'TAX1'],
+        }),
+        'Daily Rate': pd.DataFrame({
+            'Date': pd.to_datetime(['2024-01-01', '2024-01-02']),
+            'Rate': [89500.0, 89600.0],
+        }),
+    }
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+def test_run_steps_follows_dependencies(tmp_path):
+    log_path = str(tmp_path / 'steps.log')
+    steps = {
+        'a': (partial(record_step, 'a', log_path), []),
+        'b': (partial(record_step, 'b', log_path), ['a']),
+        'c': (partial(record_step, 'c', log_path), ['a']),
+        'd': (partial(record_step, 'd', log_path), ['b', 'c']),
+        'e': (partial(record_step, 'e', log_path), []),
+    }
+
+    results = run_steps(steps, max_workers=2)
+
+    assert results == {name: name.upper() for name in steps}
+    with open(log_path) as file:
+        order = file.read().split()
+    assert sorted(order) == sorted(steps)
+    for name, (_, dependencies) in steps.items():
+        assert all(order.index(dependency) < order.index(name) for dependency in dependencies)
+
+def test_run_steps_rejects_bad_graphs(tmp_path):
+    log_path = str(tmp_path / 'steps.log')
+    with pytest.raises(ValueError):
+        run_steps({'a': (partial(record_step, 'a', log_path), ['missing'])}, max_workers=1)
+    with pytest.raises(ValueError):
+        run_steps({
+            'a': (partial(record_step, 'a', log_path), ['b']),
+            'b': (partial(record_step, 'b', log_path), ['a']),
+        }, max_workers=1)
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_run_pipeline(tmp_path, chunked):
+    workbook = str(tmp_path / 'workbook.xlsx')
+    write_workbook(workbook)
+    parallel_dir = str(tmp_path / 'parallel')
+    sequential_dir = str(tmp_path / 'sequential')
+    os.makedirs(sequential_dir)
+
+    results = run_pipeline(workbook, parallel_dir, max_workers=2, chunked=chunked, lake_dir=str(tmp_path / 'lake'))
+    assert results['transform_ecom_data'] == 3
+
+    for sheet_name in EXTRACT_STEPS.values():
+        extract_sheet(sheet_name, workbook, sequential_dir)
+    for function, _ in TRANSFORM_STEPS.values():
+        function(data_dir=sequential_dir, chunked=chunked)
+
+    for name in OUTPUT_FILES:
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(output_path(name, parallel_dir)),
+            pd.read_parquet(output_path(name, sequential_dir)),
+        )
@@ -32,14 +32,14 @@ def sample_cosmaline_data():
 @pytest.fixture
 def expected_output_cosmaline_data():
     expected_df = pd.DataFrame({
-        'CODCurrency': ['USD', 'LBP', 'LBP'],
+        'CODCurrency': pd.Categorical(['USD', 'LBP', 'LBP']),
         'Delivery_Date': pd.to_datetime(['2023-01-02', '2023-01-03', '2023-01-04']),
         'O_CODAmount': pd.Series([0, 100.00, 200.00], dtype='float32'),
         'order_number': ['123', '124', '125'],
         'CODAmount': pd.Series([0, 100.00, 200.00], dtype='float32'),
         'ShprNo': pd.NA,
         'Aramex_Inv_date': pd.to_datetime([pd.NaT, pd.NaT, pd.NaT]),
-        'TOKENNO': 'Shipped With Cosmaline',
+        'TOKENNO': pd.Categorical(['Shipped With Cosmaline'] * 3),
         'AWB': ['123-456', '234-567', '345-678']
     })
     return expected_df
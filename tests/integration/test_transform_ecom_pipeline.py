@@ -24,13 +24,13 @@ def sample_ecom_data():
 def expected_output_ecom_data():
     return pd.DataFrame({
         'order_number': ['123', '124', '125'],
-        'shipper_name': ['Fedex', 'Ups', 'Dhl'],
+        'shipper_name': pd.Categorical(['Fedex', 'Ups', 'Dhl']),
         'created_at': pd.to_datetime(['2023-01-01 10:00:00', '2023-01-02 11:00:00', '2023-01-03 12:00:00']),
         'delivered_at': pd.to_datetime(['2023-01-02 10:00:00', '2023-01-03 11:00:00', '2023-01-04 12:00:00']),
-        'billing_type': ['Prepaid', 'Postpaid', 'Prepaid'],
+        'billing_type': pd.Categorical(['Prepaid', 'Postpaid', 'Prepaid']),
         'amount': [100.50, 200.75, 300.00],
-        'currency': ['USD', 'EUR', 'GBP'],
-        'country': ['US', 'FR', 'DE'],
+        'currency': pd.Categorical(['USD', 'EUR', 'GBP']),
+        'country': pd.Categorical(['US', 'FR', 'DE']),
         'AWB': ['123-456', '234-567', '345-678']
     })
 
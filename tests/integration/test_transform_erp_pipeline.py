@@ -21,9 +21,9 @@ def sample_erp_data():
 def expected_output_erp_data():
     expected_df = pd.DataFrame({
         'CUSTOMER_NUMBER': ['123', '456', '789'],
-        'CUSTOMER_NAME': ['Acme corp', 'Widget works', 'Gizmo co'],
-        'RECEIPT_CLASS': ['Premium', 'Standard', 'Basic'],
-        'CURRENCY_CODE': ['USD', 'EUR', 'GBP'],
+        'CUSTOMER_NAME': pd.Categorical(['Acme corp', 'Widget works', 'Gizmo co']),
+        'RECEIPT_CLASS': pd.Categorical(['Premium', 'Standard', 'Basic']),
+        'CURRENCY_CODE': pd.Categorical(['USD', 'EUR', 'GBP']),
         'COMMENTS': ['A123', 'B456', 'Charge for account']
     })
     expected_df['CUSTOMER_NUMBER'] = expected_df['CUSTOMER_NUMBER'].astype('str')
@@ -30,19 +30,19 @@ def sample_oracle_data():
 @pytest.fixture
 def expected_output_oracle_data():
     expected_df = pd.DataFrame({
-        'operating_unit_name': ['Unit1', 'Unit2', 'Unit3'],
+        'operating_unit_name': pd.Categorical(['Unit1', 'Unit2', 'Unit3']),
         'oracle_reference_order_number': pd.Series([12345, 67890, 13579], dtype='int32'),
         'ecom_reference_order_number': pd.Series(['111', '222', '333'], dtype='object'),
-        'order_type': ['Type1', 'Type2', 'Type3'],
-        'order_type_name': ['Name1', 'Name2', 'Name3'],
+        'order_type': pd.Categorical(['Type1', 'Type2', 'Type3']),
+        'order_type_name': pd.Categorical(['Name1', 'Name2', 'Name3']),
         'ordered_item': ['Item1', 'Item2', 'Item3'],
         'ordered_quantity': pd.Series([10, 20, 30], dtype='int32'),
-        'pricing_quantity_uom': ['UOM1', 'UOM2', 'UOM3'],
+        'pricing_quantity_uom': pd.Categorical(['UOM1', 'UOM2', 'UOM3']),
         'unit_selling_price': pd.Series([100.5, 200.75, 300.00], dtype='float32'),
         'unit_list_price': pd.Series([120.5, 220.75, 320.00], dtype='float32'),
         'ordered_date': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03']),
-        'customer_name': ['Customer1', 'Customer2', 'Customer3'],
-        'tax_code': ['TAX1', 'TAX2', 'TAX3']
+        'customer_name': pd.Categorical(['Customer1', 'Customer2', 'Customer3']),
+        'tax_code': pd.Categorical(['TAX1', 'TAX2', 'TAX3'])
     })
     return expected_df
 
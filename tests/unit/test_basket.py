@@ -0,0 +1,54 @@
+'''
+test_build_basket:
+    -Purpose: Verify that build_basket marks the products of every order, whatever their quantity.
+    -Setup: Create order lines with a product repeated in an order and a line without a product.
+    -Assertion: Check that the sparse and dense baskets match the former groupby/unstack basket, with sorted orders and products.
+
+test_count_items_per_order_and_item_frequencies:
+    -Purpose: Verify the distinct products per order and the orders per product counted on the sparse matrix.
+    -Setup: Use the same order lines.
+    -Assertion: Check both counts against the sums of the basket.
+'''
+
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from models.basket import build_basket, count_items_per_order, count_item_frequencies
+
+@pytest.fixture
+def order_lines():
+    return pd.DataFrame({
+        'ecom_reference_order_number': ['1002', '1001', '1001', '1001', '1003', '1003'],
+        'product_name': ['Soap', 'Shampoo', 'Soap', 'Soap', 'Cream', None],
+        'ordered_quantity': [1, 2, 1, 3, 1, 1],
+    })
+
+def test_build_basket(order_lines):
+    expected = (order_lines
+                .groupby(['ecom_reference_order_number', 'product_name'])['product_name']
+                .count().unstack().reset_index().fillna(0)
+                .set_index('ecom_reference_order_number'))
+    expected = expected > 0
+
+    basket = build_basket(order_lines)
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in basket.dtypes)
+    pd.testing.assert_frame_equal(basket.sparse.to_dense().astype(bool), expected, check_names=False)
+    assert basket.index.tolist() == ['1001', '1002', '1003']
+    assert basket.columns.tolist() == ['Cream', 'Shampoo', 'Soap']
+
+    dense = build_basket(order_lines, sparse_columns=False)
+    pd.testing.assert_frame_equal(dense, expected, check_names=False)
+
+def test_count_items_per_order_and_item_frequencies(order_lines):
+    basket = build_basket(order_lines, sparse_columns=False)
+
+    assert count_items_per_order(order_lines).tolist() == [2, 1, 1]
+    assert count_items_per_order(order_lines).tolist() == basket.sum(axis=1).tolist()
+    assert count_item_frequencies(order_lines).to_dict() == {'Cream': 1, 'Shampoo': 1, 'Soap': 2}
+    assert count_item_frequencies(order_lines).tolist() == basket.sum(axis=0).tolist()
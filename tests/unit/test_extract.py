@@ -1,6 +1,8 @@
 '''
 Successful Data Read: We mock pd.read_excel to return a sample DataFrame. We then check if the function correctly calls pd.read_excel and returns the expected DataFrame.
 Exception Handling: We mock pd.read_excel to raise an exception and check if the function correctly handles the exception and returns None.
+Single-Pass Extraction: We write a small two-sheet workbook and check that extract_sheets_to_files opens it once in read-only mode and stages every requested sheet as a typed Arrow file.
+Chunked Streaming: We check that read_excel_in_chunks yields fixed-size chunks, skips empty rows and unnamed columns, and yields an empty frame for a header-only sheet.
 '''
 
 import pytest
@@ -10,7 +12,10 @@ import sys
 import os
 script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
 sys.path.append(script_path)
-from extract import read_data_from_excel
+import openpyxl
+import pyarrow as pa
+from staging import read_staged_data
+from extract import read_data_from_excel, extract_sheets_to_files, read_excel_in_chunks
 
 # Test case for successful data read
 def test_read_data_from_excel_success():
@@ -40,3 +45,53 @@ def test_read_data_from_excel_failure():
         # Assertions
         mock_read_excel.assert_called_once_with(filepath, sheet_name='Website ECOM Data')
         assert result is None
+
+# Test case for extracting several sheets in a single pass
+def test_extract_sheets_to_files(tmp_path):
+    workbook_path = tmp_path / 'workbook.xlsx'
+    ecom_data = pd.DataFrame({'Order Number': [1, 2], 'Currency': ['USD', 'LBP']})
+    rate_data = pd.DataFrame({'Date': pd.to_datetime(['2024-01-01', '2024-01-02']), 'Rate': [89500, 89600]})
+    with pd.ExcelWriter(workbook_path) as writer:
+        ecom_data.to_excel(writer, sheet_name='Website ECOM Data', index=False)
+        rate_data.to_excel(writer, sheet_name='Daily Rate', index=False)
+
+    targets = {
+        'Website ECOM Data': str(tmp_path / 'ecom_data.arrow'),
+        'Daily Rate': str(tmp_path / 'daily_rate_data.arrow'),
+    }
+    schemas = {'Daily Rate': pa.schema([('Date', pa.timestamp('ns')), ('Rate', pa.float64())])}
+    with patch('openpyxl.load_workbook', wraps=openpyxl.load_workbook) as mock_load_workbook:
+        extract_sheets_to_files(str(workbook_path), targets, schemas, chunksize=1)
+
+        # The workbook is opened only once, in read-only mode, for all the sheets
+        mock_load_workbook.assert_called_once_with(str(workbook_path), read_only=True, data_only=True)
+
+    # Sheets without a declared schema keep the inferred types, declared ones follow their schema
+    pd.testing.assert_frame_equal(read_staged_data(targets['Website ECOM Data']), ecom_data)
+    pd.testing.assert_frame_equal(read_staged_data(targets['Daily Rate']), rate_data.astype({'Rate': 'float64'}))
+
+# Test case for streaming a sheet in fixed-size chunks
+def test_read_excel_in_chunks(tmp_path):
+    workbook_path = tmp_path / 'workbook.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Oracle Data'
+    sheet.append(['ORDERED_ITEM', 'ORDERED_QUANTITY', None])
+    for i in range(5):
+        sheet.append([f'C{i}', i, None])
+    sheet.append([None, None, None])
+    header_only = workbook.create_sheet('Daily Rate')
+    header_only.append(['Date', 'Rate'])
+    workbook.save(workbook_path)
+
+    chunks = list(read_excel_in_chunks(str(workbook_path), 'Oracle Data', chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    result = pd.concat(chunks, ignore_index=True)
+    expected = pd.DataFrame({'ORDERED_ITEM': [f'C{i}' for i in range(5)], 'ORDERED_QUANTITY': list(range(5))})
+    pd.testing.assert_frame_equal(result, expected)
+
+    empty_chunks = list(read_excel_in_chunks(str(workbook_path), 'Daily Rate'))
+    assert len(empty_chunks) == 1
+    assert list(empty_chunks[0].columns) == ['Date', 'Rate']
+    assert empty_chunks[0].empty
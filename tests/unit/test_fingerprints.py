@@ -0,0 +1,57 @@
+'''
+test_file_fingerprint:
+    -Purpose: Verify that file_fingerprint only depends on the content of a file.
+    -Setup: Write two files with the same content and a third one with a different content.
+    -Assertion: Check that identical contents give identical fingerprints and different contents do not.
+
+test_change_detection_across_runs:
+    -Purpose: Verify that a sheet is only reported as changed when its fingerprint differs from the last successful run.
+    -Setup: Stage fingerprints for a first run, commit them, then stage a second run where only one sheet changed.
+    -Assertion: Check the changed keys returned by stage_fingerprints and the answers of has_changed.
+
+test_has_changed_without_pending_run:
+    -Purpose: Verify that sheets the current run knows nothing about are always processed.
+    -Setup: Use a pending store that does not exist.
+    -Assertion: Check that has_changed returns True.
+'''
+
+import pytest
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from fingerprints import file_fingerprint, fingerprint_key, stage_fingerprints, has_changed, commit_fingerprints, load_fingerprints
+
+def test_file_fingerprint(tmp_path):
+    (tmp_path / 'a.arrow').write_bytes(b'same content')
+    (tmp_path / 'b.arrow').write_bytes(b'same content')
+    (tmp_path / 'c.arrow').write_bytes(b'other content')
+
+    assert file_fingerprint(str(tmp_path / 'a.arrow')) == file_fingerprint(str(tmp_path / 'b.arrow'))
+    assert file_fingerprint(str(tmp_path / 'a.arrow')) != file_fingerprint(str(tmp_path / 'c.arrow'))
+
+def test_change_detection_across_runs(tmp_path):
+    store_path = str(tmp_path / 'fingerprints.json')
+    pending_path = str(tmp_path / 'fingerprints_pending.json')
+    ecom_key = fingerprint_key('Final File.xlsx', 'Website ECOM Data')
+    rate_key = fingerprint_key('Final File.xlsx', 'Daily Rate')
+
+    # First run: nothing was ever loaded, so every sheet changed
+    changed = stage_fingerprints({ecom_key: 'hash-1', rate_key: 'hash-2'}, store_path, pending_path)
+    assert changed == [ecom_key, rate_key]
+    assert has_changed([rate_key], pending_path)
+    commit_fingerprints(store_path, pending_path)
+    assert load_fingerprints(store_path) == {ecom_key: 'hash-1', rate_key: 'hash-2'}
+    assert not os.path.exists(pending_path)
+
+    # Second run: only the daily rate sheet changed
+    changed = stage_fingerprints({ecom_key: 'hash-1', rate_key: 'hash-3'}, store_path, pending_path)
+    assert changed == [rate_key]
+    assert not has_changed([ecom_key], pending_path)
+    assert has_changed([ecom_key, rate_key], pending_path)
+
+def test_has_changed_without_pending_run(tmp_path):
+    assert has_changed([fingerprint_key('Final File.xlsx', 'Oracle Data')], str(tmp_path / 'missing.json'))
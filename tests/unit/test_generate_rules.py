@@ -0,0 +1,72 @@
+'''
+test_itemsets_above:
+    -Purpose: Verify that filtering itemsets mined at a low support gives the itemsets mined at a higher one.
+    -Setup: Mine random baskets at 0.005 and at 0.01.
+    -Assertion: Check that the itemsets and supports kept by itemsets_above equal those mined at 0.01.
+
+test_generate_rule_sets:
+    -Purpose: Verify that deriving both rule sets from one mining pass gives the rules of mining for each of them.
+    -Setup: Generate the rule sets with generate_rule_sets and with generate_apriori_results and generate_fpgrowth_results.
+    -Assertion: Check that both rule tables are the same, and that the product dictionary names every product of the rules.
+
+test_write_and_read_itemsets:
+    -Purpose: Verify that frequent itemsets saved to Parquet are read back as frozensets.
+    -Setup: Write the itemsets of random baskets and read them back.
+    -Assertion: Check that the itemsets and supports are unchanged.
+'''
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from models.itemsets import mine_frequent_itemsets, itemsets_above, write_itemsets, read_itemsets
+from models.generate_apriori import generate_apriori_results
+from models.generate_fpgrowth import generate_fpgrowth_results
+from models.generate_rules import generate_rule_sets
+from models.rule_table import rules_to_table
+
+@pytest.fixture
+def order_lines():
+    rng = np.random.default_rng(11)
+    weights = rng.dirichlet(np.full(40, 0.2))
+    lines = []
+    for order in range(600):
+        for product in rng.choice(40, size=rng.integers(1, 6), p=weights):
+            lines.append({'ecom_reference_order_number': f"{order:04d}", 'product_name': f"product {product:02d}"})
+    return pd.DataFrame(lines)
+
+def test_itemsets_above(order_lines):
+    low = mine_frequent_itemsets(order_lines, 0.005)
+    high = mine_frequent_itemsets(order_lines, 0.01)
+
+    kept = itemsets_above(low, 0.01)
+
+    assert len(kept) < len(low)
+    assert kept['itemsets'].tolist() == high['itemsets'].tolist()
+    assert kept['support'].tolist() == high['support'].tolist()
+
+def test_generate_rule_sets(order_lines):
+    frequent_itemsets, products, apriori_results, fpgrowth_results = generate_rule_sets(order_lines)
+
+    assert frequent_itemsets['support'].min() >= 0.005
+    assert products['product_name'].tolist() == sorted(order_lines['product_name'].unique())
+    for rules, expected in [(apriori_results, generate_apriori_results(order_lines)), (fpgrowth_results, generate_fpgrowth_results(order_lines))]:
+        assert len(rules) > 0
+        pd.testing.assert_frame_equal(rules_to_table(rules, products), rules_to_table(expected, products))
+        assert np.concatenate(rules['antecedents'].tolist() + rules['consequents'].tolist()).max() < len(products)
+
+def test_write_and_read_itemsets(order_lines, tmp_path):
+    frequent_itemsets = mine_frequent_itemsets(order_lines, 0.01)
+    path = str(tmp_path / 'frequent_itemsets.parquet')
+
+    write_itemsets(frequent_itemsets, path)
+    read_back = read_itemsets(path)
+
+    assert read_back['itemsets'].tolist() == frequent_itemsets['itemsets'].tolist()
+    assert read_back['support'].tolist() == frequent_itemsets['support'].tolist()
@@ -0,0 +1,124 @@
+'''
+test_negative_border:
+    -Purpose: Verify that the negative border holds the infrequent itemsets all of whose subsets are frequent.
+    -Setup: Compute the border of a few frequent itemsets over four products.
+    -Assertion: Check the itemsets of the border.
+
+test_itemset_ids:
+    -Purpose: Verify that stored itemsets are looked up in the products of the basket matrix, and never read as another product.
+    -Setup: Look up itemsets of known products, then an itemset holding a product missing from the matrix.
+    -Assertion: Check the product IDs, and that the missing product raises a KeyError.
+
+test_update_matches_full_mining:
+    -Purpose: Verify that updating the store with new orders gives the itemsets of mining all the orders in full.
+    -Setup: Build a store on the first orders of random baskets, then add the other orders a few at a time,
+            one of them holding a product never seen before.
+    -Assertion: Check the itemsets and supports after every update, and that some updates did not mine in full.
+
+test_update_falls_back_to_full_mining:
+    -Purpose: Verify that the itemsets are mined in full when an update cannot give the same result.
+    -Setup: Update a store at another support, with a changed order, with a removed order, and with new orders
+            making an itemset of the border frequent.
+    -Assertion: Check the reason given for every full mining and that the itemsets still match.
+
+test_mine_itemsets_incrementally:
+    -Purpose: Verify that the store is saved between runs and read back.
+    -Setup: Mine the itemsets of random baskets twice with the same store directory, adding orders in between.
+    -Assertion: Check the printed messages, the saved store and the itemsets of both runs.
+'''
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from models.basket import basket_matrix
+from models.itemsets import mine_frequent_itemsets
+from models.incremental_itemsets import (negative_border, itemset_ids, build_itemset_store, update_itemset_store, store_frequent_itemsets,
+                                         read_itemset_store, mine_itemsets_incrementally)
+
+@pytest.fixture
+def order_lines():
+    rng = np.random.default_rng(5)
+    weights = rng.dirichlet(np.full(30, 0.3))
+    lines = []
+    for order in range(800):
+        for product in rng.choice(30, size=rng.integers(1, 5), p=weights):
+            lines.append({'ecom_reference_order_number': f"{order:04d}", 'product_name': f"product {product:02d}"})
+    return pd.DataFrame(lines)
+
+def first_orders(df, count):
+    return df[df['ecom_reference_order_number'] < f"{count:04d}"]
+
+def assert_same_itemsets(store, df, min_support):
+    expected = mine_frequent_itemsets(df, min_support)
+    itemsets = store_frequent_itemsets(store, basket_matrix(df)[2])
+    assert itemsets['itemsets'].tolist() == expected['itemsets'].tolist()
+    assert itemsets['support'].tolist() == expected['support'].tolist()
+
+def test_negative_border():
+    frequent = [(0,), (1,), (2,), (0, 1), (0, 2)]
+
+    border = negative_border(frequent, 4)
+
+    assert sorted(border) == [(1, 2), (3,)]
+
+def test_itemset_ids():
+    products = pd.Index(['balsam', 'mask', 'serum'])
+
+    assert itemset_ids(pd.Series([('balsam', 'serum'), ('mask',)]), products) == [(0, 2), (1,)]
+    with pytest.raises(KeyError, match='shampoo'):
+        itemset_ids(pd.Series([('mask', 'shampoo')]), products)
+
+def test_update_matches_full_mining(order_lines):
+    new_product = pd.DataFrame({'ecom_reference_order_number': ['0790'], 'product_name': ['product 99']})
+    order_lines = pd.concat([order_lines, new_product], ignore_index=True)
+    store = build_itemset_store(basket_matrix(first_orders(order_lines, 700)), 0.02)
+
+    reasons = []
+    for count in range(705, 805, 5):
+        df = first_orders(order_lines, count)
+        store, reason = update_itemset_store(store, basket_matrix(df), 0.02)
+        reasons.append(reason)
+        assert_same_itemsets(store, df, 0.02)
+
+    assert None in reasons
+    assert ('product 99',) in set(store['itemsets']['itemsets'])
+
+def test_update_falls_back_to_full_mining(order_lines):
+    df = first_orders(order_lines, 700)
+    store = build_itemset_store(basket_matrix(df), 0.02)
+
+    changed = df.copy()
+    changed.loc[changed.index[0], 'product_name'] = 'product 98'
+    removed = df[df['ecom_reference_order_number'] != '0003']
+    # New orders all holding the same pair of products make it frequent
+    border_pair = next(itemset for itemset, frequent in zip(store['itemsets']['itemsets'], store['itemsets']['frequent']) if len(itemset) == 2 and not frequent)
+    crossing = pd.concat([df, pd.DataFrame([{'ecom_reference_order_number': f"9{order:03d}", 'product_name': product}
+                                            for order in range(30) for product in border_pair])], ignore_index=True)
+
+    for lines, min_support, expected_reason in [(df, 0.03, 'the store was built at a support of 0.02'), (changed, 0.02, 'orders were changed'),
+                                                (removed, 0.02, 'orders were removed'), (crossing, 0.02, 'the negative border was crossed')]:
+        updated, reason = update_itemset_store(store, basket_matrix(lines), min_support)
+        assert reason == expected_reason
+        assert_same_itemsets(updated, lines, min_support)
+
+def test_mine_itemsets_incrementally(order_lines, tmp_path, capsys):
+    store_dir = str(tmp_path / 'itemset_store')
+
+    first = mine_itemsets_incrementally(basket_matrix(first_orders(order_lines, 799)), 0.05, store_dir)
+    second = mine_itemsets_incrementally(basket_matrix(order_lines), 0.05, store_dir)
+
+    output = capsys.readouterr().out
+    assert 'Mined the itemsets of 799 orders in full: no itemset store.' in output
+    assert 'Updated the itemset store with 1 new orders.' in output
+    assert len(read_itemset_store(store_dir)['orders']) == 800
+    for itemsets, df in [(first, first_orders(order_lines, 799)), (second, order_lines)]:
+        expected = mine_frequent_itemsets(df, 0.05)
+        assert itemsets['itemsets'].tolist() == expected['itemsets'].tolist()
+        assert itemsets['support'].tolist() == expected['support'].tolist()
@@ -0,0 +1,104 @@
+'''
+test_eclat_matches_mlxtend:
+    -Purpose: Verify that eclat finds the same frequent itemsets and supports as mlxtend's apriori and fpgrowth.
+    -Setup: Generate random baskets over 30 products and mine them at several minimum supports.
+    -Assertion: Check that the itemsets and supports equal apriori's, in the same order, and fpgrowth's as a set.
+
+test_eclat_max_len:
+    -Purpose: Verify that eclat stops growing itemsets at max_len.
+    -Setup: Mine baskets where three products are always bought together.
+    -Assertion: Check that no itemset has more than two products and that every pair is found.
+
+test_eclat_builds_frequent_bitsets_only:
+    -Purpose: Verify that eclat only builds the order bitsets of the products reaching the minimum support.
+    -Setup: Wrap item_bitsets while mining random baskets at 0.05.
+    -Assertion: Check that the bitsets have one row per frequent product.
+
+test_association_rules_match_mlxtend:
+    -Purpose: Verify that association_rules gives the same rules and metrics as mlxtend's association_rules.
+    -Setup: Generate rules from the frequent itemsets of random baskets, filtered on confidence and on lift.
+    -Assertion: Check that both give the same rules with the same values of every metric column.
+'''
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+from mlxtend.frequent_patterns import apriori, fpgrowth
+from mlxtend.frequent_patterns import association_rules as mlxtend_association_rules
+from unittest.mock import patch
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from models.basket import basket_matrix, build_basket
+import models.itemsets
+from models.itemsets import eclat, association_rules, RULE_METRICS
+
+@pytest.fixture
+def order_lines():
+    rng = np.random.default_rng(7)
+    weights = rng.dirichlet(np.full(30, 0.3))
+    lines = []
+    for order in range(400):
+        size = rng.integers(1, 6)
+        for product in rng.choice(30, size=size, p=weights):
+            lines.append({'ecom_reference_order_number': f"{order:04d}", 'product_name': f"product {product:02d}"})
+    return pd.DataFrame(lines)
+
+def rules_by_key(rules):
+    return {(antecedent, consequent): tuple(values)
+            for antecedent, consequent, values in zip(rules['antecedents'], rules['consequents'], rules[RULE_METRICS].to_numpy(float))}
+
+@pytest.mark.parametrize('min_support', [0.2, 0.05, 0.01])
+def test_eclat_matches_mlxtend(order_lines, min_support):
+    matrix, _, products = basket_matrix(order_lines)
+    basket = build_basket(order_lines, sparse_columns=False)
+
+    itemsets = eclat(matrix, products, min_support)
+    expected = apriori(basket, min_support=min_support, use_colnames=True)
+
+    assert itemsets['itemsets'].tolist() == expected['itemsets'].tolist()
+    assert itemsets['support'].tolist() == expected['support'].tolist()
+    fpgrowth_itemsets = fpgrowth(basket, min_support=min_support, use_colnames=True)
+    assert dict(zip(itemsets['itemsets'], itemsets['support'])) == dict(zip(fpgrowth_itemsets['itemsets'], fpgrowth_itemsets['support']))
+
+def test_eclat_max_len():
+    order_lines = pd.DataFrame({
+        'ecom_reference_order_number': ['1', '1', '1', '2', '2', '2', '3'],
+        'product_name': ['Soap', 'Shampoo', 'Cream', 'Soap', 'Shampoo', 'Cream', 'Soap'],
+    })
+    matrix, _, products = basket_matrix(order_lines)
+
+    itemsets = eclat(matrix, products, min_support=0.5, max_len=2)
+
+    assert itemsets['itemsets'].map(len).max() == 2
+    assert set(itemsets['itemsets']) == {
+        frozenset(['Cream']), frozenset(['Shampoo']), frozenset(['Soap']),
+        frozenset(['Cream', 'Shampoo']), frozenset(['Cream', 'Soap']), frozenset(['Shampoo', 'Soap']),
+    }
+    assert dict(zip(itemsets['itemsets'], itemsets['support']))[frozenset(['Soap'])] == 1.0
+
+def test_eclat_builds_frequent_bitsets_only(order_lines):
+    matrix, _, products = basket_matrix(order_lines)
+    frequent_products = int((np.asarray(matrix.sum(axis=0)).ravel() / matrix.shape[0] >= 0.05).sum())
+
+    with patch('models.itemsets.item_bitsets', wraps=models.itemsets.item_bitsets) as mock_item_bitsets:
+        eclat(matrix, products, 0.05)
+
+    assert 0 < frequent_products < len(products)
+    assert mock_item_bitsets.call_args[0][0].shape == (matrix.shape[0], frequent_products)
+
+@pytest.mark.parametrize('metric, min_threshold', [('confidence', 0.3), ('lift', 1.0)])
+def test_association_rules_match_mlxtend(order_lines, metric, min_threshold):
+    matrix, _, products = basket_matrix(order_lines)
+    itemsets = eclat(matrix, products, 0.01)
+
+    rules = association_rules(itemsets, metric=metric, min_threshold=min_threshold)
+    expected = mlxtend_association_rules(itemsets, metric=metric, min_threshold=min_threshold)
+
+    assert list(rules.columns) == ['antecedents', 'consequents'] + RULE_METRICS
+    assert len(rules) > 0
+    assert rules_by_key(rules) == rules_by_key(expected)
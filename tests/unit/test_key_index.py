@@ -0,0 +1,73 @@
+'''
+test_key_index_round_trip:
+    -Purpose: Verify that write_key_index saves the AWB and order_number of every ECOM order, with the AWB as text.
+    -Setup: Write the key index of a transformed ECOM DataFrame with a numeric AWB, a missing AWB and a duplicated row.
+    -Assertion: Check that read_key_index gives back one row per order with text AWBs and the missing AWB kept.
+
+test_lookup_keys:
+    -Purpose: Verify that lookup_keys matches keys the way a left merge does, keeping the first value of a duplicated key.
+    -Setup: Probe a key index holding a duplicated AWB and a missing AWB with matching, unmatched and missing keys.
+    -Assertion: Check the value returned for every key and that the index of the input is kept.
+
+test_enrichment_with_key_index:
+    -Purpose: Verify that the Aramex and Cosmaline enrichment steps give the same result with the key index as with the full ECOM data.
+    -Setup: Build the key index of a transformed ECOM DataFrame and enrich Aramex and Cosmaline rows with both.
+    -Assertion: Check that both enrichments match.
+'''
+
+import pandas as pd
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from key_index import build_key_index, write_key_index, read_key_index, lookup_keys
+from transform import add_order_number_Aramex_Data, add_AWB_Cosmaline_Data
+
+ecom_data = pd.DataFrame({
+    'order_number': ['1001', '1002', '1003', '1001'],
+    'shipper_name': pd.Categorical(['Aramex', 'Aramex', 'Cosmaline', 'Aramex']),
+    'amount': [10.0, 20.0, 30.0, 10.0],
+    'AWB': [111, '222', None, 111],
+})
+
+def test_key_index_round_trip(tmp_path):
+    path = str(tmp_path / 'ecom_key_index.parquet')
+
+    assert write_key_index(ecom_data, path) == 3
+
+    result = read_key_index(path)
+    assert list(result.columns) == ['AWB', 'order_number']
+    assert result['order_number'].tolist() == ['1001', '1002', '1003']
+    assert result['AWB'].tolist() == ['111', '222', None]
+
+def test_lookup_keys():
+    index = pd.DataFrame({
+        'AWB': ['111', '222', '111', None],
+        'order_number': ['1001', '1002', '1004', '1003'],
+    })
+    values = pd.Series(['222', '111', '999', None], index=[5, 6, 7, 8])
+
+    result = lookup_keys(values, index, 'AWB', 'order_number')
+
+    assert result.index.tolist() == [5, 6, 7, 8]
+    assert result.iloc[:2].tolist() == ['1002', '1001']
+    assert result.iloc[2:].isna().all()
+
+def test_enrichment_with_key_index():
+    key_index = build_key_index(ecom_data.drop_duplicates())
+    aramex_data = pd.DataFrame({'AWB': ['222', '111', '333'], 'CODAmount': [1.0, 2.0, 3.0]})
+    cosmaline_data = pd.DataFrame({'order_number': ['1003', '1002', '1009'], 'O_CODAmount': [4.0, 5.0, 6.0]})
+
+    pd.testing.assert_frame_equal(
+        add_order_number_Aramex_Data(aramex_data.copy(), key_index),
+        add_order_number_Aramex_Data(aramex_data.copy(), ecom_data.drop_duplicates()),
+    )
+    pd.testing.assert_frame_equal(
+        add_AWB_Cosmaline_Data(cosmaline_data.copy(), key_index),
+        add_AWB_Cosmaline_Data(cosmaline_data.copy(), ecom_data.drop_duplicates()),
+    )
+    order_numbers = add_order_number_Aramex_Data(aramex_data.copy(), key_index)['order_number']
+    assert order_numbers.iloc[:2].tolist() == ['1002', '1001'] and pd.isna(order_numbers.iloc[2])
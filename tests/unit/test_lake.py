@@ -0,0 +1,78 @@
+'''
+test_write_and_read_partitions:
+    -Purpose: Verify that write_partitions splits an output by the date of its business date column and read_partitions reads it back.
+    -Setup: Write an output spanning three days, one row without a date, into the lake.
+    -Assertion: Check that every day gets its own partition and that all the rows are read back with their business date.
+
+test_read_partitions_filters:
+    -Purpose: Verify that read_partitions only returns the rows of the requested dates and filter.
+    -Setup: Write an output spanning three days into the lake.
+    -Assertion: Check the rows read for a date range, for a column filter and for a missing source.
+
+test_write_partitions_keeps_history:
+    -Purpose: Verify that writing an output again only replaces the partitions of the dates it holds.
+    -Setup: Write an output spanning three days, then a corrected output for the last day only.
+    -Assertion: Check that the first two days are kept and the last one is replaced.
+'''
+
+import pytest
+import pandas as pd
+import pyarrow.dataset as ds
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from lake import write_partitions, read_partitions, source_dir
+
+def write_output(path, order_numbers, created_at, amounts):
+    pd.DataFrame({
+        'order_number': order_numbers,
+        'created_at': pd.to_datetime(created_at),
+        'amount': amounts,
+    }).to_parquet(path, index=False)
+
+def test_write_and_read_partitions(tmp_path):
+    output = str(tmp_path / 'ecom.parquet')
+    lake_dir = str(tmp_path / 'lake')
+    write_output(output, ['1', '2', '3', '4'], ['2024-01-01 10:00', '2024-01-01 18:00', '2024-01-02 09:00', None], [10.0, 20.0, 30.0, 40.0])
+
+    write_partitions(output, lake_dir, 'ecom_orders', 'created_at')
+
+    partitions = sorted(os.listdir(source_dir(lake_dir, 'ecom_orders')))
+    assert partitions == ['business_date=2024-01-01', 'business_date=2024-01-02', 'business_date=__HIVE_DEFAULT_PARTITION__']
+    df = read_partitions(lake_dir, 'ecom_orders').sort_values('order_number', ignore_index=True)
+    assert df['order_number'].tolist() == ['1', '2', '3', '4']
+    assert df['business_date'].astype(str).tolist()[:3] == ['2024-01-01', '2024-01-01', '2024-01-02']
+    assert df['business_date'].isna().tolist() == [False, False, False, True]
+
+def test_read_partitions_filters(tmp_path):
+    output = str(tmp_path / 'ecom.parquet')
+    lake_dir = str(tmp_path / 'lake')
+    write_output(output, ['1', '2', '3'], ['2024-01-01', '2024-01-02', '2024-01-03'], [10.0, 20.0, 30.0])
+    write_partitions(output, lake_dir, 'ecom_orders', 'created_at')
+
+    df = read_partitions(lake_dir, 'ecom_orders', start='2024-01-02', end='2024-01-03', columns=['order_number'])
+    assert sorted(df['order_number']) == ['2', '3']
+    assert list(df.columns) == ['order_number']
+
+    df = read_partitions(lake_dir, 'ecom_orders', end='2024-01-02', filter=ds.field('amount') > 15)
+    assert df['order_number'].tolist() == ['2']
+
+    with pytest.raises(FileNotFoundError):
+        read_partitions(lake_dir, 'credit_card')
+
+def test_write_partitions_keeps_history(tmp_path):
+    output = str(tmp_path / 'ecom.parquet')
+    lake_dir = str(tmp_path / 'lake')
+    write_output(output, ['1', '2', '3'], ['2024-01-01', '2024-01-02', '2024-01-03'], [10.0, 20.0, 30.0])
+    write_partitions(output, lake_dir, 'ecom_orders', 'created_at')
+
+    write_output(output, ['3', '5'], ['2024-01-03', '2024-01-03'], [35.0, 50.0])
+    write_partitions(output, lake_dir, 'ecom_orders', 'created_at')
+
+    df = read_partitions(lake_dir, 'ecom_orders').sort_values('order_number', ignore_index=True)
+    assert df['order_number'].tolist() == ['1', '2', '3', '5']
+    assert df['amount'].tolist() == [10.0, 20.0, 35.0, 50.0]
@@ -0,0 +1,69 @@
+'''
+test_product_dictionary:
+    -Purpose: Verify that products are numbered in name order, as the columns of the basket matrix.
+    -Setup: Build the product dictionary of the basket matrix of order lines with unsorted products and a missing product.
+    -Assertion: Check the IDs and names of the dictionary.
+
+test_encode_and_drop_duplicate_rules:
+    -Purpose: Verify that rules are stored as sorted ID arrays and compared on their integer keys.
+    -Setup: Encode rules over product IDs, one of them twice with its items in another order.
+    -Assertion: Check the encoded arrays, the keys and that only the first of the duplicate rules is kept.
+
+test_rules_to_table:
+    -Purpose: Verify that encoded rules read back from Parquet give the rows of the rule tables.
+    -Setup: Generate the FP-Growth rules of order lines, write them to Parquet and read them back.
+    -Assertion: Check the columns, the product names joined in name order, and the rounded and infinite metrics.
+'''
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from models.rule_table import product_dictionary, encode_rules, rule_keys, drop_duplicate_rules, rules_to_table
+from models.itemsets import RULE_METRICS
+from models.basket import basket_matrix
+from models.generate_fpgrowth import generate_fpgrowth_results
+from pipeline_steps import RULE_COLUMNS
+
+def test_product_dictionary():
+    df = pd.DataFrame({'ecom_reference_order_number': ['1', '1', '2', '3'], 'product_name': ['serum', 'balsam', None, 'mask']})
+
+    products = product_dictionary(basket_matrix(df)[2])
+
+    assert products['product_id'].tolist() == [0, 1, 2]
+    assert products['product_name'].tolist() == ['balsam', 'mask', 'serum']
+
+def test_encode_and_drop_duplicate_rules():
+    rules = pd.DataFrame({'antecedents': [frozenset({3, 1}), frozenset({2}), frozenset({1, 3})],
+                          'consequents': [frozenset({2}), frozenset({1, 3}), frozenset({2})]})
+    for name in RULE_METRICS:
+        rules[name] = [0.5, 0.4, 0.3]
+
+    encoded = encode_rules(rules)
+
+    assert [array.tolist() for array in encoded['antecedents']] == [[1, 3], [2], [1, 3]]
+    assert encoded['antecedents'].iloc[0].dtype == np.int32
+    assert rule_keys(encoded).tolist() == [((1, 3), (2,)), ((2,), (1, 3)), ((1, 3), (2,))]
+    assert drop_duplicate_rules(encoded)['support'].tolist() == [0.5, 0.4]
+
+def test_rules_to_table(tmp_path):
+    lines = [('1', 'serum'), ('1', 'balsam'), ('1', 'mask'), ('2', 'serum'), ('2', 'balsam'), ('2', 'mask'),
+             ('3', 'serum'), ('3', 'balsam'), ('4', 'shampoo'), ('5', 'shampoo'), ('5', 'mask')]
+    df = pd.DataFrame(lines, columns=['ecom_reference_order_number', 'product_name'])
+    path = str(tmp_path / 'fpgrowth_results.parquet')
+    generate_fpgrowth_results(df).to_parquet(path, index=False)
+
+    table = rules_to_table(pd.read_parquet(path), product_dictionary(basket_matrix(df)[2]))
+
+    assert table.columns.tolist() == RULE_COLUMNS
+    rule = table[(table['antecedents'] == 'mask, serum') & (table['consequents'] == 'balsam')].iloc[0]
+    assert rule['support'] == 0.4
+    assert rule['lift'] == round(1.0 / 0.6, 3)
+    # Always right, so its infinite conviction is stored as 0
+    assert rule['conviction'] == 0
+    assert ('balsam, serum', 'mask') in set(zip(table['antecedents'], table['consequents']))
@@ -0,0 +1,84 @@
+'''
+test_arrow_schema:
+    -Purpose: Verify that arrow_schema stages a source with the dtype, nullable flag and parse format declared in SOURCE_SCHEMAS.
+    -Setup: Build the Arrow schema of the Credit Card source.
+    -Assertion: Check the types, the nullable flags and the parse format carried in the metadata of the date field.
+
+test_staging_table_schema:
+    -Purpose: Verify that the staging table DDL is derived from the canonical columns of the registry.
+    -Setup: Build the declaration of the Credit Card staging table.
+    -Assertion: Check that the canonical names, SQL types, the row_hash column and its index are declared.
+
+test_staged_sheet_is_read_with_declared_dtypes:
+    -Purpose: Verify that a sheet staged with its registry schema is read back with the dtypes the transform stage expects.
+    -Setup: Stage a raw Oracle chunk holding text dates and Python numbers, read it back, then convert it with convert_data_types.
+    -Assertion: Check that the dtypes, categoricals included, already match the registry so no column has to be converted again.
+'''
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import sys
+import os
+from sqlalchemy import String, DateTime, Float
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from schemas import SOURCE_SCHEMAS, arrow_schema, staging_table_schema
+from staging import write_staged_data, read_staged_data
+from transform import convert_data_types
+
+def column_data(values):
+    # The codes of a categorical column are its data; converting it to numpy would build a new array
+    return values.cat.codes.to_numpy() if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy()
+
+def test_arrow_schema():
+    schema = arrow_schema('Collected - Credit Card')
+    assert schema.names == ['Value_date', 'Narrative', 'Amount', 'Currency']
+    assert schema.field('Value_date').type == pa.timestamp('ns')
+    assert schema.field('Amount').type == pa.float32()
+    assert schema.field('Value_date').metadata == {b'parse_format': b'ISO8601'}
+    assert not any(field.nullable for field in schema)
+
+def test_staging_table_schema():
+    declaration = staging_table_schema('Collected - Credit Card')
+    columns = [(name, type(sql_type), getattr(sql_type, 'length', None)) for name, sql_type in declaration['columns']]
+    assert columns == [
+        ('value_date', DateTime, None),
+        ('narrative', String, 255),
+        ('amount', Float, None),
+        ('currency', String, 10),
+        ('row_hash', String, 32),
+    ]
+    assert declaration['indexes'] == [['row_hash']]
+
+def test_staged_sheet_is_read_with_declared_dtypes(tmp_path):
+    raw = pd.DataFrame({
+        'OPERATING_UNIT_NAME': ['Unit1'],
+        'ORACLE_REFERENCE_ORDER_NUMBER': [467],
+        'ECOM_REFERENCE_ORDER_NUMBER': [400406],
+        'ORDER_TYPE': ['S'],
+        'ORDER_TYPE_NAME': ['POS'],
+        'ORDERED_ITEM': ['C0003751'],
+        'ORDERED_QUANTITY': [1],
+        'PRICING_QUANTITY_UOM': ['Pcs'],
+        'UNIT_SELLING_PRICE (after discount without vat)': [6.422],
+        'UNIT_LIST_PRICE( original price before discount without vat)': [7],
+        'ORDERED_DATE': ['2024-03-05 00:00:00'],
+        'CUSTOMER_NAME': ['E-commerce'],
+        'TAX_CODE': ['VAT'],
+    })
+    path = str(tmp_path / 'oracle_data.arrow')
+    write_staged_data(raw, path, arrow_schema('Oracle Data'))
+    staged = read_staged_data(path)
+    expected_dtypes = {spec['name']: spec['dtype'] for spec in SOURCE_SCHEMAS['Oracle Data']['fields']}
+    assert {column: str(dtype) for column, dtype in staged.dtypes.items()} == expected_dtypes
+    assert staged.loc[0, 'ECOM_REFERENCE_ORDER_NUMBER'] == '400406'
+
+    # Columns already holding their declared dtype are not converted again
+    columns_before = {column: column_data(staged[column]) for column in staged.columns}
+    result = convert_data_types(staged, 'Oracle Data')
+    assert all(np.shares_memory(column_data(result[column]), columns_before[column]) for column in result.columns)
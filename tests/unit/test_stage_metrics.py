@@ -0,0 +1,129 @@
+'''
+test_instrument_records_metrics:
+    -Purpose: Verify that instrument appends the timings and the rows and bytes read and written by a task.
+    -Setup: Decorate a task converting a staged Arrow file to Parquet, and a load task returning its row count.
+    -Assertion: Check the returned values and every field of the two records in the metrics file.
+
+test_instrument_records_failures:
+    -Purpose: Verify that a failed or skipped task is recorded with its status and still raises.
+    -Setup: Decorate a task raising a ValueError and a task raising an exception named AirflowSkipException.
+    -Assertion: Check that both exceptions propagate and that the records have the failed and skipped statuses.
+
+test_instrument_records_peak_rss_of_each_task:
+    -Purpose: Verify that the peak RSS of a task is its own, and not the peak an earlier task of the same process reached.
+    -Setup: Run a task filling a large array, then a task allocating nothing, in the same process.
+    -Assertion: Check that the second task records a peak well under that of the first.
+
+test_summarize_metrics:
+    -Purpose: Verify that summarize_metrics ranks the tasks by their median wall time across runs.
+    -Setup: Build the metrics of three runs of three tasks, one of them failed.
+    -Assertion: Check the order, run counts, medians and throughput of the summary, and the filter on the last runs.
+'''
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from stage_metrics import instrument, read_metrics, summarize_metrics
+
+class AirflowSkipException(Exception):
+    pass
+
+def test_instrument_records_metrics(tmp_path, monkeypatch):
+    monkeypatch.setenv('ETL_RUN_ID', 'run-1')
+    metrics_file = str(tmp_path / 'metrics.jsonl')
+    staged = str(tmp_path / 'staged.arrow')
+    output = str(tmp_path / 'output.parquet')
+    table = pa.table({'order_number': ['1', '2', '3'], 'amount': [10.0, 20.0, 30.0]})
+    with pa.OSFile(staged, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=2)
+
+    @instrument('transform', metrics_file, inputs=[staged], outputs=[output])
+    def transform_task():
+        df = pa.ipc.open_file(staged).read_pandas()
+        df[df['amount'] > 10].to_parquet(output, index=False)
+
+    @instrument('load', metrics_file, inputs=[output])
+    def load_task():
+        return len(pd.read_parquet(output))
+
+    assert transform_task() is None
+    assert load_task() == 2
+    assert transform_task.__name__ == 'transform_task'
+
+    transform_record, load_record = read_metrics(metrics_file).to_dict('records')
+    assert transform_record['run_id'] == 'run-1'
+    assert (transform_record['stage'], transform_record['task'], transform_record['status']) == ('transform', 'transform_task', 'success')
+    assert (transform_record['rows_in'], transform_record['rows_out']) == (3, 2)
+    assert transform_record['bytes_in'] == os.path.getsize(staged)
+    assert transform_record['bytes_out'] == os.path.getsize(output)
+    assert transform_record['wall_seconds'] >= 0 and transform_record['cpu_seconds'] >= 0 and transform_record['peak_rss_mb'] > 0
+    assert (load_record['stage'], load_record['rows_in'], load_record['rows_out']) == ('load', 2, 2)
+    assert pd.isna(load_record['bytes_out'])
+
+def test_instrument_records_failures(tmp_path):
+    metrics_file = str(tmp_path / 'metrics.jsonl')
+
+    @instrument('reconciliation', metrics_file)
+    def failing_task():
+        raise ValueError('bad data')
+
+    @instrument('load', metrics_file)
+    def skipped_task():
+        raise AirflowSkipException('unchanged')
+
+    with pytest.raises(ValueError):
+        failing_task()
+    with pytest.raises(AirflowSkipException):
+        skipped_task()
+
+    df = read_metrics(metrics_file)
+    assert df['status'].tolist() == ['failed', 'skipped']
+    assert df['error'].tolist() == ['ValueError: bad data', 'AirflowSkipException: unchanged']
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='the current RSS is read from /proc')
+def test_instrument_records_peak_rss_of_each_task(tmp_path):
+    metrics_file = str(tmp_path / 'metrics.jsonl')
+
+    @instrument('transform', metrics_file)
+    def large_task():
+        return int(np.ones(400 * 2 ** 20, dtype=np.uint8).sum())
+
+    @instrument('load', metrics_file)
+    def small_task():
+        return 1
+
+    large_task()
+    small_task()
+
+    large_record, small_record = read_metrics(metrics_file).to_dict('records')
+    assert small_record['peak_rss_mb'] < large_record['peak_rss_mb'] - 200
+
+def test_summarize_metrics():
+    records = []
+    for run in range(3):
+        started_at = pd.Timestamp('2024-01-01') + pd.Timedelta(days=run)
+        for task, stage, wall_seconds in [('extract_all_data', 'extract', 1.0 + run), ('transform_ecom_data', 'transform', 10.0 + run), ('load_ecom_data', 'load', 4.0)]:
+            records.append({'run_id': f"run-{run}", 'stage': stage, 'task': task, 'started_at': started_at, 'status': 'success',
+                            'wall_seconds': wall_seconds, 'cpu_seconds': wall_seconds / 2, 'peak_rss_mb': 100.0 * (run + 1),
+                            'rows_in': 1000, 'rows_out': 900})
+    records[-1]['status'] = 'failed'
+    df = pd.DataFrame(records)
+
+    summary = summarize_metrics(df, top=2)
+    assert summary['task'].tolist() == ['transform_ecom_data', 'load_ecom_data']
+    assert summary['runs'].tolist() == [3, 2]
+    assert summary['median_wall_seconds'].tolist() == [11.0, 4.0]
+    assert summary['max_peak_rss_mb'].tolist() == [300.0, 200.0]
+    assert summary['rows_per_second'].iloc[0] == pytest.approx(3000 / 33.0)
+
+    last_run = summarize_metrics(df, last_runs=1, successful_only=False)
+    assert last_run['runs'].tolist() == [1, 1, 1]
+    assert last_run['median_wall_seconds'].tolist() == [12.0, 4.0, 3.0]
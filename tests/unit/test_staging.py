@@ -0,0 +1,148 @@
+'''
+test_conform_to_schema:
+    -Purpose: Verify that conform_to_schema converts raw sheet values to the declared Arrow types.
+    -Setup: Create a DataFrame with numeric identifiers, text dates, an unparseable amount and an undeclared column.
+    -Assertion: Check that identifiers become text without a trailing '.0', dates become timestamps, bad values become nulls and undeclared columns are dropped.
+
+test_conform_to_schema_integer_fields:
+    -Purpose: Verify that numbers an integer field cannot hold are reported and stored as nulls instead of failing the conversion.
+    -Setup: Conform a DataFrame with a fraction and a value beyond the int32 range to an int32 field.
+    -Assertion: Check that both values become nulls, that the valid values are kept and that the lost values are reported.
+
+test_write_and_read_staged_chunks:
+    -Purpose: Verify that chunks written with write_staged_chunks are read back with their declared types by read_staged_data.
+    -Setup: Write two chunks with a declared schema to a temporary Arrow file.
+    -Assertion: Check that the rows of both chunks are read back in order with the declared dtypes.
+
+test_write_staged_chunks_without_rows:
+    -Purpose: Verify that a source without rows still produces a readable staged file.
+    -Setup: Write an empty chunk with a declared schema.
+    -Assertion: Check that an empty DataFrame with the declared columns is read back.
+
+test_read_staged_categorical_columns:
+    -Purpose: Verify that fields declared as categorical are read back as pandas categoricals.
+    -Setup: Write two chunks with different values to a staged file whose schema marks a field as categorical.
+    -Assertion: Check that the column is categorical, holds the values of both chunks and keeps missing values.
+
+test_iter_staged_batches:
+    -Purpose: Verify that iter_staged_batches reads a staged file back in the chunks it was written in.
+    -Setup: Write two chunks to a staged file, and an empty one to another.
+    -Assertion: Check that each chunk is read back on its own with its declared types, and that a file without rows yields one empty chunk.
+
+test_write_parquet_parts:
+    -Purpose: Verify that write_parquet_parts writes chunks as Parquet parts read back as a single DataFrame.
+    -Setup: Write a first chunk with an empty text column and few categories, then a chunk with many categories, over an existing file.
+    -Assertion: Check that the parts replace the file and read back as one DataFrame with the categorical column intact.
+'''
+
+import pytest
+import pandas as pd
+import pyarrow as pa
+import sys
+import os
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from staging import conform_to_schema, write_staged_chunks, write_staged_data, read_staged_data, iter_staged_batches, write_parquet_parts
+
+schema = pa.schema([
+    ('OrderNo', pa.string()),
+    ('Driver_Delivery_date', pa.timestamp('ns')),
+    ('Amount', pa.float64()),
+])
+
+def test_conform_to_schema():
+    input_data = pd.DataFrame({
+        'OrderNo': [391370, 391371.0, 'A-12'],
+        'Driver_Delivery_date': ['2024-01-31', pd.Timestamp('2024-02-01'), None],
+        'Amount': [41.575, 'n/a', 3],
+        'Unnamed': [None, None, None],
+    })
+    result = conform_to_schema(input_data, schema).to_pandas()
+    expected_output = pd.DataFrame({
+        'OrderNo': ['391370', '391371', 'A-12'],
+        'Driver_Delivery_date': pd.to_datetime(['2024-01-31', '2024-02-01', None]),
+        'Amount': [41.575, None, 3.0],
+    })
+    pd.testing.assert_frame_equal(result, expected_output)
+
+def test_conform_to_schema_integer_fields(capsys):
+    input_data = pd.DataFrame({'ORDERED_QUANTITY': [1, 2.5, 3e10, '4', None]})
+
+    result = conform_to_schema(input_data, pa.schema([('ORDERED_QUANTITY', pa.int32())]))
+
+    assert result.column('ORDERED_QUANTITY').to_pylist() == [1, None, None, 4, None]
+    assert 'Could not convert 2 values of ORDERED_QUANTITY to int32' in capsys.readouterr().out
+
+def test_write_and_read_staged_chunks(tmp_path):
+    path = str(tmp_path / 'cosmaline_data.arrow')
+    chunks = [
+        pd.DataFrame({'OrderNo': [1, 2], 'Driver_Delivery_date': ['2024-01-01', '2024-01-02'], 'Amount': [1.5, 2.5]}),
+        pd.DataFrame({'OrderNo': [3], 'Driver_Delivery_date': ['2024-01-03'], 'Amount': [3.5]}),
+    ]
+    assert write_staged_chunks(iter(chunks), path, schema) == 3
+
+    result = read_staged_data(path)
+    expected_output = pd.DataFrame({
+        'OrderNo': ['1', '2', '3'],
+        'Driver_Delivery_date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'Amount': [1.5, 2.5, 3.5],
+    })
+    pd.testing.assert_frame_equal(result, expected_output)
+    pd.testing.assert_frame_equal(read_staged_data(path, columns=['Amount']), expected_output[['Amount']])
+
+def test_write_staged_chunks_without_rows(tmp_path):
+    path = str(tmp_path / 'credit_card_data.arrow')
+    empty = pd.DataFrame(columns=['OrderNo', 'Driver_Delivery_date', 'Amount'])
+    assert write_staged_data(empty, path, schema) == 0
+
+    result = read_staged_data(path)
+    assert list(result.columns) == ['OrderNo', 'Driver_Delivery_date', 'Amount']
+    assert result.empty
+
+def test_read_staged_categorical_columns(tmp_path):
+    path = str(tmp_path / 'ecom_data.arrow')
+    categorical_schema = pa.schema([pa.field('Currency', pa.string(), metadata={'pandas_dtype': 'category'})])
+    chunks = [pd.DataFrame({'Currency': ['USD', 'LBP']}), pd.DataFrame({'Currency': [None, 'EUR']})]
+    write_staged_chunks(iter(chunks), path, categorical_schema)
+
+    result = read_staged_data(path)
+    assert isinstance(result['Currency'].dtype, pd.CategoricalDtype)
+    assert result['Currency'].tolist()[:2] == ['USD', 'LBP']
+    assert pd.isna(result['Currency'][2])
+    assert result['Currency'][3] == 'EUR'
+
+def test_iter_staged_batches(tmp_path):
+    path = str(tmp_path / 'cosmaline_data.arrow')
+    chunks = [
+        pd.DataFrame({'OrderNo': [1, 2], 'Driver_Delivery_date': ['2024-01-01', '2024-01-02'], 'Amount': [1.5, 2.5]}),
+        pd.DataFrame({'OrderNo': [3], 'Driver_Delivery_date': ['2024-01-03'], 'Amount': [3.5]}),
+    ]
+    write_staged_chunks(iter(chunks), path, schema)
+
+    batches = list(iter_staged_batches(path, columns=['OrderNo', 'Amount']))
+    assert [len(batch) for batch in batches] == [2, 1]
+    pd.testing.assert_frame_equal(batches[1], pd.DataFrame({'OrderNo': ['3'], 'Amount': [3.5]}))
+
+    empty_path = str(tmp_path / 'empty.arrow')
+    write_staged_data(pd.DataFrame(columns=['OrderNo', 'Driver_Delivery_date', 'Amount']), empty_path, schema)
+    batches = list(iter_staged_batches(empty_path))
+    assert len(batches) == 1 and batches[0].empty
+    assert list(batches[0].columns) == ['OrderNo', 'Driver_Delivery_date', 'Amount']
+
+def test_write_parquet_parts(tmp_path):
+    path = str(tmp_path / 'transformed_ecom_data.parquet')
+    pd.DataFrame({'stale': [1]}).to_parquet(path)
+    chunks = [
+        pd.DataFrame({'currency': pd.Categorical(['USD', 'LBP']), 'AWB': [None, None]}),
+        pd.DataFrame({'currency': pd.Categorical([f'C{i}' for i in range(300)]), 'AWB': ['A'] * 300}),
+    ]
+    assert write_parquet_parts(iter(chunks), path) == 302
+
+    result = pd.read_parquet(path)
+    assert list(result.columns) == ['currency', 'AWB']
+    assert isinstance(result['currency'].dtype, pd.CategoricalDtype)
+    assert result['currency'].tolist() == ['USD', 'LBP'] + [f'C{i}' for i in range(300)]
+    assert result['AWB'].isna().sum() == 2
@@ -16,10 +16,26 @@ test_update_cod_currency_Aramex_data:
 
 test_clean_tokens_by_date_Aramex_Data:
     -Purpose: Verify that the function ensures each unique date has the same
+
+test_clean_tokens_by_date_Aramex_Data_matches_groupby_apply:
+    -Purpose: Verify that the vectorized function gives exactly the output of the previous groupby-apply implementation.
+    -Setup: Create a shuffled DataFrame with tied token counts, missing tokens and missing dates, and the previous implementation.
+    -Assertion: Check that both outputs are identical, including the row order and the smallest token winning ties.
+
+test_categorical_Aramex_columns:
+    -Purpose: Verify that the Aramex steps keep categorical CODCurrency and TOKENNO columns categorical.
+    -Setup: Create categorical currencies without an LBP category and categorical tokens whose categories are not in sorted order.
+    -Assertion: Check that LBP is added as a category, that token ties still go to the smallest token and that concatenation unions the categories.
+
+test_tokens_by_date_in_two_phases:
+    -Purpose: Verify that counting tokens chunk by chunk and then applying the mode of every date gives the rows the tokens of clean_tokens_by_date_Aramex_Data.
+    -Setup: Split a shuffled DataFrame with tied token counts, missing tokens and missing dates into chunks.
+    -Assertion: Check that the concatenated chunks hold the same rows as the single-pass output.
 '''
 
 import pytest
 import pandas as pd
+import numpy as np
 import sys
 import os
 from pandas.testing import assert_frame_equal
@@ -33,6 +49,9 @@ from transform import (
     rename_columns_for_website_Aramex_data,
     update_cod_currency_Aramex_data,
     clean_tokens_by_date_Aramex_Data,
+    count_tokens_by_date,
+    mode_tokens_by_date,
+    apply_tokens_by_date,
     add_order_number_Aramex_Data,
     convert_data_types_aramex_cosmaline,
     concatenate_Aramex_Cosmaline,
@@ -57,7 +76,7 @@ def test_convert_data_types_Aramex_Data():
         'CODAmount': 'float64',
         'O_CODAmount': 'float64',
         'Aramex_Inv_date': 'datetime64[ns]',
-        'TOKENNO': 'object'
+        'TOKENNO': 'category'
     })
     result = convert_data_types_Aramex_Data(input_data)
     assert result.equals(expected_output)
@@ -95,6 +114,36 @@ def test_clean_tokens_by_date_Aramex_Data():
     result = clean_tokens_by_date_Aramex_Data(input_data, 'Aramex_Inv_date', 'TOKENNO')
     assert result.equals(expected_output)
 
+def test_clean_tokens_by_date_Aramex_Data_matches_groupby_apply():
+    def clean_tokens_with_groupby_apply(df, date_column, token_column):
+        def replace_with_mode(group):
+            group[token_column] = group[token_column].mode()[0]
+            return group
+        return df.groupby(date_column).apply(replace_with_mode).reset_index(drop=True)
+
+    rng = np.random.default_rng(0)
+    size = 2000
+    input_data = pd.DataFrame({
+        'Aramex_Inv_date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 60, size), unit='D'),
+        'TOKENNO': rng.choice(['1111', '2222', '3333', '4444'], size).astype(object),
+        'CODAmount': rng.uniform(0, 100, size),
+    })
+    input_data.loc[rng.random(size) < 0.05, 'TOKENNO'] = np.nan
+    input_data.loc[rng.random(size) < 0.05, 'Aramex_Inv_date'] = pd.NaT
+    # A date whose tokens are tied gets the smallest one
+    tied_dates = pd.DataFrame({
+        'Aramex_Inv_date': pd.to_datetime(['2023-06-01'] * 4),
+        'TOKENNO': ['2222', '1111', '2222', '1111'],
+        'CODAmount': [1.0, 2.0, 3.0, 4.0],
+    })
+    input_data = pd.concat([input_data, tied_dates], ignore_index=True)
+
+    expected_output = clean_tokens_with_groupby_apply(input_data.copy(), 'Aramex_Inv_date', 'TOKENNO')
+    result = clean_tokens_by_date_Aramex_Data(input_data.copy(), 'Aramex_Inv_date', 'TOKENNO')
+
+    assert_frame_equal(result, expected_output)
+    assert (result.loc[result['Aramex_Inv_date'] == '2023-06-01', 'TOKENNO'] == '1111').all()
+
 def test_add_order_number_Aramex_Data():
     aramex_data = pd.DataFrame({
         'AWB': ['123', '456'],
@@ -129,10 +178,10 @@ def test_convert_data_types_aramex_cosmaline():
         'ShprNo': 'object',
         'Delivery_Date': 'datetime64[ns]',
         'CODAmount': 'float32',
-        'CODCurrency': 'object',
+        'CODCurrency': 'category',
         'O_CODAmount': 'float32',
         'Aramex_Inv_date': 'datetime64[ns]',
-        'TOKENNO': 'object',
+        'TOKENNO': 'category',
         'order_number': 'object'
     })
     result = convert_data_types_aramex_cosmaline(input_data)
@@ -154,3 +203,55 @@ def test_concatenate_Aramex_Cosmaline():
     result = concatenate_Aramex_Cosmaline(df1, df2)
     assert result.equals(expected_output)
 
+
+def test_categorical_Aramex_columns():
+    input_data = pd.DataFrame({
+        'CODAmount': [0.0, 50.0],
+        'CODCurrency': pd.Categorical(['USD', 'USD']),
+    })
+    result = update_cod_currency_Aramex_data(input_data)
+    assert isinstance(result['CODCurrency'].dtype, pd.CategoricalDtype)
+    assert result['CODCurrency'].tolist() == ['USD', 'LBP']
+
+    tokens = pd.DataFrame({
+        'Delivery_Date': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-01', '2024-01-01']),
+        'TOKENNO': pd.Categorical(['B', 'A', 'B', 'A'], categories=['B', 'A']),
+    })
+    result = clean_tokens_by_date_Aramex_Data(tokens, 'Delivery_Date', 'TOKENNO')
+    assert isinstance(result['TOKENNO'].dtype, pd.CategoricalDtype)
+    assert result['TOKENNO'].tolist() == ['A', 'A', 'A', 'A']
+
+    df1 = pd.DataFrame({'TOKENNO': pd.Categorical(['T1', 'T2'])})
+    df2 = pd.DataFrame({'TOKENNO': pd.Categorical(['Shipped With Cosmaline'])})
+    result = concatenate_Aramex_Cosmaline(df1, df2)
+    assert isinstance(result['TOKENNO'].dtype, pd.CategoricalDtype)
+    assert result['TOKENNO'].tolist() == ['T1', 'T2', 'Shipped With Cosmaline']
+
+def test_tokens_by_date_in_two_phases():
+    rng = np.random.default_rng(1)
+    size = 2000
+    input_data = pd.DataFrame({
+        'Aramex_Inv_date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 60, size), unit='D'),
+        'TOKENNO': rng.choice(['1111', '2222', '3333', '4444'], size).astype(object),
+        'CODAmount': np.arange(size, dtype=float),
+    })
+    input_data.loc[rng.random(size) < 0.05, 'TOKENNO'] = np.nan
+    input_data.loc[rng.random(size) < 0.05, 'Aramex_Inv_date'] = pd.NaT
+    tied_dates = pd.DataFrame({
+        'Aramex_Inv_date': pd.to_datetime(['2023-06-01'] * 4),
+        'TOKENNO': ['2222', '1111', '2222', '1111'],
+        'CODAmount': [-1.0, -2.0, -3.0, -4.0],
+    })
+    input_data = pd.concat([input_data, tied_dates], ignore_index=True)
+    chunks = [input_data.iloc[start:start + 300] for start in range(0, len(input_data), 300)]
+
+    counts = None
+    for chunk in chunks:
+        counts = count_tokens_by_date(chunk, 'Aramex_Inv_date', 'TOKENNO', counts)
+    modes = mode_tokens_by_date(counts)
+    result = pd.concat([apply_tokens_by_date(chunk.copy(), 'Aramex_Inv_date', 'TOKENNO', modes) for chunk in chunks])
+
+    expected_output = clean_tokens_by_date_Aramex_Data(input_data.copy(), 'Aramex_Inv_date', 'TOKENNO')
+    # Rows are in date order within each chunk, so compare them by their unique amount
+    assert_frame_equal(result.sort_values('CODAmount').reset_index(drop=True), expected_output.sort_values('CODAmount').reset_index(drop=True))
+    assert modes[pd.Timestamp('2023-06-01')] == '1111'
@@ -57,7 +57,7 @@ def test_convert_data_types_Cosmaline_Data():
         'OrderNo': [123, 456]
     })
     expected_output = input_data.astype({
-        'Currency': 'object',
+        'Currency': 'category',
         'Driver_Delivery_date': 'datetime64[ns]',
         'Amount': 'float64',
         'OrderNo': 'object'
@@ -136,10 +136,10 @@ def test_convert_data_types_aramex_cosmaline():
         'ShprNo': 'object',
         'Delivery_Date': 'datetime64[ns]',
         'CODAmount': 'float32',
-        'CODCurrency': 'object',
+        'CODCurrency': 'category',
         'O_CODAmount': 'float32',
         'Aramex_Inv_date': 'datetime64[ns]',
-        'TOKENNO': 'object',
+        'TOKENNO': 'category',
         'order_number': 'object'
     })
     result = convert_data_types_aramex_cosmaline(input_data)
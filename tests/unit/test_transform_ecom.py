@@ -36,13 +36,13 @@ def test_convert_data_types_ECOM_Data():
     })
     expected_output = input_data.astype({
         'Order Number': 'object',
-        'Shipper Name': 'object',
+        'Shipper Name': 'category',
         'Created At': 'datetime64[ns]',
         'Delivered At': 'datetime64[ns]',
-        'Billing Type': 'object',
+        'Billing Type': 'category',
         'Amount': 'float64',
-        'Currency': 'object',
-        'Country': 'object',
+        'Currency': 'category',
+        'Country': 'category',
         'AWB': 'object'
     })
     result = convert_data_types_ECOM_Data(input_data)
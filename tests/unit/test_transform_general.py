@@ -23,6 +23,27 @@ test_rename_columns_to_lowercase:
     -Purpose: Verify that the rename_columns_to_lowercase function correctly renames columns to lowercase.
     -Setup: Create a DataFrame with uppercase column names.
     -Assertion: Check if the function output matches the expected DataFrame with lowercase column names.
+
+test_add_row_hash:
+    -Purpose: Verify that the add_row_hash function gives a row the same hash before it is stored and after it is read back from the database.
+    -Setup: Create a DataFrame and a copy holding the values as returned by FLOAT and DATETIME columns, plus a row differing in one column.
+    -Assertion: Check that the hashes of the stored copy match, that the differing row gets another hash, that missing values are hashed
+                and that large or precise amounts stored apart by a FLOAT column hash apart.
+
+test_normalize_categorical_columns:
+    -Purpose: Verify that lower_columns and uppercase_columns normalize the categories of a categorical column instead of its rows.
+    -Setup: Create categorical columns holding variants of the same value and a missing value.
+    -Assertion: Check that the columns stay categorical, that the variants are merged into one category and that the rows match the object path.
+
+test_add_row_hash_categorical:
+    -Purpose: Verify that a categorical column hashes like the same column stored as objects.
+    -Setup: Create a DataFrame with a text column and a copy where that column is categorical.
+    -Assertion: Check that both give the same hashes.
+
+test_remove_duplicates_across_chunks:
+    -Purpose: Verify that remove_duplicates_across_chunks keeps the first occurrence of every row over all the chunks.
+    -Setup: Split a DataFrame with duplicates within and across chunks into chunks sharing one set of seen rows.
+    -Assertion: Check that the concatenated chunks match remove_duplicates on the whole DataFrame.
 '''
 
 import pytest
@@ -34,7 +55,7 @@ import os
 script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
 sys.path.append(script_path)
 
-from transform import lower_columns, uppercase_columns, remove_missing_values, remove_duplicates, rename_columns_to_lowercase
+from transform import lower_columns, uppercase_columns, remove_missing_values, remove_duplicates, remove_duplicates_across_chunks, rename_columns_to_lowercase, add_row_hash
 
 def test_lower_columns():
     input_data = pd.DataFrame({
@@ -97,4 +118,70 @@ def test_rename_columns_to_lowercase():
         'age': [25, 30, 35]
     })
     result = rename_columns_to_lowercase(input_data)
-    assert result.equals(expected_output)
\ No newline at end of file
+    assert result.equals(expected_output)
+
+def test_add_row_hash():
+    columns = ['value_date', 'narrative', 'amount', 'currency']
+    input_data = pd.DataFrame({
+        'value_date': pd.to_datetime(['2024-01-01 10:15:00.250', '2024-01-02 00:00:00.000', None]),
+        'narrative': ['CYBS 123', 'CYBS 456', None],
+        'amount': [10.1, 89500.0, None],
+        'currency': ['USD', 'LBP', 'USD'],
+    })
+    # The same rows as stored in the database: single-precision floats and no fractional seconds
+    stored_data = pd.DataFrame({
+        'value_date': pd.to_datetime(['2024-01-01 10:15:00', '2024-01-02 00:00:00', None]),
+        'narrative': ['CYBS 123', 'CYBS 456', None],
+        'amount': [10.100000381469727, 89500, None],
+        'currency': ['USD', 'LBP', 'USD'],
+    })
+
+    result = add_row_hash(input_data, columns)
+    stored_result = add_row_hash(stored_data, columns)
+
+    assert 'row_hash' not in input_data.columns
+    assert result['row_hash'].str.len().eq(32).all()
+    assert result['row_hash'].tolist() == stored_result['row_hash'].tolist()
+    assert result['row_hash'].nunique() == 3
+
+    changed_data = input_data.copy()
+    changed_data.loc[0, 'currency'] = 'LBP'
+    assert add_row_hash(changed_data, columns)['row_hash'][0] != result['row_hash'][0]
+
+    # Amounts a FLOAT column stores apart hash apart, large or precise ones included
+    amounts = pd.DataFrame({'amount': [1234567.5, 1234568.2, 12.345678, 12.345681]})
+    assert add_row_hash(amounts, ['amount'])['row_hash'].nunique() == 4
+    # and an amount read back from the column hashes as the one written
+    assert add_row_hash(pd.DataFrame({'amount': [1234568.25]}), ['amount'])['row_hash'][0] == add_row_hash(amounts, ['amount'])['row_hash'][1]
+
+def test_normalize_categorical_columns():
+    input_data = pd.DataFrame({
+        'Currency': pd.Categorical([' usd', 'USD', 'lbp ', None, 'usd']),
+        'Shipper': pd.Categorical(['ARAMEX', ' aramex', 'Cosmaline', 'cosmaline ', None]),
+    })
+    expected_output = pd.DataFrame({
+        'Currency': uppercase_columns(input_data.astype(object), ['Currency'])['Currency'].astype('category'),
+        'Shipper': lower_columns(input_data.astype(object), ['Shipper'])['Shipper'].astype('category'),
+    })
+    result = uppercase_columns(input_data.copy(), ['Currency'])
+    result = lower_columns(result, ['Shipper'])
+    pd.testing.assert_frame_equal(result, expected_output)
+    assert list(result['Currency'].cat.categories) == ['LBP', 'USD']
+    assert list(result['Shipper'].cat.categories) == ['Aramex', 'Cosmaline']
+
+def test_add_row_hash_categorical():
+    input_data = pd.DataFrame({'currency': ['USD', None, 'LBP'], 'amount': [1.5, 2.0, 3.0]})
+    categorical_data = input_data.astype({'currency': 'category'})
+    columns = ['currency', 'amount']
+    pd.testing.assert_series_equal(add_row_hash(categorical_data, columns)['row_hash'], add_row_hash(input_data, columns)['row_hash'])
+
+def test_remove_duplicates_across_chunks():
+    input_data = pd.DataFrame({
+        'order_number': ['1', '2', '1', '3', '2', '4', '3', '3'],
+        'amount': [10.0, 20.0, 10.0, 30.0, 25.0, 40.0, 30.0, 30.0],
+    })
+    seen_rows = set()
+    chunks = [input_data.iloc[start:start + 3] for start in range(0, len(input_data), 3)]
+    result = pd.concat([remove_duplicates_across_chunks(chunk, seen_rows) for chunk in chunks])
+    pd.testing.assert_frame_equal(result, remove_duplicates(input_data))
+    assert len(seen_rows) == len(result)
@@ -0,0 +1,46 @@
+'''
+test_find_row_wise_applies:
+    -Purpose: Verify that find_row_wise_applies only reports apply calls made along the rows.
+    -Setup: Parse a snippet with row-wise and element-wise apply calls.
+    -Assertion: Check the reported line numbers.
+
+test_no_row_wise_apply_in_transforms:
+    -Purpose: Verify that the transform modules do not use row-wise DataFrame.apply(axis=1), which builds a Series for every row.
+    -Setup: Parse the source of every transform module.
+    -Assertion: Check that no apply call is made with axis=1 or axis='columns'.
+'''
+
+import pytest
+import ast
+import glob
+import os
+
+# The transform modules live in the scripts directory
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+
+TRANSFORM_MODULES = sorted(
+    glob.glob(os.path.join(script_path, 'transform*.py'))
+    + glob.glob(os.path.join(script_path, 'models', 'transform*.py'))
+)
+
+def find_row_wise_applies(source):
+    """
+    Returns the line numbers of the apply calls made along the rows of a DataFrame.
+    """
+    lines = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'apply':
+            for keyword in node.keywords:
+                if keyword.arg == 'axis' and isinstance(keyword.value, ast.Constant) and keyword.value.value in (1, 'columns'):
+                    lines.append(node.lineno)
+    return lines
+
+def test_find_row_wise_applies():
+    source = "df.apply(lambda row: row['a'], axis=1)\ndf['a'].apply(str)\ndf.apply(sum, axis='columns')\n"
+    assert find_row_wise_applies(source) == [1, 3]
+
+@pytest.mark.parametrize('module_path', TRANSFORM_MODULES, ids=os.path.basename)
+def test_no_row_wise_apply_in_transforms(module_path):
+    with open(module_path, 'r') as file:
+        lines = find_row_wise_applies(file.read())
+    assert not lines, f"Row-wise apply(axis=1) in {os.path.basename(module_path)} at lines {lines}; use column operations such as np.where or Series.where instead"
@@ -92,19 +92,19 @@ def test_convert_data_types_Oracle_Data():
         'tax_code': ['TAX1', 'TAX2']
     })
     expected_output = input_data.astype({
-        'operating_unit_name': 'object',
+        'operating_unit_name': 'category',
         'oracle_reference_order_number': 'int32',
         'ecom_reference_order_number': 'object',
-        'order_type': 'object',
-        'order_type_name': 'object',
+        'order_type': 'category',
+        'order_type_name': 'category',
         'ordered_item': 'object',
         'ordered_quantity': 'int32',
-        'pricing_quantity_uom': 'object',
+        'pricing_quantity_uom': 'category',
         'unit_selling_price': 'float32',
         'unit_list_price': 'float32',
         'ordered_date': 'datetime64[ns]',
-        'customer_name': 'object',
-        'tax_code': 'object'
+        'customer_name': 'category',
+        'tax_code': 'category'
     })
     expected_output['ordered_date'] = pd.to_datetime(expected_output['ordered_date'])
     result = convert_data_types_Oracle_Data(input_data)
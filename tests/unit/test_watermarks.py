@@ -0,0 +1,72 @@
+'''
+test_rows_since:
+    -Purpose: Verify that rows_since keeps the rows on or after the cutoff and the rows without a timestamp.
+    -Setup: Create a DataFrame with dates before, on and after the cutoff, and a missing date.
+    -Assertion: Check that only the rows before the cutoff are dropped.
+
+test_watermarks_across_runs:
+    -Purpose: Verify that watermarks are only advanced when a run is committed and never move back.
+    -Setup: Stage and commit the watermarks of a first run, then stage an older watermark in a second run.
+    -Assertion: Check the cutoff returned by watermark_cutoff before and after each commit.
+
+test_incremental_extraction:
+    -Purpose: Verify that a chunk filter passed to extract_sheets_to_files drops the rows before the watermark at extract time.
+    -Setup: Write a daily rate sheet and extract it in chunks with a rows_since filter.
+    -Assertion: Check that only the rows past the cutoff are staged.
+'''
+
+import pytest
+import pandas as pd
+import sys
+import os
+from functools import partial
+
+# Add the scripts directory to the system path
+script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts'))
+sys.path.append(script_path)
+
+from watermarks import watermark_cutoff, rows_since, stage_watermarks, commit_watermarks
+from extract import extract_sheets_to_files
+from staging import read_staged_data
+
+def test_rows_since():
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-01', '2024-01-05', None, '2024-01-09']),
+        'Rate': [89500.0, 89600.0, 89700.0, 89800.0],
+    })
+
+    result = rows_since(df, 'Date', pd.Timestamp('2024-01-05'))
+
+    assert result['Rate'].tolist() == [89600.0, 89700.0, 89800.0]
+
+def test_watermarks_across_runs(tmp_path):
+    store_path = str(tmp_path / 'watermarks.json')
+    pending_path = str(tmp_path / 'watermarks_pending.json')
+
+    # A source that was never loaded is ingested in full
+    assert watermark_cutoff('Daily Rate', store_path, 3) is None
+
+    # Sheets without rows do not produce a watermark
+    stage_watermarks({'Daily Rate': pd.Timestamp('2024-01-10'), 'Oracle Data': pd.NaT}, pending_path)
+    assert watermark_cutoff('Daily Rate', store_path, 3) is None
+    commit_watermarks(store_path, pending_path)
+    assert watermark_cutoff('Daily Rate', store_path, 3) == pd.Timestamp('2024-01-07')
+    assert watermark_cutoff('Oracle Data', store_path, 3) is None
+    assert not os.path.exists(pending_path)
+
+    # A run that only saw older rows does not move the watermark back
+    stage_watermarks({'Daily Rate': pd.Timestamp('2024-01-08')}, pending_path)
+    commit_watermarks(store_path, pending_path)
+    assert watermark_cutoff('Daily Rate', store_path, 0) == pd.Timestamp('2024-01-10')
+
+def test_incremental_extraction(tmp_path):
+    workbook_path = tmp_path / 'workbook.xlsx'
+    rate_data = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=6), 'Rate': [89500.5 + i for i in range(6)]})
+    rate_data.to_excel(workbook_path, sheet_name='Daily Rate', index=False)
+    target = str(tmp_path / 'daily_rate_data.arrow')
+    chunk_filters = {'Daily Rate': partial(rows_since, column='Date', since=pd.Timestamp('2024-01-04'))}
+
+    extract_sheets_to_files(str(workbook_path), {'Daily Rate': target}, chunksize=2, chunk_filters=chunk_filters)
+
+    expected = rate_data[rate_data['Date'] >= '2024-01-04'].reset_index(drop=True)
+    pd.testing.assert_frame_equal(read_staged_data(target), expected)